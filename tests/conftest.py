@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# 模块都在仓库根目录（没有打包），测试直接从根目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xinjing_logging import setup_logging  # noqa: E402
+
+# xinjing 导入时会配置日志写到当前目录；先把日志配置到临时目录，测试不改动仓库里的日志文件
+setup_logging(os.path.join(tempfile.mkdtemp(prefix='bjnews_tests_'), 'bjnews_crawler.log'))
@@ -0,0 +1,80 @@
+import os
+
+from xinjing_archive import ArticleIndex, article_day_dir, format_article, make_article_id, parse_filename
+from xinjing_text import clean_title, title_key
+
+
+def _write(output_dir, date_str, name, title):
+    day_dir = article_day_dir(output_dir, date_str)
+    os.makedirs(day_dir, exist_ok=True)
+    with open(os.path.join(day_dir, name), 'w', encoding='utf-8') as f:
+        f.write(format_article(title, 'A01', date_str, '正文内容，足够长的一段文字。'))
+
+
+def _legacy_index(tmp_path, files):
+    for name, title in files:
+        _write(str(tmp_path), '20250115', name, title)
+    return ArticleIndex(str(tmp_path)).load()
+
+
+def _contains(index, raw_title, edition='A01'):
+    # 与爬虫相同：链接文字先清理，再取标题键
+    return index.contains('20250115_A01_9999', '20250115', edition, title_key(clean_title(raw_title)))
+
+
+def test_legacy_crawler_filename_with_entities_and_fullwidth(tmp_path):
+    # 旧主爬虫：标题未规范化，只去掉了非法字符
+    raw = '２０２５年北京市政府工作报告&quot;发布&quot;'
+    index = _legacy_index(tmp_path, [(f'20250115_003_A01_{raw}.txt', raw)])
+    assert _contains(index, raw)
+    assert not _contains(index, '另一篇文章')
+
+
+def test_legacy_crawler_filename_truncated_at_50(tmp_path):
+    raw = '聚焦首都高质量发展&amp;民生改善：' + '一' * 30 + '系列报道之三（完）'
+    assert len(raw) > 50
+    index = _legacy_index(tmp_path, [(f'20250115_012_A01_{raw[:50]}.txt', raw)])
+    assert _contains(index, raw)
+
+
+def test_legacy_gap_fill_filename_untruncated(tmp_path):
+    # 旧补抓脚本：没有版面、标题不截断
+    raw = '市场监管总局：' + '二' * 60 + '（记者 张三）'
+    index = _legacy_index(tmp_path, [(f'20250115_07_{raw}.txt', raw)])
+    assert _contains(index, raw)
+    assert _contains(index, raw, edition='A05')
+
+
+def test_id_named_files_are_indexed_by_id(tmp_path):
+    index = _legacy_index(tmp_path, [('20250115_A01_3930_标题.txt', '标题')])
+    assert index.contains('20250115_A01_3930')
+    assert not index.legacy
+
+
+def test_article_id_prefers_url_then_content_id_then_title_hash():
+    assert make_article_id('20250115', 'A01', 'https://epaper.bjnews.com.cn/html/20250115_A01_3930.html') \
+        == '20250115_A01_3930'
+    assert make_article_id('20250115', 'A01', 'https://epaper.bjnews.com.cn/content_3930.htm?div=-1') \
+        == '20250115_A01_3930'
+    assert make_article_id('20250115', 'A01', content_id='77') == '20250115_A01_77'
+    hashed = make_article_id('20250115', 'A01', title='标题 一')
+    assert hashed.startswith('20250115_A01_h')
+    # 标题哈希不受空白影响，但区分版面
+    assert make_article_id('20250115', 'A01', title=' 标题  一 ') == hashed
+    assert make_article_id('20250115', 'A02', title='标题 一') != hashed
+
+
+def test_id_filename_round_trips_through_parse_filename():
+    article_id = make_article_id('20250115', 'A01', title='标题')
+    info = parse_filename(f'{article_id}_标题.txt')
+    assert info['article_id'] == article_id
+    assert (info['date'], info['edition'], info['title'], info['num']) == ('20250115', 'A01', '标题', None)
+
+
+def test_parse_legacy_and_unrelated_filenames():
+    crawler = parse_filename('20250115_003_A01_标题.txt')
+    assert (crawler['article_id'], crawler['num'], crawler['edition']) == (None, '003', 'A01')
+    gap_fill = parse_filename('20250115_07_标题.txt')
+    assert (gap_fill['num'], gap_fill['edition'], gap_fill['title']) == ('07', None, '标题')
+    assert parse_filename('_manifest.json') is None
+    assert parse_filename('notes.txt') is None
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+import time
+
+from xinjing_cache import BrowserCache
+
+
+def test_slot_lock_held_by_live_process_never_expires(tmp_path):
+    cache = BrowserCache(str(tmp_path), max_slots=1)
+    lock = cache._slot_lock(0)
+    assert lock.try_acquire()
+    month_ago = time.time() - 30 * 24 * 3600
+    os.utime(lock.path, (month_ago, month_ago))
+    assert not cache._slot_lock(0).try_acquire()
+    lock.release()
+
+
+def test_slot_lock_of_dead_process_is_taken_over(tmp_path):
+    cache = BrowserCache(str(tmp_path), max_slots=1)
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    with open(os.path.join(cache.slots_dir, '0.lock'), 'w') as f:
+        f.write(str(process.pid))
+    assert cache._slot_lock(0).try_acquire()
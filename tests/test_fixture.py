@@ -0,0 +1,93 @@
+import os
+import shutil
+from contextlib import contextmanager
+import urllib.error
+import urllib.request
+
+import pytest
+
+from xinjing_archive import iter_article_files, parse_filename
+from xinjing_fixture import ENGINES, FaultProfile, FixtureServer, FixtureSite, fixture_crawler
+
+DATES = ['20250114', '20250115']
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+
+requires_chrome = pytest.mark.skipif(not any(shutil.which(name) for name in CHROME_BINARIES),
+                                     reason='需要本机安装 Chrome/Chromium')
+
+
+@pytest.fixture
+def site():
+    return FixtureSite(DATES, editions=2, articles=3, paragraphs=3)
+
+
+def _get(server, path):
+    try:
+        with urllib.request.urlopen(server.base_url.rstrip('/') + path, timeout=5) as response:
+            return response.status, response.read().decode('utf-8')
+    except urllib.error.HTTPError as e:
+        return e.code, ''
+
+
+@contextmanager
+def _serve(site, profile):
+    server = FixtureServer(site, profile).start()
+    try:
+        yield server
+    finally:
+        server.stop()
+
+
+def test_fixture_site_serves_calendar_editions_and_articles(site):
+    with _serve(site, FaultProfile()) as server:
+        status, page = _get(server, '/?y=2025&m=1')
+        assert status == 200 and 'cal-dates' in page and site.edition_path('20250115', 'A01') in page
+        status, page = _get(server, site.edition_path('20250115', 'A02'))
+        assert status == 200 and site.article_path('20250115_A02_1101') in page
+        status, page = _get(server, site.article_path('20250115_A02_1101'))
+        assert status == 200 and 'id="ozoom"' in page
+        assert _get(server, '/html/2025/20250116/20250116_A01.html')[0] == 404
+
+
+@pytest.mark.parametrize('profile, counter, status, marker', [
+    (FaultProfile('5xx', error_rate=1.0), 'error', 503, None),
+    (FaultProfile('block', block_rate=1.0), 'block', 200, '访问过于频繁'),
+    (FaultProfile('missing', missing_rate=1.0), 'missing', 200, None),
+])
+def test_fault_profiles_are_injected(site, profile, counter, status, marker):
+    with _serve(site, profile) as server:
+        response_status, page = _get(server, site.article_path('20250115_A01_1001'))
+        assert response_status == status
+        if marker:
+            assert marker in page
+        assert 'id="ozoom"' not in page
+        assert server.stats[counter] == 1
+
+
+def _crawl(site, profile, engine, output_dir):
+    with _serve(site, profile) as server:
+        crawler = fixture_crawler(server.base_url, output_dir, profile)
+        try:
+            return ENGINES[engine](crawler, site.dates)
+        finally:
+            crawler.launcher.release(crawler.driver)
+            crawler.driver = None
+            crawler.launcher.stop()
+
+
+def _archived_ids(output_dir):
+    return {parse_filename(os.path.basename(path))['article_id'] for path in iter_article_files(output_dir)}
+
+
+@requires_chrome
+@pytest.mark.parametrize('engine', ['click', 'tabs'])
+def test_engine_recovers_from_faults_on_rerun(site, engine, tmp_path):
+    output_dir = str(tmp_path)
+    expected = {aid for date in site.dates for edition in site.editions for aid in site.article_ids(date, edition)}
+    # 故障下保存的文章都是完整的真实文章；再跑一遍无故障配置补齐其余文章，已保存的不重复保存
+    saved = _crawl(site, FaultProfile('mixed', error_rate=0.1, missing_rate=0.1, seed=7), engine, output_dir)
+    assert _archived_ids(output_dir) <= expected
+    assert len(_archived_ids(output_dir)) == saved
+    resaved = _crawl(site, FaultProfile(), engine, output_dir)
+    assert _archived_ids(output_dir) == expected
+    assert saved + resaved == len(expected)
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+
+from xinjing_archive import DAY_MANIFEST_NAME, article_day_dir, format_article
+from xinjing_scan import load_repair_queue, merge_repair_queue, scan_day, main as scan_main
+from xinjing_text import title_key
+
+DATE = '20250115'
+
+
+def _day(tmp_path):
+    day_dir = article_day_dir(str(tmp_path), DATE)
+    os.makedirs(day_dir, exist_ok=True)
+    return day_dir
+
+
+def _article(day_dir, name, title='标题', edition='A01', content='正文内容，足够长的一段文字。'):
+    with open(os.path.join(day_dir, name), 'w', encoding='utf-8') as f:
+        f.write(format_article(title, edition, DATE, content))
+
+
+def _manifest(day_dir, editions, status='ok', **extra):
+    with open(os.path.join(day_dir, DAY_MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(dict({'date': DATE, 'status': status, 'editions': editions}, **extra), f, ensure_ascii=False)
+
+
+def test_skipped_legacy_articles_count_as_present(tmp_path):
+    day_dir = _day(tmp_path)
+    raw = '２０２５年政府工作报告&quot;发布&quot;'
+    _article(day_dir, f'{DATE}_001_A01_{raw}.txt', raw)
+    _manifest(day_dir, {'A01': {'status': 'ok', 'listed': 1, 'saved': 0, 'skipped': 1,
+                                'articles': {f'{DATE}_A01_3930': 'http://x/3930.html'},
+                                'legacy': {f'{DATE}_A01_3930': title_key('2025年政府工作报告"发布"')}}})
+    assert scan_day(day_dir)['units'] == []
+
+
+def _ok(articles=None, listed=None, **extra):
+    articles = articles or {}
+    return dict({'status': 'ok', 'listed': len(articles) if listed is None else listed, 'saved': len(articles),
+                 'skipped': 0, 'articles': articles}, **extra)
+
+
+def test_complete_day_has_no_units(tmp_path):
+    day_dir = _day(tmp_path)
+    _article(day_dir, f'{DATE}_A01_3930_标题.txt')
+    _manifest(day_dir, {'A01': _ok({f'{DATE}_A01_3930': 'http://x/3930.html'})}, edition_list=['A01'])
+    result = scan_day(day_dir)
+    assert (result['files'], result['valid'], result['units']) == (1, 1, [])
+
+
+def test_missing_article_id_is_reported_per_edition(tmp_path):
+    day_dir = _day(tmp_path)
+    _article(day_dir, f'{DATE}_A01_3930_标题.txt')
+    _manifest(day_dir, {'A01': _ok({f'{DATE}_A01_3930': 'http://x/3930.html',
+                                    f'{DATE}_A01_3931': 'http://x/3931.html'})})
+    units = scan_day(day_dir)['units']
+    assert [u['edition'] for u in units] == ['A01']
+    assert f'{DATE}_A01_3931' in units[0]['reasons'][0]
+
+
+def test_invalid_file_and_unscraped_edition(tmp_path):
+    day_dir = _day(tmp_path)
+    _article(day_dir, f'{DATE}_A01_3930_标题.txt')
+    with open(os.path.join(day_dir, f'{DATE}_A02_4000_截断.txt'), 'w', encoding='utf-8') as f:
+        f.write('标题: 截断')
+    with open(os.path.join(day_dir, f'{DATE}_A02_4001_x.txt.tmp'), 'w', encoding='utf-8') as f:
+        f.write('')
+    _manifest(day_dir, {'A01': _ok({f'{DATE}_A01_3930': 'http://x/3930.html'})},
+              status='partial', edition_list=['A01', 'A02', 'A03'])
+    result = scan_day(day_dir)
+    assert result['leftovers'] == 1
+    assert [i['file'] for i in result['invalid']] == [f'{DATE}_A02_4000_截断.txt']
+    assert {u['edition']: u['reasons'] for u in result['units']} == {
+        'A02': [f'{DATE}_A02_4000_截断.txt: 文件过短', '版面未爬取'], 'A03': ['版面未爬取']}
+
+
+def test_count_check_without_article_ids(tmp_path):
+    day_dir = _day(tmp_path)
+    _article(day_dir, f'{DATE}_001_A01_标题.txt')
+    _manifest(day_dir, {'A01': _ok(listed=3)})
+    assert scan_day(day_dir)['units'][0]['reasons'] == ['文章不完整: 1/3']
+
+
+def test_no_paper_day_needs_no_repair(tmp_path):
+    _manifest(_day(tmp_path), {}, status='no_paper')
+    assert scan_day(_day(tmp_path))['units'] == []
+
+
+def test_day_without_manifest_or_articles_is_repaired_whole(tmp_path):
+    assert scan_day(_day(tmp_path))['units'] == [{'date': DATE, 'edition': None, 'reasons': ['没有有效文章']}]
+
+
+def test_concurrent_merges_keep_every_unit(tmp_path):
+    # 回填各线程结束时同时并入修复队列
+    path = os.path.join(str(tmp_path), 'repair_queue.json')
+
+    def _merge(worker):
+        for day in range(1, 21):
+            merge_repair_queue([{'date': f'2025{worker + 1:02d}{day:02d}', 'edition': None, 'reasons': ['熔断暂停']}],
+                               path)
+
+    threads = [threading.Thread(target=_merge, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(load_repair_queue(path)) == 120
+    assert os.listdir(str(tmp_path)) == ['repair_queue.json']
+
+
+def test_scan_merges_into_the_repair_queue_and_drops_repaired_units(tmp_path, monkeypatch):
+    day_dir = _day(tmp_path)
+    _article(day_dir, f'{DATE}_A01_3930_标题.txt')
+    _manifest(day_dir, {'A01': _ok({f'{DATE}_A01_3930': 'http://x/3930.html'})},
+              status='partial', edition_list=['A01', 'A02'])
+    queue = os.path.join(str(tmp_path), 'repair_queue.json')
+    merge_repair_queue([{'date': '20250110', 'edition': 'A03', 'reasons': ['熔断暂停']},
+                        {'date': DATE, 'edition': None, 'reasons': ['截止时间前未完成']},
+                        {'date': DATE, 'edition': 'A01', 'reasons': ['本次爬取失败']}], queue)
+    monkeypatch.setattr('sys.argv', ['xinjing_scan.py', str(tmp_path), '--queue', queue])
+    assert scan_main() == 0
+    assert [(u['date'], u['edition']) for u in load_repair_queue(queue)] == [('20250110', 'A03'), (DATE, 'A02')]
@@ -0,0 +1,75 @@
+import time
+
+from xinjing_schedule import CrawlScheduler
+
+DATES = ['20250113', '20250114', '20250115']
+
+
+def _scheduler(**kwargs):
+    scheduler = CrawlScheduler(**kwargs)
+    scheduler.add_dates(DATES)
+    return scheduler
+
+
+def _drain(scheduler, editions):
+    order, current = [], None
+    while True:
+        unit = scheduler.next_unit(current)
+        if unit is None:
+            return order
+        if not scheduler.is_discovered(unit.date):
+            scheduler.add_editions(unit.date, editions)
+        current = unit.date
+        order.append((unit.date, unit.edition))
+        scheduler.record(unit, 1.0, ok=True)
+
+
+def test_front_pages_before_inside_pages_newest_first():
+    order = _drain(_scheduler(), ['A01', 'A02', 'B01'])
+    front = [date for date, edition in order if edition == 'A01']
+    assert front == sorted(DATES, reverse=True)
+    # 任何日期的头版都在内页之前
+    last_front = max(i for i, (_, edition) in enumerate(order) if edition == 'A01')
+    first_inside = min(i for i, (_, edition) in enumerate(order) if edition == 'B01')
+    assert last_front < first_inside
+    assert len(order) == len(set(order)) == 9
+
+
+def test_failed_units_are_boosted():
+    scheduler = _scheduler(failed_units=[('20250113', None)])
+    assert scheduler.next_unit().date == '20250113'
+
+
+def test_deadline_stops_and_reports_whole_dates_for_unvisited_days():
+    scheduler = _scheduler(deadline=time.time() + 100)
+    scheduler.edition_seconds, scheduler.navigate_seconds = 60.0, 30.0
+    unit = scheduler.next_unit()
+    scheduler.add_editions(unit.date, ['A01', 'A02'])
+    scheduler.record(unit, 1.0, ok=True)
+    # 下一个单元预计 60s 以上，截止前做不完
+    scheduler.deadline = time.time() + 30
+    assert scheduler.next_unit(unit.date) is None
+    assert scheduler.stopped_by_deadline
+    repair = {(u['date'], u['edition']) for u in scheduler.undone_as_repair_units()}
+    assert repair == {('20250115', 'A02'), ('20250114', None), ('20250113', None)}
+    assert ('20250115', 'A01') in scheduler.completed_keys()
+
+
+def test_requeued_unit_stays_undone():
+    scheduler = _scheduler()
+    unit = scheduler.next_unit()
+    scheduler.requeue(unit)
+    assert {u['date'] for u in scheduler.undone_as_repair_units()} == set(DATES)
+
+
+def test_deadline_still_issues_units_on_the_current_date_that_fit():
+    scheduler = _scheduler(deadline=time.time() + 1000)
+    scheduler.edition_seconds, scheduler.navigate_seconds = 60.0, 30.0
+    unit = scheduler.next_unit()
+    scheduler.add_editions(unit.date, ['A01', 'A02'])
+    scheduler.record(unit, 60.0, ok=True)
+    # 下一个最高优先级是另一日期的头版（需导航，90s），当前日期的 A02（60s）还来得及
+    scheduler.deadline = time.time() + 75
+    assert (scheduler.next_unit(unit.date).date, scheduler.stopped_by_deadline) == ('20250115', False)
+    assert scheduler.next_unit('20250115') is None
+    assert scheduler.stopped_by_deadline
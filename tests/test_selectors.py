@@ -0,0 +1,42 @@
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from xinjing_selectors import LayoutChangedError, SelectorRegistry
+
+
+class PageStub:
+    """没有任何元素的页面；state 为 [readyState, HTTP状态码, 正文字数]"""
+
+    current_url = 'http://epaper.example/html/20250115_A01.html'
+
+    def __init__(self, state):
+        self.state = state
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script, *args):
+        return self.state
+
+
+@pytest.mark.parametrize('state', [
+    ['loading', 200, 5000],     # 慢页面
+    ['complete', 503, 5000],    # 5xx
+    ['complete', 200, 20],      # 验证页/空白页
+])
+def test_misses_on_abnormal_pages_never_flag_a_layout_change(state):
+    registry = SelectorRegistry()
+    for _ in range(registry.miss_threshold + 2):
+        with pytest.raises(TimeoutException):
+            registry.find(PageStub(state), 'body', timeout=0)
+    assert not registry.is_suspect('body')
+
+
+def test_misses_on_normal_pages_flag_a_layout_change():
+    registry = SelectorRegistry()
+    page = PageStub(['complete', 200, 5000])
+    for _ in range(registry.miss_threshold - 1):
+        with pytest.raises(TimeoutException):
+            registry.find_all(page, 'article_list', timeout=0)
+    with pytest.raises(LayoutChangedError):
+        registry.find_all(page, 'article_list', timeout=0)
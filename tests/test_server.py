@@ -0,0 +1,45 @@
+import json
+import os
+import threading
+import urllib.request
+from urllib.parse import quote
+
+import pytest
+
+from xinjing_archive import article_day_dir, format_article
+from xinjing_server import ArchiveService, make_server
+
+DATE = '20250115'
+
+
+@pytest.fixture
+def base_url(tmp_path):
+    day_dir = article_day_dir(str(tmp_path), DATE)
+    os.makedirs(day_dir)
+    for name, title in ((f'{DATE}_003_A01_政府工作报告 发布#全文.txt', '政府工作报告 发布#全文'),
+                        (f'{DATE}_A01_3930_新文件名.txt', '新文件名')):
+        with open(os.path.join(day_dir, name), 'w', encoding='utf-8') as f:
+            f.write(format_article(title, 'A01', DATE, '正文内容，足够长的一段文字。'))
+    service = ArchiveService(str(tmp_path))
+    service.catalog.refresh()
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield 'http://%s:%d' % server.server_address[:2]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _get_json(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def test_listed_article_ids_round_trip_including_legacy_names(base_url):
+    items = _get_json(base_url + '/articles')['items']
+    assert {item['article_id'] for item in items} == {f'{DATE}_003_A01_政府工作报告 发布#全文', f'{DATE}_A01_3930'}
+    for item in items:
+        article = _get_json(f"{base_url}/articles/{quote(item['article_id'])}")
+        assert article['title'] == item['title']
@@ -0,0 +1,41 @@
+import os
+
+from xinjing_stats import StatsStore
+
+
+def _result(saved, listed=None, status='ok', **extra):
+    return dict({'status': status, 'listed': saved if listed is None else listed, 'saved': saved,
+                 'skipped': 0, 'failed': 0, 'bytes': saved * 1000, 'retries': 0, 'seconds': saved * 2.0}, **extra)
+
+
+def _snapshot(store):
+    tables = {}
+    for table, order in (('daily_stats', 'date'), ('monthly_stats', 'month'),
+                         ('monthly_edition_stats', 'month, edition')):
+        rows = store.conn.execute(f"SELECT * FROM {table} ORDER BY {order}").fetchall()
+        # 运行次数、耗时、更新时间只在增量写入时维护
+        tables[table] = [{k: row[k] for k in row.keys() if k not in ('updated', 'runs', 'wall_seconds')}
+                         for row in rows]
+    return tables
+
+
+def test_incremental_summaries_match_rebuild(tmp_path):
+    store = StatsStore(os.path.join(str(tmp_path), 'crawl_stats.db'))
+    store.record_date('20250114', 'ok', {'A01': _result(5), 'A02': _result(8)}, wall_seconds=40)
+    # 按优先级爬取时同一日期分几次写入
+    store.record_date('20250115', 'partial', {'A01': _result(6)})
+    store.record_date('20250115', 'ok', {'A02': _result(3, listed=4, status='failed', failed=1)})
+    # 重爬替换旧版面结果
+    store.record_date('20250115', 'ok', {'A02': _result(4)})
+    store.record_date('20250203', 'ok', {'A01': _result(7)})
+
+    incremental = _snapshot(store)
+    assert [row['month'] for row in incremental['monthly_stats']] == ['2025-01', '2025-02']
+    january = incremental['monthly_stats'][0]
+    assert (january['dates'], january['editions'], january['saved'], january['failed_editions']) == (2, 4, 23, 0)
+    assert store.editions('20250115')[1]['saved'] == 4
+    assert store.daily('20250115', '20250115')[0]['runs'] == 3
+
+    store.rebuild()
+    assert _snapshot(store) == incremental
+    store.close()
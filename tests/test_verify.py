@@ -0,0 +1,20 @@
+from xinjing_verify import text_hash, title_changed
+
+
+def test_text_hash_ignores_extractor_whitespace():
+    # Selenium 的 .text 在 <br> 处换行，BeautifulSoup 按段落拼接
+    selenium_text = '记者从市政府获悉，\n今年将新建\n公园 20 处。\n\n下一段内容。'
+    soup_text = '记者从市政府获悉，今年将新建公园 20 处。\n下一段内容。'
+    assert text_hash(selenium_text) == text_hash(soup_text)
+
+
+def test_text_hash_detects_corrections():
+    assert text_hash('今年将新建公园20处。') != text_hash('今年将新建公园30处。')
+
+
+def test_title_whitespace_differences_are_not_corrections():
+    # Selenium 的 .text 按行连接主副题，BeautifulSoup 的 get_text(' ', strip=True) 用空格连接
+    assert not title_changed('市政府发布通知 副题', '市政府发布通知\n副题')
+    assert not title_changed('市政府发布通知  副题', '市政府发布通知 副题')
+    assert not title_changed('无标题', '市政府发布通知')
+    assert title_changed('市政府发布更正通知', '市政府发布通知')
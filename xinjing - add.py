@@ -1,120 +1,181 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from urllib.parse import urljoin
+import threading
 import time
+import sys
 import os
 import re
 
-# 创建一个哈希表
-hash_table = {"key1":1,"key2":1,"key3":1}
-
+from xinjing_cache import BrowserCache, CacheMeter, DEFAULT_CACHE_ROOT
+from xinjing_http import get_pool
+from xinjing_text import clean_title, normalize_text, filename_title
+
+# 新京报首页（日历所在页面）
+HOME_URL = 'http://epaper.bjnews.com.cn/'
+
+# 持久化浏览器配置目录
+PROFILE_DIR = os.path.abspath('./chrome_profile_add')
+
+# 磁盘缓存使用与主爬虫共用的缓存目录（占用其中一个工作槽），统计命中率
+_cache = None
+_cache_slot = None
+_cache_meter = CacheMeter()
+
+# 整个脚本共用一个浏览器，不再每个URL启动一次Chrome
+_browser = None
+# 浏览器不是线程安全的，并发抓取时回退到浏览器需要加锁
+_browser_lock = threading.Lock()
+_stats_lock = threading.Lock()
+
+# 文章/版面链接中的日期与版面，例如 .../20250901/20250901_A01/20250901_A01_3930.html
+EDITION_LINK_PATTERN = re.compile(r'(\d{8})_(A\d{2})(?:/|\.html?|$)')
+
+
+def get_browser():
+    global _browser, _cache, _cache_slot
+    if _browser is None:
+        # 配置 Chrome 选项
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')  # 无头模式，不显示浏览器窗口
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--no-sandbox')
+        # 设置日志级别为 ERROR，忽略 INFO 和 WARNING 级别的日志
+        chrome_options.add_argument('--log-level=3')  # 1=WARNING, 2=INFO, 3=FINE
+        chrome_options.add_argument(f'--user-data-dir={PROFILE_DIR}')
+        if _cache_slot is None:
+            _cache = _cache or BrowserCache(DEFAULT_CACHE_ROOT)
+            _cache_slot = _cache.checkout()
+        if _cache_slot is not None:
+            _cache_slot.apply_options(chrome_options)
+        else:
+            chrome_options.add_argument(f'--disk-cache-dir={os.path.join(PROFILE_DIR, "cache")}')
 
-def get_date_urls(url):
-    # 配置 Chrome 选项
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')  # 无头模式，不显示浏览器窗口
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    # 设置日志级别为 ERROR，忽略 INFO 和 WARNING 级别的日志
-    chrome_options.add_argument('--log-level=3')  # 1=WARNING, 2=INFO, 3=FINE
+        # 创建 Chrome 浏览器实例
+        start = time.perf_counter()
+        _browser = webdriver.Chrome(options=chrome_options)
+        print(f"浏览器启动耗时 {time.perf_counter() - start:.2f}s")
+    return _browser
 
-    # 创建 Chrome 浏览器实例
-    browser = webdriver.Chrome(options=chrome_options)
 
-    try:
-        # 打开网页
-        browser.get(url)
-
-        # 显式等待，等待日历组件加载
+def close_browser():
+    global _browser, _cache_slot
+    if _browser is not None:
+        _cache_meter.sample(_browser)
         try:
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, '.cal-dates.clearfix'))
-            )
-            #print("成功加载 .cal-dates.clearfix 元素！")
-        except Exception as e:
-            print(f"等待 .cal-dates.clearfix 元素超时: {e}")
-            return []
-
-        # 定位所有 .cal-date.cal-with-date 元素
-        date_elements = browser.find_elements(By.CSS_SELECTOR, '.cal-date.cal-with-date')
+            _browser.quit()
+        except Exception:
+            pass
+        _browser = None
+    if _cache_slot is not None:
+        _cache.checkin(_cache_slot)
+        _cache_slot = None
+
+
+def _select_calendar_month(browser, year, month):
+    # 日历上的年份/月份下拉框：按选项值识别，先选年再选月
+    for select_element in browser.find_elements(By.CSS_SELECTOR, 'select'):
+        select = Select(select_element)
+        values = [option.get_attribute('value') for option in select.options]
+        if str(year) in values:
+            select.select_by_value(str(year))
+            time.sleep(1)
+    for select_element in browser.find_elements(By.CSS_SELECTOR, 'select'):
+        select = Select(select_element)
+        values = [option.get_attribute('value') for option in select.options]
+        if len(values) <= 12 and str(month) in values:
+            select.select_by_value(str(month))
+            time.sleep(1)
+            return
+
+
+def get_date_url(browser, year, month, day):
+    """在日历上点击指定日期，返回该日期头版文章页URL"""
+    _cache_meter.sample(browser)
+    browser.get(HOME_URL)
+    try:
+        WebDriverWait(browser, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, '.cal-dates.clearfix'))
+        )
+    except Exception as e:
+        print(f"等待 .cal-dates.clearfix 元素超时: {e}")
+        return None
 
-        date_urls = []  # 用于存储每个日期页的链接
+    _select_calendar_month(browser, year, month)
 
-        for date_element in date_elements:
-            try:
-                # 获取 <a> 标签
-                a_tag = date_element.find_element(By.TAG_NAME, 'a')
-                date_num=a_tag.text
-                if date_num in hash_table.keys():
-                    continue
-                else:
-                    hash_table[date_num]=1
-                href = a_tag.get_attribute('href')
-
-                if href == 'javascript:;':
-                    # 模拟点击事件
-                    browser.execute_script("arguments[0].click();", a_tag)
-                    time.sleep(1)  # 等待页面跳转
-
-                    # 获取当前页面的 URL
-                    current_url = browser.current_url
-                    print(f"找到有效链接: {current_url}")
-                    date_urls.append(current_url)
-                else:
-                    print(f"无效链接: {href}，跳过...")
-                break
-            except Exception as e:
-                #print(f"处理日期元素时出错: {e}")
+    date_key = f"{year}{month:02d}{day:02d}"
+    for date_element in browser.find_elements(By.CSS_SELECTOR, '.cal-date.cal-with-date'):
+        try:
+            a_tag = date_element.find_element(By.TAG_NAME, 'a')
+            if a_tag.text.strip() != str(day):
                 continue
+            old_url = browser.current_url
+            browser.execute_script("arguments[0].click();", a_tag)
+            WebDriverWait(browser, 10).until(lambda b: b.current_url != old_url)
+            if date_key in browser.current_url:
+                return browser.current_url
+            print(f"日期 {date_key} 跳转到意外页面: {browser.current_url}")
+            return None
+        except Exception as e:
+            print(f"点击日期 {date_key} 失败: {e}")
+            return None
+    print(f"日历上没有日期 {date_key}")
+    return None
 
-        return date_urls
-
-    except Exception as e:
-        print(f"获取网页内容失败: {e}")
-        return []
-    finally:
-        # 关闭浏览器
-        browser.quit()
 
 def get_html_with_selenium(url):
-    # 配置 Chrome 选项
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')  # 无头模式，不显示浏览器窗口
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    # 设置日志级别为 ERROR，忽略 INFO 和 WARNING 级别的日志
-    chrome_options.add_argument('--log-level=3')  # 1=WARNING, 2=INFO, 3=FINE
-
-    # 创建 Chrome 浏览器实例
-    browser = webdriver.Chrome(options=chrome_options)
+    browser = get_browser()
 
     try:
-        # 打开网页
+        # 打开网页（离开上一个页面前统计其资源的缓存命中）
+        _cache_meter.sample(browser)
         browser.get(url)
 
-        # 显式等待，等待 article-detail 元素出现
+        # 显式等待，等待 article-detail 元素出现（不再额外固定等待）
         try:
-            WebDriverWait(browser,10).until(
+            WebDriverWait(browser, 10).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, '.article-detail'))
             )
         except Exception as e:
             print(f"等待元素超时: {e}")
 
-        # 等待页面加载（可根据实际情况调整等待时间）
-        time.sleep(5)
-
         # 获取网页源代码
         html_content = browser.page_source
         return html_content
     except Exception as e:
         print(f"获取网页内容失败: {e}")
         return None
-    finally:
-        # 关闭浏览器
-        browser.quit()
+
+
+def _count(stats, key):
+    if stats is not None:
+        with _stats_lock:
+            stats[key] += 1
+
+
+def get_html(url, marker='article-detail', stats=None):
+    """优先用共享HTTP连接池抓取，页面缺少标记（需要JS渲染）时回退到共享浏览器"""
+    try:
+        response = get_pool().request('GET', url)
+        if response.status == 200:
+            html = response.data.decode('utf-8', errors='replace')
+            if marker in html:
+                _count(stats, 'http')
+                return html
+    except Exception as e:
+        print(f"HTTP获取失败 {url}: {e}")
+
+    with _browser_lock:
+        html = get_html_with_selenium(url)
+    _count(stats, 'browser')
+    return html
+
 
 def extract_hrefs(html_content):
     soup = BeautifulSoup(html_content, 'html.parser')
@@ -126,6 +187,19 @@ def extract_hrefs(html_content):
             hrefs.append(href)
     return hrefs
 
+
+def extract_edition_urls(html_content, page_url, date_key):
+    # 页面上指向同一天其他版面的链接，按版面号排序
+    soup = BeautifulSoup(html_content, 'html.parser')
+    editions = {}
+    for link in soup.find_all('a', href=True):
+        full_url = urljoin(page_url, link['href'])
+        match = EDITION_LINK_PATTERN.search(full_url)
+        if match and match.group(1) == date_key and match.group(2) not in editions:
+            editions[match.group(2)] = full_url
+    return [editions[code] for code in sorted(editions)]
+
+
 def extract_title_and_subtitle(html_content):
     if html_content:
         soup = BeautifulSoup(html_content, 'html.parser')
@@ -148,9 +222,10 @@ def extract_title_and_subtitle(html_content):
                 return title, content
     return "未找到标题", "未找到内容"
 
+
 def save_article(title, content, output_dir, year, mon, day,counter):
     # 处理标题中的非法字符
-    valid_title = re.sub(r'[\\/*?:"<>|]', '', title)
+    valid_title = filename_title(title, limit=100)
     # 构建存储路径，格式为 新京/2025-01/27
     month_dir = os.path.join(output_dir, f"{year}-{mon:02d}")
     date_dir = os.path.join(month_dir, f"{day:02d}")
@@ -163,100 +238,139 @@ def save_article(title, content, output_dir, year, mon, day,counter):
     print(f"文章已保存到: {file_path}")
 
 
-# 定义一个函数来处理每个链接
-def process_url(href, output_dir):
-    # 使用正则表达式提取日期部分
-    date_pattern = r'(\d{4})/(\d{8})'
-    match = re.search(date_pattern, href)
-
-    if match:
-        year = int(match.group(1))
-        date_part = match.group(2)
-        month = int(date_part[4:6])
-        day = int(date_part[6:8])
-        date_key = f"{year}{month:02d}{day:02d}"
-
-        # 初始化或递增当天的计数器
-        date_counter = {}
-        if date_key not in date_counter:
-            date_counter[date_key] = 1
-        counter = date_counter[date_key]
-        date_counter[date_key] += 1
-
-        # 构造基础路径
-        base_path = f"http://epaper.bjnews.com.cn/html/{year}/{year}{month:02d}{day:02d}/{year}{month:02d}{day:02d}_A01"
-
-        # 获取网页内容
-        html = get_html_with_selenium(href)
-        if html:
-            hrefs = extract_hrefs(html)
-            # 遍历每个 href，拼接完整的 URL
-            for href in hrefs:
-                full_url = f"{base_path}/{href}"
-                print(f"正在获取 {full_url} 的内容...")
-                day_home_html = get_html_with_selenium(full_url)
-                if day_home_html:
-                    title, content = extract_title_and_subtitle(day_home_html)
-                    save_article(title, content, output_dir, year, month, day, counter)
-                    counter += 1
-    else:
-        print("未找到日期信息")
-
-
-# 定义一个函数来收集所有 URL
-def collect_date_urls(url):
-    date_urls_list = []
-    seen_urls = set()  # 用于存储已经见过的 URL
-    while True:
-        # 假设 get_date_urls(url) 返回的是一个包含 URL 的列表
-        date_url = get_date_urls(url)
-        #print(date_url)
-
-        # 提取列表中的第一个元素（假设列表中只有一个 URL）
-        if isinstance(date_url, list) and len(date_url) > 0:
-            date_url_str = date_url[0]
+def parse_dates(args):
+    # 支持 20250901 和 20250901-20250905 两种写法
+    dates = []
+    for arg in args:
+        if '-' in arg:
+            start_str, end_str = arg.split('-', 1)
+            current = datetime.strptime(start_str, "%Y%m%d")
+            end = datetime.strptime(end_str, "%Y%m%d")
+            while current <= end:
+                dates.append(current.strftime("%Y%m%d"))
+                current += timedelta(days=1)
         else:
-            date_url_str = date_url  # 如果不是列表，直接使用
-
-        # 去除多余的引号和括号，提取纯净的 URL
-        clean_url = (
-            date_url_str.replace("'", "")
-            .replace("[", "")
-            .replace("]", "")
-            .replace("<url>", "")
-            .replace("</url>", "")
-            .strip()
-        )
-
-        # 检查是否已经见过这个 URL
-        if clean_url in seen_urls:
-            print("检测到重复链接，停止收集 URL")
-            break
-
-        # 将新的 URL 添加到集合和列表中
-        seen_urls.add(clean_url)
-        date_urls_list.append(clean_url)
+            datetime.strptime(arg, "%Y%m%d")
+            dates.append(arg)
+    return sorted(set(dates))
+
+
+def find_missing_dates(output_dir, start_date, end_date):
+    """工作日中输出目录下没有任何文章的日期"""
+    missing = []
+    for date_key in parse_dates([f"{start_date}-{end_date}"]):
+        if datetime.strptime(date_key, "%Y%m%d").weekday() >= 5:
+            continue
+        day_dir = os.path.join(output_dir, f"{date_key[:4]}-{date_key[4:6]}", date_key[6:8])
+        if not os.path.isdir(day_dir) or not any(name.endswith('.txt') for name in os.listdir(day_dir)):
+            missing.append(date_key)
+    return missing
+
+
+def discover_article_urls(dates, stats):
+    """一个浏览器会话内完成所有日期的发现，返回 {日期: [文章URL, ...]}，顺序即当天编号顺序"""
+    browser = get_browser()
+    plan = {}
+    for date_key in dates:
+        year, month, day = int(date_key[:4]), int(date_key[4:6]), int(date_key[6:8])
+        date_url = get_date_url(browser, year, month, day)
+        if not date_url:
+            print(f"日期 {date_key} 未找到报纸，跳过")
+            continue
+
+        first_html = get_html(date_url, marker='article-content', stats=stats)
+        if not first_html:
+            continue
+
+        edition_urls = extract_edition_urls(first_html, date_url, date_key) or [date_url]
+        article_urls = []
+        for edition_url in edition_urls:
+            html = first_html if edition_url == date_url else get_html(edition_url, marker='article-content', stats=stats)
+            if not html:
+                stats['failed'] += 1
+                continue
+            for href in extract_hrefs(html):
+                full_url = urljoin(edition_url, href)
+                if full_url not in article_urls:
+                    article_urls.append(full_url)
+        plan[date_key] = article_urls
+        print(f"日期 {date_key}: {len(edition_urls)} 个版面，{len(article_urls)} 篇文章")
+    return plan
+
+
+def fetch_and_save(url, output_dir, date_key, counter, stats):
+    html = get_html(url, stats=stats)
+    if not html:
+        return False
+    title, content = extract_title_and_subtitle(html)
+    if title == "未找到标题":
+        return False
+    title, content = clean_title(title), normalize_text(content)
+    save_article(title, content, output_dir, int(date_key[:4]), int(date_key[4:6]), int(date_key[6:8]), counter)
+    return True
+
+
+def fill_missing_dates(dates, output_dir, workers=4):
+    """批量补抓：一次发现所有缺失日期的文章，再通过共享连接并行抓取"""
+    stats = {'http': 0, 'browser': 0, 'saved': 0, 'failed': 0}
+    start = time.perf_counter()
 
-        # 添加最大循环次数限制，防止无限循环
-        if len(date_urls_list) >= 31:  # 最多收集 31 个 URL
-            print("达到最大 URL 数量，停止收集")
-            break
+    try:
+        plan = discover_article_urls(dates, stats)
+    finally:
+        discover_seconds = time.perf_counter() - start
+
+    # 编号在并行抓取前按发现顺序固定下来，重复运行得到相同编号
+    jobs = [(url, date_key, counter)
+            for date_key, urls in plan.items()
+            for counter, url in enumerate(urls, start=1)]
+
+    fetch_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_and_save, url, output_dir, date_key, counter, stats): url
+                   for url, date_key, counter in jobs}
+        for future in as_completed(futures):
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"抓取失败 {futures[future]}: {e}")
+                ok = False
+            stats['saved' if ok else 'failed'] += 1
+    fetch_seconds = time.perf_counter() - fetch_start
+    total_seconds = time.perf_counter() - start
+
+    pages = stats['http'] + stats['browser']
+    print(f"\n{'=' * 60}")
+    print("补抓完成统计:")
+    print(f"  - 请求日期数: {len(dates)}，找到报纸: {len(plan)}")
+    print(f"  - 文章数: {len(jobs)}，保存: {stats['saved']}，失败: {stats['failed']}")
+    print(f"  - 页面请求: {pages}（HTTP {stats['http']}，浏览器 {stats['browser']}）")
+    print(f"  - 发现耗时: {discover_seconds:.1f}s，抓取耗时: {fetch_seconds:.1f}s，总耗时: {total_seconds:.1f}s")
+    if total_seconds > 0:
+        print(f"  - 吞吐: {pages / total_seconds:.2f} 页/秒，{stats['saved'] * 60 / total_seconds:.1f} 篇/分钟")
+    if _browser is not None:
+        _cache_meter.sample(_browser)
+    print(f"  - {_cache_meter.summary()}")
+    print(f"{'=' * 60}")
+    return stats
 
-    return date_urls_list
 
 # 主函数
 if __name__ == '__main__':
-    url = 'http://epaper.bjnews.com.cn/html/2025/20250401/20250401_A01/20250401_A01_3011.html'  # 新京报首页 URL
     output_dir = r"D:\CENTER\Data\2025\报纸\报纸源文本\新京"
 
-# 收集所有 URL
-    date_urls_list = collect_date_urls(url)
-
-# 循环结束后，输出所有 URL
-    print("收集到的 URL 列表:")
-    for idx, url_del in enumerate(date_urls_list, start=1):
-        print(f"{idx}: {url_del}")
+    # 用法: python "xinjing - add.py" 20250901 20250903-20250905
+    # 不带参数时输入日期范围，自动找出缺失的工作日
+    if len(sys.argv) > 1:
+        missing_dates = parse_dates(sys.argv[1:])
+    else:
+        start_input = input("请输入起始日期 (格式: 20250101): ").strip()
+        end_input = input("请输入结束日期 (格式: 20250131): ").strip()
+        missing_dates = find_missing_dates(output_dir, start_input, end_input)
 
-# 遍历每个链接，获取内容
-    for href in date_urls_list:
-        process_url(href, output_dir)
+    print(f"待补抓日期: {', '.join(missing_dates) if missing_dates else '无'}")
+    if missing_dates:
+        try:
+            fill_missing_dates(missing_dates, output_dir)
+        finally:
+            close_browser()
@@ -1,29 +1,39 @@
 import os
-import re
 import time
+import sqlite3
+import argparse
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 
-from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
-from selenium.webdriver.common.action_chains import ActionChains
 import logging
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bjnews_crawler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+from xinjing_logging import setup_logging, log_event, timed_phase
+from xinjing_assets import EditionAssetDownloader, AssetTask
+from xinjing_driver import ChromeLauncher, execute_cdp
+from xinjing_cache import BrowserCache, CacheMeter, DEFAULT_CACHE_ROOT
+from xinjing_selectors import SelectorRegistry, LayoutChangedError
+from xinjing_text import clean_title, normalize_text, filename_title, title_key
+from xinjing_archive import (
+    write_article_file, article_day_dir, is_complete_article_file, read_day_manifest, write_day_manifest,
+    make_article_id, ArticleIndex,
 )
+from xinjing_scan import units_by_date, load_repair_queue, merge_repair_queue, REPAIR_QUEUE_FILE
+from xinjing_schedule import CrawlScheduler, PriorityPolicy
+from xinjing_limits import RateLimiter, TimeBudget, CircuitBreaker
+from xinjing_tabs import TabEditionRunner
+from xinjing_capture import NetworkCapture, parse_article_html, parse_edition_html
+from xinjing_profile import MemoryProfiler
+from xinjing_stats import StatsStore, STATS_DB_FILE
+from xinjing_sites import SiteAdapter, BJNewsAdapter
+
+# 配置日志（队列 + 后台线程写入，文本日志与JSON日志均按大小/时间轮转）
+setup_logging('bjnews_crawler.log')
 logger = logging.getLogger(__name__)
 
 
@@ -33,16 +43,69 @@ class Article:
     content: str
     date: str
     edition: str
+    article_id: str = ''
+    url: str = ''
 
 
 class BJNewsCrawler:
-    BASE_URL = 'https://epaper.bjnews.com.cn/'
-
-    def __init__(self, output_dir: str = './bjnews_data'):
+    def __init__(self, output_dir: str = './bjnews_data', download_assets: bool = False,
+                 asset_workers: int = 4, warm_start: bool = False, profile_dir: str = None,
+                 debugger_address: str = None, rate_limiter: RateLimiter = None, tabs: int = 1,
+                 capture: bool = False, memory_profile: Optional[float] = None,
+                 stats_db: Optional[str] = None, site: Optional[SiteAdapter] = None,
+                 edition_budget: Optional[float] = None, date_budget: Optional[float] = None,
+                 run_budget: Optional[float] = None, breaker: Optional[CircuitBreaker] = None,
+                 browser_cache: Optional[str] = None):
         self.output_dir = output_dir
+        # 站点规则（地址、选择器、版面代码、出版日历），默认新京报
+        self.site = site or BJNewsAdapter()
+        # 每个日期完成时写入统计库（stats_db=None 时不记录，命令行入口默认开启）
+        self.stats = StatsStore(stats_db) if stats_db else None
+        # 可选：多个爬虫实例共用的全局限速器
+        self.rate_limiter = rate_limiter
+        # 时间预算（秒，None 为不限）：单个版面、单个日期、整次运行；超出时剩余单元暂停，稍后补爬
+        self.edition_budget = edition_budget
+        self.date_budget = date_budget
+        self.run_budget = run_budget
+        self._run_budget: Optional[TimeBudget] = None
+        self._date_budget: Optional[TimeBudget] = None
+        # 熔断器：连续封禁/超时后暂停，冷却并探测后再继续
+        self.breaker = breaker or CircuitBreaker()
+        # 被暂停的单元，运行结束时追加到修复队列
+        self.parked: List[Dict] = []
+        self.repair_queue_file = REPAIR_QUEUE_FILE
         self.driver = None
         self.wait = None
+        # 可选：所有浏览器与多次运行共用的磁盘缓存目录，并统计缓存命中率
+        self.launcher = ChromeLauncher(warm_start=warm_start, profile_dir=profile_dir,
+                                       debugger_address=debugger_address,
+                                       browser_cache=BrowserCache(browser_cache) if browser_cache else None)
+        self.cache_meter = CacheMeter() if browser_cache or warm_start else None
+        # 选择器注册表：零等待探测 + 显式超时，记住命中的选择器
+        self.selectors = SelectorRegistry(chains=self.site.selectors, state_file=self.site.selector_state_file)
+        self.timeout = 10
+        self._article_index = None
+        # tabs > 1 时一个日期内的版面分给多个标签页轮流爬取
+        self.tabs = tabs
+        self._tab_runner = None
+        # capture 为 True 时从网络响应里解析版面/文章HTML，等待以响应完成为准
+        self.capture_enabled = capture
+        self.capture: Optional[NetworkCapture] = None
+        self._edition_response = None
+        # 版面页所在标签页与打开文章用的第二个标签页
+        self._edition_handle = None
+        self._article_handle = None
+        # 最近一次导航时日历显示当天没有报纸的日期（导航失败时记为 no_paper，不再反复补爬）
+        self.no_paper_date: Optional[str] = None
+        # 当前处理的日期/版面（内存采样打标签用）
+        self.current_date = None
+        self.current_edition = None
+        # 可选：按间隔（秒）采样内存，运行结束时报告是否有泄漏
+        self.profiler = MemoryProfiler(self, memory_profile).start() if memory_profile else None
         self._setup_output_dir()
+        # 可选：后台下载版面PDF/版面图，不阻塞文章爬取
+        self.asset_downloader = EditionAssetDownloader(output_dir, max_workers=asset_workers) \
+            if download_assets else None
 
     def _setup_output_dir(self):
         # 输出目录结构
@@ -52,6 +115,10 @@ class BJNewsCrawler:
     def _get_chrome_options(self, headless: bool = True) -> Options:
         options = Options()
 
+        # 连接已运行的浏览器时，启动参数由该浏览器决定
+        if self.launcher.attached:
+            return self.launcher.apply_options(options)
+
         # 基础配置
         options.add_argument('--disable-gpu')
         options.add_argument('--no-sandbox')
@@ -70,21 +137,22 @@ class BJNewsCrawler:
         if headless:
             options.add_argument('--headless')
 
-        return options
+        return self.launcher.apply_options(options)
 
     def _init_driver(self, headless: bool = True):
         # 初始化WebDriver
         if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
+            self.launcher.release(self.driver)
+            self.driver = None
 
         options = self._get_chrome_options(headless)
-        self.driver = webdriver.Chrome(options=options)
+        if self.capture_enabled:
+            NetworkCapture.enable_performance_log(options)
+        start = time.perf_counter()
+        self.driver = self.launcher.new_driver(options)
         self.wait = WebDriverWait(self.driver, 10)
 
-        self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+        execute_cdp(self.driver, 'Page.addScriptToEvaluateOnNewDocument', {
             'source': '''
                 Object.defineProperty(navigator, 'webdriver', {
                     get: () => undefined
@@ -92,9 +160,92 @@ class BJNewsCrawler:
             '''
         })
 
-        self.driver.implicitly_wait(5)
+        # 不使用隐式等待，所有等待都由选择器注册表显式控制
+        self.driver.implicitly_wait(0)
+        if self.capture_enabled:
+            self.capture = NetworkCapture(self.driver)
+            self.capture.enable()
+        self._edition_handle = None
+        self._article_handle = None
+        log_event('driver_init', duration=time.perf_counter() - start, headless=headless)
         logger.info("WebDriver初始化成功")
 
+    def _page_blocked(self) -> bool:
+        # 当前页面是否为站点的封禁/验证页（只看标题和页面开头）
+        try:
+            text = (self.driver.title or '') + (self.driver.page_source or '')[:5000]
+        except Exception:
+            return False
+        return any(marker in text for marker in self.site.block_markers)
+
+    def _signal(self, ok: bool, reason: str = ''):
+        # 向熔断器报告一次成功，或一次封禁/超时信号
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure(reason)
+
+    def _run_budget_exhausted(self) -> bool:
+        # 运行预算在第一次爬取日期时开始计时；没有设置运行预算时不限
+        if self.run_budget is None:
+            return False
+        if self._run_budget is None:
+            self._run_budget = TimeBudget(self.run_budget)
+        return self._run_budget.exceeded
+
+    def _interrupt_reason(self) -> Optional[str]:
+        # 当前日期是否应该停止：熔断器断开或时间预算用完
+        if self.breaker.is_open:
+            return f"熔断暂停（{self.breaker.last_reason}）"
+        if self._run_budget is not None and self._run_budget.exceeded:
+            return '超出运行时间预算'
+        if self._date_budget is not None and self._date_budget.exceeded:
+            return '超出日期时间预算'
+        return None
+
+    def _park(self, date_str: str, editions: Optional[List[str]], reason: str):
+        # 暂停的单元不再尝试，运行结束时写入修复队列稍后补爬；editions 为 None 表示整个日期
+        if editions is None:
+            self.parked.append({'date': date_str, 'edition': None, 'reasons': [reason]})
+        else:
+            self.parked.extend({'date': date_str, 'edition': e, 'reasons': [reason]} for e in editions)
+        if editions is None or editions:
+            logger.warning(f"暂停 {date_str} {'、'.join(editions) if editions else '全部版面'}: {reason}")
+
+    def _probe_site(self) -> bool:
+        # 打开首页，日历或版面列表出现且不是封禁页即视为恢复
+        try:
+            self._throttle()
+            self.driver.get(self.site.base_url)
+            WebDriverWait(self.driver, self.timeout).until(
+                lambda d: self.selectors.probe(d, 'calendar') is not None
+                or self.selectors.probe(d, 'edition_list') is not None)
+            return not self._page_blocked()
+        except Exception as e:
+            logger.debug("探测失败: %s", e)
+            return False
+
+    def _cool_down_and_probe(self) -> bool:
+        """熔断器断开时冷却后探测，恢复返回True；剩余运行预算不够冷却时返回False"""
+        while self.breaker.is_open:
+            wait = self.breaker.cooldown_remaining()
+            if self._run_budget is not None and wait >= self._run_budget.remaining():
+                return False
+            if wait > 0:
+                logger.info(f"熔断冷却中，{wait:.0f}s 后探测")
+                time.sleep(wait)
+            self.breaker.begin_probe()
+            self._signal(self._probe_site(), '探测失败')
+        return True
+
+    def share_driver(self, owner: 'BJNewsCrawler'):
+        # 与另一个爬虫实例（其他站点）共用同一个浏览器会话，驱动的创建与释放由 owner 负责
+        self.driver = owner.driver
+        self.wait = owner.wait
+        self.capture = owner.capture
+        self._edition_handle = None
+        self._article_handle = None
+
     def _safe_click(self, element, use_js=False):
         # 安全点击元素
         try:
@@ -114,16 +265,57 @@ class BJNewsCrawler:
             logger.error(f"点击失败: {e}")
             return False
 
+    def _throttle(self):
+        # 每次页面请求（打开页面、点击跳转）前取一个令牌；离开当前页面前统计其资源的缓存命中
+        if self.cache_meter and self.driver:
+            self.cache_meter.sample(self.driver)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+    def select_year(self, year: int) -> bool:
+        """选择指定年份（已是该年份时不触发页面更新）；没有年份下拉框时返回False，由调用方按地址打开"""
+        try:
+            # 年份下拉框是可选控件：首页已加载完，零等待探测，未命中不计入改版判断
+            year_select_element = self.selectors.probe(self.driver, 'year_select')
+            if year_select_element is None:
+                logger.debug("未找到年份下拉框")
+                return False
+            select = Select(year_select_element)
+            if select.first_selected_option.get_attribute('value') == str(year):
+                return True
+
+            select.select_by_value(str(year))
+
+            logger.info(f"成功选择年份: {year}年")
+            time.sleep(2)  # 等待页面更新
+            return True
+
+        except Exception as e:
+            logger.error(f"选择年份失败: {e}")
+            return False
+
+    def open_date_url(self, date_str: str) -> bool:
+        """按地址规则直接打开某天的头版，版面列表出现即视为成功"""
+        url = self.site.date_url(date_str)
+        try:
+            self._throttle()
+            self.driver.get(url)
+            WebDriverWait(self.driver, self.timeout).until(
+                lambda d: self.selectors.probe(d, 'edition_list') is not None)
+            logger.info(f"通过地址直接打开日期 {date_str}: {url}")
+            return True
+        except TimeoutException:
+            logger.warning(f"直接打开日期失败（可能当天无报纸）: {url}")
+            return False
+        except Exception as e:
+            logger.error(f"直接打开日期失败: {e}")
+            return False
+
     def select_month(self, month: int) -> bool:
         """选择指定月份"""
         try:
-            # 月份选择器的XPath
-            month_selector_xpath = "/html/body/div[3]/div/div[2]/div/div[2]/div[2]/div[2]/div/div/div[1]/div/div[2]/select"
-
             # 等待月份选择器加载
-            month_select_element = self.wait.until(
-                EC.presence_of_element_located((By.XPATH, month_selector_xpath))
-            )
+            month_select_element = self.selectors.find(self.driver, 'month_select', self.timeout)
 
             # 使用Select类来操作下拉框
             select = Select(month_select_element)
@@ -135,14 +327,18 @@ class BJNewsCrawler:
             time.sleep(2)  # 等待页面更新
             return True
 
+        except LayoutChangedError:
+            raise
         except Exception as e:
             logger.error(f"选择月份失败: {e}")
             return False
 
     def navigate_to_date(self, date_str: str) -> bool:
-        """导航到指定日期，增强版支持跨月导航"""
+        """导航到指定日期，支持跨年、跨月导航；日历里选不到时按地址直接打开"""
+        self.no_paper_date = None
         try:
-            self.driver.get(self.BASE_URL)
+            self._throttle()
+            self.driver.get(self.site.base_url)
             time.sleep(3)  # 等待页面加载
 
             # 解析日期
@@ -152,19 +348,18 @@ class BJNewsCrawler:
 
             logger.info(f"尝试导航到日期: {year}-{month:02d}-{day:02d}")
 
-            # 首先选择正确的月份
+            # 先选择年份，再选择月份
+            if not self.select_year(year):
+                logger.warning(f"无法选择年份 {year}，改为按地址打开")
+                return self.open_date_url(date_str)
             if not self.select_month(month):
                 logger.error(f"无法选择月份 {month}")
-                return False
+                return self.open_date_url(date_str)
 
             # 然后选择日期
-            calendar_xpath = "/html/body/div[3]/div/div[2]/div/div[2]/div[2]/div[2]/div/div/div[3]/div[2]"
-
             try:
                 # 等待日历加载
-                calendar = self.wait.until(
-                    EC.presence_of_element_located((By.XPATH, calendar_xpath))
-                )
+                calendar = self.selectors.find(self.driver, 'calendar', self.timeout)
 
                 # 查找所有日期链接
                 date_links = calendar.find_elements(By.XPATH, ".//span/a")
@@ -174,6 +369,7 @@ class BJNewsCrawler:
                     if link_text == str(day):
                         # 找到目标日期，点击
                         logger.info(f"找到日期 {day}，点击跳转")
+                        self._throttle()
                         self._safe_click(link)
                         time.sleep(2)
                         return True
@@ -181,84 +377,168 @@ class BJNewsCrawler:
                 # 如果没找到，可能需要切换月份
                 logger.warning(f"未找到日期 {day}，尝试其他方法")
 
-                # 尝试直接通过XPath定位
-                day_xpath = f"{calendar_xpath}/div[{day + 1}]/span/a"
-                try:
-                    day_element = self.driver.find_element(By.XPATH, day_xpath)
+                # 尝试直接按位置定位（零等待探测）
+                day_element = self.selectors.probe(self.driver, 'calendar_day', index=day + 1)
+                if day_element is not None:
+                    self._throttle()
                     self._safe_click(day_element)
                     time.sleep(2)
                     return True
-                except:
-                    pass
+
+                if not date_links:
+                    return self.open_date_url(date_str)
+                # 日历已列出本月的出版日期却没有这一天：按地址也打不开时视为当天无报纸
+                if self.open_date_url(date_str):
+                    return True
+                logger.info(f"日历上 {date_str} 没有报纸")
+                self.no_paper_date = date_str
+                return False
 
             except TimeoutException:
                 logger.error("日历未加载")
 
-            return False
+            return self.open_date_url(date_str)
 
+        except LayoutChangedError:
+            raise
         except Exception as e:
             logger.error(f"导航到日期失败: {e}")
             return False
 
+    def _navigate_failed_status(self, date_str: str) -> str:
+        # 导航失败时的日期状态：日历显示无报纸为 no_paper（扫描与回填视为已完成），否则 navigate_failed
+        return 'no_paper' if self.no_paper_date == date_str else 'navigate_failed'
+
     def get_editions_by_click(self) -> List[str]:
         # 通过点击获取当前日期的所有版面
         editions = []
 
         try:
-            edition_list_xpath = "/html/body/div[3]/div/div[2]/div/div[1]/div/div[1]/div[2]/ul"
-
-            edition_ul = self.wait.until(
-                EC.presence_of_element_located((By.XPATH, edition_list_xpath))
-            )
+            edition_ul = self.selectors.find(self.driver, 'edition_list', self.timeout)
             edition_links = edition_ul.find_elements(By.TAG_NAME, "a")
 
             for link in edition_links:
                 edition_text = link.text.strip()
-                # 提取版面代码 (如 A01, A02,,, AXX)
-                edition_match = re.search(r'(A\d{2})', edition_text)
-                if edition_match:
-                    edition_code = edition_match.group(1)
+                # 提取版面代码 (如 A01, A02,,, AXX，规则由站点决定)
+                edition_code = self.site.parse_edition(edition_text)
+                if edition_code:
                     if edition_code not in editions:
                         editions.append(edition_code)
-                        logger.debug(f"发现版面: {edition_code}")
+                        logger.debug("发现版面: %s", edition_code)
 
             logger.info(f"找到 {len(editions)} 个版面: {', '.join(editions)}")
 
+        except LayoutChangedError:
+            raise
         except Exception as e:
             logger.error(f"获取版面列表失败: {e}")
             if not editions:
-                editions.append("A01")
+                editions.append(self.site.default_edition)
 
         return editions
 
     def click_edition_by_index(self, edition_index: int) -> bool:
         # 通过索引点击版面
         try:
-            edition_xpath = f"/html/body/div[3]/div/div[2]/div/div[1]/div/div[1]/div[2]/ul/li[{edition_index + 1}]/a"
-            edition_link = self.wait.until(
-                EC.element_to_be_clickable((By.XPATH, edition_xpath))
-            )
+            edition_link = self.selectors.find(self.driver, 'edition_link', self.timeout,
+                                               clickable=True, index=edition_index + 1)
 
             edition_text = edition_link.text.strip()
             logger.info(f"点击版面 {edition_index + 1}: {edition_text}")
+            self._throttle()
+            if self.capture:
+                self.capture.mark()
             self._safe_click(edition_link)
-            time.sleep(2)
+            if self.capture:
+                # 等版面页文档响应完成，文章列表直接从响应HTML解析
+                self._edition_response = self.capture.wait_for_response(timeout=self.timeout)
+            else:
+                time.sleep(2)
             return True
 
+        except LayoutChangedError:
+            raise
         except Exception as e:
             logger.error(f"点击版面失败: {e}")
             return False
 
+    def collect_edition_assets(self) -> List[str]:
+        # 一次脚本调用收集当前版面页的PDF链接和版面大图（不触发隐式等待）
+        try:
+            urls = self.driver.execute_script('''
+                var urls = [];
+                document.querySelectorAll('a[href]').forEach(function (a) {
+                    if (/\\.pdf($|\\?)/i.test(a.href)) urls.push(a.href);
+                });
+                document.querySelectorAll('img[usemap], img[src*="/images/"]').forEach(function (img) {
+                    if (img.naturalWidth >= 600 || img.hasAttribute('usemap')) urls.push(img.src);
+                });
+                return urls;
+            ''') or []
+        except Exception as e:
+            logger.warning(f"收集版面资源失败: {e}")
+            return []
+        return list(dict.fromkeys(u for u in urls if u.startswith('http')))
+
+    def _queue_edition_assets(self, date_str: str, edition_code: str):
+        # 把当前版面的资源交给后台下载器
+        if not self.asset_downloader:
+            return
+        urls = self.collect_edition_assets()
+        if not urls:
+            return
+        self.asset_downloader.set_cookies(self.driver.get_cookies())
+        referer = self.driver.current_url
+        for url in urls:
+            self.asset_downloader.submit(AssetTask(url=url, date=date_str, edition=edition_code, referer=referer))
+        logger.debug("版面 %s 提交 %d 个资源下载", edition_code, len(urls))
+
+    def _finish_run(self):
+        # 运行结束：保存选择器命中记录，输出WebDriver启动耗时，等待后台资源下载完成并输出统计
+        self.selectors.save_state()
+        logger.info(self.launcher.startup_summary())
+        if self.profiler:
+            self.profiler.stop()
+            for line in self.profiler.report():
+                logger.info(line)
+            self.profiler = None
+        if self.capture:
+            logger.info(self.capture.summary())
+        if self.cache_meter:
+            if self.driver:
+                self.cache_meter.sample(self.driver)
+            logger.info(self.cache_meter.summary())
+            log_event('browser_cache', site=self.site.name, **self.cache_meter.stats())
+        if self.parked:
+            merge_repair_queue(self.parked, self.repair_queue_file)
+            logger.info(f"{self.breaker.summary()}；暂停的 {len(self.parked)} 个单元已追加到 {self.repair_queue_file}")
+            self.parked = []
+        if not self.asset_downloader:
+            return
+        logger.info("等待版面资源下载完成...")
+        stats = self.asset_downloader.wait()
+        logger.info(
+            f"版面资源: 新下载 {stats['downloaded']} 个，续传 {stats['resumed']} 个，"
+            f"已存在 {stats['skipped']} 个，去重 {stats['duplicate']} 个，失败 {stats['failed']} 个，"
+            f"{stats['bytes'] / 1024 / 1024:.1f} MB"
+        )
+
     def get_article_links_in_edition(self) -> List[Dict]:
         # 获取当前版面的所有文章链接
         articles = []
 
+        # 网络抓取模式：优先解析刚收到的版面页响应（不逐个读取元素属性）
+        if self._edition_response is not None:
+            response, self._edition_response = self._edition_response, None
+            if response.ok:
+                articles = parse_edition_html(response.body, response.url)
+                if articles:
+                    logger.info(f"  找到 {len(articles)} 篇文章（网络响应）")
+                    return articles
+
         try:
-            # 文章列表的XPath
-            article_list_xpath = "/html/body/div[3]/div/div[2]/div/div[2]/div[1]/div[2]/ul"
-            article_ul = self.wait.until(
-                EC.presence_of_element_located((By.XPATH, article_list_xpath))
-            )
+            # 文章列表
+            article_ul = self.selectors.find(self.driver, 'article_list', self.timeout)
             # 用li获取所有文章链接
             article_items = article_ul.find_elements(By.XPATH, ".//li")
 
@@ -266,41 +546,126 @@ class BJNewsCrawler:
                 try:
                     link = item.find_element(By.TAG_NAME, "a")
 
-                    # 获取链接的全部HTML内容，然后处理<br>标签
-                    title_html = link.get_attribute('innerHTML')
-
-                    # 将<br>替换为空格
-                    title = re.sub(r'<br\s*/?>', ' ', title_html)
-                    title = re.sub(r'<[^>]+>', '', title)
-                    title = ' '.join(title.split())
-                    title = title.strip()
+                    # 获取链接的全部HTML内容，<br>换成空格后统一清理
+                    title = clean_title(link.get_attribute('innerHTML'))
 
                     if title:
+                        # 只保存地址，不持有元素引用（离开版面页后元素会失效）
                         articles.append({
                             'index': idx,
                             'title': title,
-                            'element': link
+                            # 文章地址/内容ID用于生成稳定的文章ID，也用于直接打开文章
+                            'url': link.get_attribute('href') or '',
+                            'content_id': link.get_attribute('data-id') or '',
                         })
-                        logger.debug(f"  文章 {idx}: {title[:30]}...")
+                        logger.debug("  文章 %d: %.30s...", idx, title)
                 except:
                     continue
 
             logger.info(f"  找到 {len(articles)} 篇文章")
 
+        except LayoutChangedError:
+            raise
         except Exception as e:
             logger.error(f"获取文章列表失败: {e}")
 
         return articles
 
+    def _article_link_element(self, index: int):
+        # 按序号重新定位文章链接（列表来自网络响应时没有元素引用）
+        article_ul = self.selectors.find(self.driver, 'article_list', self.timeout)
+        items = article_ul.find_elements(By.XPATH, ".//li")
+        return items[index - 1].find_element(By.TAG_NAME, "a")
+
+    def _switch_to_article_tab(self):
+        # 文章固定在第二个标签页里打开，版面页留在原标签页，不需要后退重新加载
+        handles = self.driver.window_handles
+        if self._edition_handle not in handles:
+            self._edition_handle = self.driver.current_window_handle
+        if self._article_handle in handles:
+            self.driver.switch_to.window(self._article_handle)
+            return
+        self.driver.switch_to.new_window('tab')
+        self._article_handle = self.driver.current_window_handle
+        if self.capture:
+            # Network 域按标签页启用
+            self.capture.enable()
+
+    def open_article(self, url: str) -> Optional[Article]:
+        """在文章标签页中按地址打开文章并提取内容，完成后切回版面页"""
+        self._switch_to_article_tab()
+        try:
+            self._throttle()
+            if self.capture:
+                self.capture.mark()
+                self.driver.get(url)
+                return self.capture_article()
+            self.driver.get(url)
+            return self.extract_article_content()
+        finally:
+            self.driver.switch_to.window(self._edition_handle)
+
+    def _click_article(self, index: int) -> Optional[Article]:
+        # 文章链接没有可用地址（如 javascript:）时仍然点击进入，再后退到版面页
+        self._throttle()
+        element = self._article_link_element(index)
+        if self.capture:
+            self.capture.mark()
+            self._safe_click(element)
+            article = self.capture_article()
+        else:
+            self._safe_click(element)
+            time.sleep(1.5)
+            article = self.extract_article_content()
+        self.driver.back()
+        self.selectors.find(self.driver, 'article_list', self.timeout)
+        return article
+
+    def _return_to_edition(self, date_str: str, edition_idx: int):
+        # 出错后回到版面页：切回版面标签页，页面已不是版面页或会话失效时重新导航
+        try:
+            self.driver.switch_to.window(self._edition_handle)
+            if self.selectors.probe(self.driver, 'article_list') is not None:
+                return
+            self.driver.back()
+            self.selectors.find(self.driver, 'article_list', self.timeout)
+        except Exception:
+            if self.navigate_to_date(date_str):
+                self._edition_handle = self.driver.current_window_handle
+                self.click_edition_by_index(edition_idx)
+
+    def capture_article(self) -> Optional[Article]:
+        # 等文章页文档响应完成后直接解析HTML；解析不出时退回DOM提取
+        response = self.capture.wait_for_response(timeout=self.timeout)
+        if response is not None and response.ok:
+            parsed = parse_article_html(response.body)
+            if parsed:
+                return Article(title=parsed['title'], content=parsed['content'], date="", edition="",
+                               url=response.url)
+            logger.debug("    响应中未解析到正文，改用页面提取: %s", response.url)
+        return self.extract_article_content()
+
     def extract_article_content(self) -> Optional[Article]:
         # 提取当前页面的文章内容
         try:
-            time.sleep(1)
-            # 提取标题
+            # 提取正文（等待正文出现即说明文章页已加载）
+            content = ""
+            try:
+                content_div = self.selectors.find(self.driver, 'body', self.timeout)
+                p_tags = content_div.find_elements(By.TAG_NAME, "p")
+                content = normalize_text('\n'.join(p.text for p in p_tags))
+            except TimeoutException:
+                pass
+
+            if not content:
+                return None
+
+            # 提取标题（零等待，页面已加载）
             title = "无标题"
             try:
-                title_xpath = "/html/body/div[3]/div/div[3]/div/div[1]"
-                title_div = self.driver.find_element(By.XPATH, title_xpath)
+                title_div = self.selectors.probe(self.driver, 'title')
+                if title_div is None:
+                    raise NoSuchElementException("title")
 
                 h_tags = title_div.find_elements(By.XPATH, ".//h1 | .//h2 | .//h3 | .//h4 | .//h5 | .//h6")
                 titles = []
@@ -310,25 +675,12 @@ class BJNewsCrawler:
                         titles.append(h_text)
 
                 if titles:
-                    title = " ".join(titles)
-                    logger.debug(f"    提取到 {len(titles)} 个标题: {title[:50]}...")
+                    title = clean_title(" ".join(titles))
+                    logger.debug("    提取到 %d 个标题: %.50s...", len(titles), title)
             except Exception as e:
-                logger.debug(f"    标题提取异常: {e}")
-                pass
-
-            # 提取正文
-            content = ""
-            try:
-                content_xpath = "/html/body/div[3]/div/div[3]/div/div[3]"
-                content_div = self.driver.find_element(By.XPATH, content_xpath)
-                p_tags = content_div.find_elements(By.TAG_NAME, "p")
-                content = '\n'.join([p.text.strip() for p in p_tags if p.text.strip()])
-            except:
+                logger.debug("    标题提取异常: %s", e)
                 pass
 
-            if not content:
-                return None
-
             return Article(
                 title=title,
                 content=content,
@@ -336,51 +688,204 @@ class BJNewsCrawler:
                 edition=""
             )
 
+        except LayoutChangedError:
+            raise
         except Exception as e:
             logger.error(f"提取文章内容失败: {e}")
             return None
 
-    def generate_filename(self, title: str, date_str: str, edition: str, article_num: int) -> str:
-        # 生成文件名（不包含路径）
-        safe_title = title.replace('\n', ' ').replace('\r', ' ')
-        # 移除Windows文件名非法字符
-        safe_title = re.sub(r'[\\/*?:"<>|]', '', safe_title)
-        # 清理多余空格
-        safe_title = ' '.join(safe_title.split())
-        safe_title = safe_title[:50]
+    def generate_filename(self, title: str, article_id: str) -> str:
+        # 生成文件名（不包含路径）：文章ID（含日期、版面）+ 标题，标题去掉Windows文件名非法字符并截断到50字
+        safe_title = filename_title(title)
         # 文件名
-        filename = f"{date_str}_{article_num:03d}_{edition}_{safe_title}.txt"
+        filename = f"{article_id}_{safe_title}.txt"
         return filename
 
-    def check_article_exists(self, title: str, date_str: str, edition: str, article_num: int) -> bool:
-        # 检查文章文件是否已存在
-        year = date_str[:4]
-        month = date_str[4:6]
-        day = date_str[6:8]
-        month_dir = os.path.join(self.output_dir, f"{year}-{month}")
-        day_dir = os.path.join(month_dir, day)
-
-        # 生成预期的文件名
-        filename = self.generate_filename(title, date_str, edition, article_num)
-        filepath = os.path.join(day_dir, filename)
-
-        # 检查主文件名
-        if os.path.exists(filepath):
-            return True
-
-        # 检查备用文件名
-        safe_filename = f"{date_str}_{article_num:03d}_{edition}_article.txt"
-        safe_filepath = os.path.join(day_dir, safe_filename)
-        if os.path.exists(safe_filepath):
-            return True
+    @property
+    def article_index(self) -> ArticleIndex:
+        # 已归档文章索引，每次运行第一次用到时扫描一遍归档
+        if self._article_index is None:
+            self._article_index = ArticleIndex(self.output_dir).load()
+            logger.info(f"已归档文章索引: {len(self._article_index)} 篇，"
+                        f"耗时 {self._article_index.load_seconds:.2f}s")
+        return self._article_index
+
+    def check_article_exists(self, article_id: str, title: str, date_str: str, edition: str) -> bool:
+        # 检查文章是否已归档：按文章ID查内存索引；旧文件名按 (日期, 版面, 标题) 匹配
+        return self.article_index.contains(article_id, date_str, edition, title_key(title))
+
+    def _write_date_manifest(self, date_str: str, status: str, edition_results: Dict[str, Dict],
+                             seconds: float = None, edition_list: Optional[List[str]] = None):
+        # 记录网站列出的版面/文章数与各版面状态，供完整性扫描对比；只重爬部分版面时保留其他版面的记录
+        # edition_list 为网站列出的全部版面，还没有结果的版面由扫描列入修复队列
+        day_dir = article_day_dir(self.output_dir, date_str)
+        manifest = read_day_manifest(day_dir) or {'date': date_str, 'editions': {}}
+        manifest['status'] = status
+        manifest['editions'].update(edition_results)
+        if edition_list:
+            manifest['edition_list'] = list(edition_list)
+        manifest['updated'] = datetime.now().isoformat(timespec='seconds')
+        try:
+            write_day_manifest(day_dir, manifest)
+        except OSError as e:
+            logger.warning(f"写入日期清单失败 {date_str}: {e}")
+        # 同一份版面结果写入统计库，日/月汇总随之增量更新
+        if self.stats:
+            try:
+                self.stats.record_date(date_str, status, edition_results, seconds)
+            except sqlite3.Error as e:
+                logger.warning(f"写入统计库失败 {date_str}: {e}")
+
+    def crawl_edition(self, date_str: str, edition_idx: int, edition_code: str) -> Dict:
+        # 爬取当前日期下的一个版面；返回版面结果（写入日期清单）
+        edition_start = time.perf_counter()
+        self.current_date, self.current_edition = date_str, edition_code
+        budget = TimeBudget(self.edition_budget) if self.edition_budget else None
+
+        # 点击对应版面
+        if not self.click_edition_by_index(edition_idx) and edition_idx > 0:
+            logger.error(f"无法切换到版面 {edition_code}")
+            self._signal(False, f"版面 {edition_code} 打开失败")
+            return {'status': 'failed', 'listed': 0, 'saved': 0, 'skipped': 0, 'failed': 0,
+                    'bytes': 0, 'retries': 0, 'seconds': round(time.perf_counter() - edition_start, 2),
+                    'error': '无法切换到版面'}
+
+        self._queue_edition_assets(date_str, edition_code)
+
+        # 获取该版面的所有文章（地址只读取一次）
+        articles = self.get_article_links_in_edition()
+        self._edition_handle = self.driver.current_window_handle
+
+        edition_articles = 0
+        edition_skipped = 0
+        edition_failed = 0
+        edition_bytes = 0
+        edition_retries = 0  # 文章失败后恢复版面页的次数
+        interrupted = None
+        # {文章ID: 文章地址}，写入日期清单供完整性扫描按ID核对
+        edition_ids: Dict[str, str] = {}
+        # 因旧文件名匹配而跳过的文章 {文章ID: 标题键}，扫描时按旧文件核对
+        legacy_ids: Dict[str, str] = {}
+
+        # 处理每篇文章
+        for article_info in articles:
+            # 熔断或时间预算用完时放弃剩余文章，整个版面稍后补爬
+            interrupted = self._interrupt_reason()
+            if not interrupted and budget is not None and budget.exceeded:
+                interrupted = '超出版面时间预算'
+            if interrupted:
+                logger.warning(f"  版面 {edition_code} 中止: {interrupted}")
+                break
+            article_id = make_article_id(date_str, edition_code, article_info['url'],
+                                         article_info['content_id'], article_info['title'])
+            edition_ids[article_id] = article_info['url']
+
+            # 先检查文章是否已存在
+            if self.check_article_exists(
+                    article_id,
+                    article_info['title'],
+                    date_str,
+                    edition_code
+            ):
+                logger.info(f"  文章已存在，跳过: {article_info['title'][:30]}...")
+                edition_skipped += 1
+                if article_id not in self.article_index.ids:
+                    legacy_ids[article_id] = title_key(article_info['title'])
+                continue
 
-        return False
+            article_start = time.perf_counter()
+            try:
+                # 文章不存在，进行爬取：按地址在文章标签页打开，版面页不动
+                logger.debug("  打开文章 %d: %.30s...", article_info['index'], article_info['title'])
+                if article_info['url'].startswith('http'):
+                    article = self.open_article(article_info['url'])
+                else:
+                    article = self._click_article(article_info['index'])
+                saved = False
+
+                if article:
+                    # 设置日期和版面
+                    article.date = date_str
+                    article.edition = edition_code
+                    article.article_id = article_id
+                    article.url = article_info['url']
+
+                    self._signal(True)
+                    # 保存文章
+                    saved = self.save_article(article)
+                    if saved:
+                        edition_articles += 1
+                        edition_bytes += len(article.content.encode('utf-8'))
+                        logger.debug("    成功提取并保存: %.30s...", article.title)
+                elif self._page_blocked():
+                    # 封禁页是明确的信号，直接断开
+                    self.breaker.trip('封禁页')
+                else:
+                    self._signal(False, '正文为空或超时')
+                log_event('article', date=date_str, edition=edition_code,
+                          duration=time.perf_counter() - article_start,
+                          index=article_info['index'], saved=saved)
 
-    def crawl_date_with_click(self, date_str: str) -> int:
-        # Selenium爬取指定日期的所有文章
+            except LayoutChangedError:
+                raise
+            except Exception as e:
+                logger.error(f"  处理文章失败: {e}")
+                edition_failed += 1
+                self._signal(False, type(e).__name__)
+                log_event('article', date=date_str, edition=edition_code,
+                          duration=time.perf_counter() - article_start,
+                          index=article_info['index'], saved=False,
+                          error=str(e).splitlines()[0] if str(e) else type(e).__name__,
+                          level=logging.WARNING)
+
+                edition_retries += 1
+                self._return_to_edition(date_str, edition_idx)
+
+        logger.info(f"  版面 {edition_code} 完成: 新保存 {edition_articles} 篇，跳过 {edition_skipped} 篇")
+        log_event('edition', date=date_str, edition=edition_code,
+                  duration=time.perf_counter() - edition_start,
+                  listed=len(articles), saved=edition_articles, skipped=edition_skipped)
+        result = {
+            'status': 'failed' if edition_failed or interrupted else 'ok',
+            'listed': len(articles),
+            'saved': edition_articles,
+            'skipped': edition_skipped,
+            'failed': edition_failed,
+            'bytes': edition_bytes,
+            'retries': edition_retries,
+            'seconds': round(time.perf_counter() - edition_start, 2),
+            'articles': edition_ids,
+        }
+        if legacy_ids:
+            result['legacy'] = legacy_ids
+        if interrupted:
+            result['error'] = interrupted
+            self._park(date_str, [edition_code], interrupted)
+        return result
+
+    def crawl_date_with_click(self, date_str: str, only_editions: Optional[set] = None) -> int:
+        # Selenium爬取指定日期的所有文章；only_editions 不为空时只爬这些版面（修复队列）
+        if self._run_budget_exhausted():
+            self._park(date_str, None, '超出运行时间预算')
+            return 0
+        if self.breaker.is_open and not self._cool_down_and_probe():
+            self._park(date_str, None, '熔断中，剩余运行时间不够冷却')
+            return 0
+        self._date_budget = TimeBudget(self.date_budget) if self.date_budget else None
+
+        if self.tabs > 1:
+            if self._tab_runner is None:
+                self._tab_runner = TabEditionRunner(self, self.tabs)
+            return self._tab_runner.crawl_date(date_str, only_editions)
+
+        self.current_date, self.current_edition = date_str, None
         total_articles = 0
         actual_saved = 0  # 实际保存的文章数
         skipped_articles = 0  # 跳过的文章数
+        date_start = time.perf_counter()
+        edition_results: Dict[str, Dict] = {}
+        date_status = 'failed'
+        editions: List[str] = []
 
         logger.info(f"\n{'=' * 60}")
         logger.info(f"开始爬取日期: {date_str}")
@@ -388,101 +893,66 @@ class BJNewsCrawler:
 
         try:
             # 导航到指定日期
-            if not self.navigate_to_date(date_str):
-                logger.error(f"无法导航到日期 {date_str}")
+            with timed_phase('navigate', date=date_str) as event:
+                event['ok'] = self.navigate_to_date(date_str)
+            if not event['ok']:
+                status = self._navigate_failed_status(date_str)
+                if status == 'navigate_failed':
+                    logger.error(f"无法导航到日期 {date_str}")
+                    self._signal(False, '日期导航失败')
+                self._write_date_manifest(date_str, status, {})
                 return 0
 
             # 获取所有版面
-            editions = self.get_editions_by_click()
-
-            for edition_idx, edition_code in enumerate(editions):
+            with timed_phase('editions', date=date_str) as event:
+                editions = self.get_editions_by_click()
+                event['count'] = len(editions)
+
+            wanted = [code for code in editions if not only_editions or code in only_editions]
+            for position, edition_code in enumerate(wanted):
+                edition_idx = editions.index(edition_code)
+                # 熔断或日期预算用完时，本日期剩余版面暂停，不再逐个版面重复等待
+                reason = self._interrupt_reason()
+                if reason:
+                    self._park(date_str, wanted[position:], reason)
+                    break
                 logger.info(f"处理版面 {edition_code}...")
 
-                # 如果不是第一个版面，需要点击对应版面
-                if edition_idx > 0:
-                    if not self.click_edition_by_index(edition_idx):
-                        logger.error(f"无法切换到版面 {edition_code}")
-                        continue
-                else:
-                    self.click_edition_by_index(0)
-
-                # 获取该版面的所有文章
-                articles = self.get_article_links_in_edition()
-
-                edition_articles = 0
-                edition_skipped = 0
-
-                # 处理每篇文章
-                for article_info in articles:
-                    total_articles += 1
-
-                    # 先检查文章是否已存在
-                    if self.check_article_exists(
-                            article_info['title'],
-                            date_str,
-                            edition_code,
-                            total_articles
-                    ):
-                        logger.info(f"  文章已存在，跳过: {article_info['title'][:30]}...")
-                        skipped_articles += 1
-                        edition_skipped += 1
-                        continue
-
-                    try:
-                        # 文章不存在，进行爬取
-                        logger.debug(f"  点击文章 {article_info['index']}: {article_info['title'][:30]}...")
-                        self._safe_click(article_info['element'])
-                        time.sleep(1.5)
-
-                        # 提取文章内容
-                        article = self.extract_article_content()
-
-                        if article:
-                            # 设置日期和版面
-                            article.date = date_str
-                            article.edition = edition_code
-
-                            # 保存文章
-                            saved = self.save_article(article, total_articles)
-                            if saved:
-                                actual_saved += 1
-                                edition_articles += 1
-                                logger.debug(f"    成功提取并保存: {article.title[:30]}...")
-
-                        # 返回版面页
-                        self.driver.back()
-                        time.sleep(1.5)
-
-                        # 等待文章列表加载
-                        self.wait.until(
-                            EC.presence_of_element_located(
-                                (By.XPATH, "/html/body/div[3]/div/div[2]/div/div[2]/div[1]/div[2]/ul")
-                            )
-                        )
-
-                    except Exception as e:
-                        logger.error(f"  处理文章失败: {e}")
-
-                        try:
-                            self.driver.back()
-                            time.sleep(1)
-                        except:
-                            self.navigate_to_date(date_str)
-                            self.click_edition_by_index(edition_idx)
-
-                logger.info(f"  版面 {edition_code} 完成: 新保存 {edition_articles} 篇，跳过 {edition_skipped} 篇")
-
+                result = self.crawl_edition(date_str, edition_idx, edition_code)
+                edition_results[edition_code] = result
+                total_articles += result['listed']
+                actual_saved += result['saved']
+                skipped_articles += result['skipped']
+
+            date_status = 'ok'
+        except LayoutChangedError:
+            if not self._page_blocked():
+                self._write_date_manifest(date_str, 'failed', edition_results, edition_list=editions)
+                raise
+            # 选择器未命中是因为被封禁，不是改版：断开熔断器，本日期稍后补爬
+            logger.warning(f"日期 {date_str} 遇到封禁页")
+            self.selectors.reset_misses()
+            self.breaker.trip('封禁页')
+            self._park(date_str, None, '封禁页')
         except Exception as e:
             logger.error(f"爬取日期 {date_str} 失败: {e}")
 
+        if any(unit['date'] == date_str for unit in self.parked):
+            date_status = 'parked'
+        self._write_date_manifest(date_str, date_status, edition_results, time.perf_counter() - date_start,
+                                  edition_list=editions)
         logger.info(
             f"日期 {date_str} 完成: 共 {total_articles} 篇文章，新保存 {actual_saved} 篇，跳过 {skipped_articles} 篇\n")
+        log_event('date', date=date_str, duration=time.perf_counter() - date_start,
+                  listed=total_articles, saved=actual_saved, skipped=skipped_articles)
         return actual_saved
 
-    def save_article(self, article: Article, article_num: int) -> bool:
+    def save_article(self, article: Article) -> bool:
         # 保存文章，如果文件已存在则跳过
         if not article.date:
             return False
+        if not article.article_id:
+            article.article_id = make_article_id(article.date, article.edition, article.url, title=article.title)
 
         year = article.date[:4]
         month = article.date[4:6]
@@ -491,68 +961,55 @@ class BJNewsCrawler:
         day_dir = os.path.join(month_dir, day)
         os.makedirs(day_dir, exist_ok=True)
 
-        filename = self.generate_filename(article.title, article.date, article.edition, article_num)
+        filename = self.generate_filename(article.title, article.article_id)
         filepath = os.path.join(day_dir, filename)
 
-        # 检查文件是否存在
-        if os.path.exists(filepath):
+        # 检查文件是否存在（不完整的文件会被覆盖）
+        if is_complete_article_file(filepath):
             logger.info(f"文件已存在，跳过保存: {filename}")
+            self.article_index.add(article.article_id)
             return False
 
         # 保存
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"标题: {article.title}\n")
-                f.write(f"版面: {article.edition}\n")
-                f.write(f"日期: {article.date}\n")
-                f.write(f"内容:\n{article.content}\n")
+            write_article_file(filepath, article.title, article.edition, article.date, article.content,
+                               article.article_id, article.url)
+            self.article_index.add(article.article_id)
 
-            logger.debug(f"    保存成功: {filename}")
+            logger.debug("    保存成功: %s", filename)
             return True
         except Exception as e:
             logger.error(f"保存失败: {e}")
             # 尝试备用文件名
-            safe_filename = f"{article.date}_{article_num:03d}_{article.edition}_article.txt"
+            safe_filename = f"{article.article_id}_article.txt"
             safe_filepath = os.path.join(day_dir, safe_filename)
 
             # 检查备用文件是否存在
-            if os.path.exists(safe_filepath):
+            if is_complete_article_file(safe_filepath):
                 logger.info(f"备用文件已存在，跳过保存: {safe_filename}")
+                self.article_index.add(article.article_id)
                 return False
 
             try:
-                with open(safe_filepath, 'w', encoding='utf-8') as f:
-                    f.write(f"标题: {article.title}\n")
-                    f.write(f"版面: {article.edition}\n")
-                    f.write(f"日期: {article.date}\n")
-                    f.write(f"内容:\n{article.content}\n")
+                write_article_file(safe_filepath, article.title, article.edition, article.date, article.content,
+                                   article.article_id, article.url)
+                self.article_index.add(article.article_id)
 
-                logger.debug(f"    使用备用文件名保存成功: {safe_filename}")
+                logger.debug("    使用备用文件名保存成功: %s", safe_filename)
                 return True
             except Exception as e2:
                 logger.error(f"备用保存也失败: {e2}")
                 return False
 
     def is_weekend(self, date_str: str) -> tuple:
-        # 判断日期是否为周末（周六或周日）
-        year = int(date_str[:4])
-        month = int(date_str[4:6])
-        day = int(date_str[6:8])
-
-        date_obj = datetime(year, month, day)
-        # weekday() 返回 0-6，其中 5=周六，6=周日
-        weekday = date_obj.weekday()
-
-        if weekday in [5, 6]:  # 周六或周日
-            weekday_name = "周六" if weekday == 5 else "周日"
-            return True, weekday_name
-        return False, None
-
-    def crawl_selected_month(self):
-        # 让用户选择并爬取2025年某个月份的文章
+        # 判断日期是否为不出报的日子（新京报为周六、周日，由站点的出版日历决定）
+        weekday_name = self.site.off_day(date_str)
+        return weekday_name is not None, weekday_name
+
+    def crawl_selected_month(self, year: Optional[int] = None):
+        # 让用户选择并爬取某年某个月份的文章（默认今年）
         # 获取当前日期
         today = datetime.now()
-        current_month = today.month
         current_day = today.day
 
         # 显示选择菜单
@@ -560,14 +1017,20 @@ class BJNewsCrawler:
         print("新京报爬虫 - 月份选择")
         print(f"{'=' * 60}")
         print(f"当前日期：{today.strftime('%Y年%m月%d日')}")
-        print("\n请选择要爬取的2025年月份：")
+
+        if year is None:
+            year_input = input(f"请输入年份 (直接回车为{today.year}年): ").strip()
+            year = int(year_input) if year_input.isdigit() else today.year
+        # 往年可选全部12个月
+        current_month = today.month if year == today.year else 12
+        print(f"\n请选择要爬取的{year}年月份：")
 
         # 显示可选月份
         for month in range(1, current_month + 1):
-            if month < current_month:
-                print(f"  {month:2d} - 2025年{month}月（全月）")
+            if month < current_month or year != today.year:
+                print(f"  {month:2d} - {year}年{month}月（全月）")
             else:
-                print(f"  {month:2d} - 2025年{month}月（1日-{current_day}日）")
+                print(f"  {month:2d} - {year}年{month}月（1日-{current_day}日）")
 
         # 获取用户输入
         while True:
@@ -583,8 +1046,7 @@ class BJNewsCrawler:
                 print("请输入有效的数字")
 
         # 确定日期范围
-        year = 2025
-        if selected_month < current_month:
+        if selected_month < current_month or year != today.year:
             # 爬取整个月
             import calendar
             last_day = calendar.monthrange(year, selected_month)[1]
@@ -623,6 +1085,11 @@ class BJNewsCrawler:
                 weekend_dates.append(f"{date_str}({weekday_name})")
                 continue
 
+            if self._run_budget_exhausted():
+                # 运行预算用完：剩余日期直接暂停，不再等待
+                self._park(date_str, None, '超出运行时间预算')
+                continue
+
             try:
                 # 爬取这天的所有版面
                 saved_count = self.crawl_date_with_click(date_str)
@@ -633,6 +1100,11 @@ class BJNewsCrawler:
                 else:
                     failed_dates.append(date_str)
 
+            except LayoutChangedError as e:
+                # 页面改版时继续爬取只会逐页超时，直接停止本次运行
+                logger.error(f"{e}，停止爬取，请更新选择器")
+                failed_dates.append(date_str)
+                break
             except Exception as e:
                 logger.error(f"爬取日期 {date_str} 失败: {e}")
                 failed_dates.append(date_str)
@@ -642,7 +1114,7 @@ class BJNewsCrawler:
         # 统计
         logger.info(f"\n{'#' * 60}")
         logger.info(f"爬取完成统计:")
-        logger.info(f"  - 月份：2025年{selected_month}月")
+        logger.info(f"  - 月份：{year}年{selected_month}月")
         logger.info(f"  - 总天数: {end_day - start_day + 1}")
         logger.info(f"  - 工作日: {end_day - start_day + 1 - weekend_days}")
         logger.info(f"  - 周末天数: {weekend_days}")
@@ -656,6 +1128,7 @@ class BJNewsCrawler:
         if success_days > 0:
             logger.info(f"  - 平均速度: {total_saved / success_days:.1f} 篇/天")
         logger.info(f"{'#' * 60}\n")
+        self._finish_run()
 
     def crawl_current_month(self):
         # 爬取当前月份从1号到今天的所有文章
@@ -693,6 +1166,11 @@ class BJNewsCrawler:
                 weekend_dates.append(f"{date_str}({weekday_name})")
                 continue
 
+            if self._run_budget_exhausted():
+                # 运行预算用完：剩余日期直接暂停，不再等待
+                self._park(date_str, None, '超出运行时间预算')
+                continue
+
             try:
                 # 爬取这天的所有版面
                 saved_count = self.crawl_date_with_click(date_str)
@@ -703,6 +1181,11 @@ class BJNewsCrawler:
                 else:
                     failed_dates.append(date_str)
 
+            except LayoutChangedError as e:
+                # 页面改版时继续爬取只会逐页超时，直接停止本次运行
+                logger.error(f"{e}，停止爬取，请更新选择器")
+                failed_dates.append(date_str)
+                break
             except Exception as e:
                 logger.error(f"爬取日期 {date_str} 失败: {e}")
                 failed_dates.append(date_str)
@@ -725,6 +1208,7 @@ class BJNewsCrawler:
         if success_days > 0:
             logger.info(f"  - 平均速度: {total_saved / success_days:.1f} 篇/天")
         logger.info(f"{'#' * 60}\n")
+        self._finish_run()
 
     def crawl_specific_date(self, date_str: str):
         # 爬取特定日期（用于测试）
@@ -733,7 +1217,7 @@ class BJNewsCrawler:
         # 检查是否为周末
         is_weekend_day, weekday_name = self.is_weekend(date_str)
         if is_weekend_day:
-            logger.warning(f"日期 {date_str} 是{weekday_name}，新京报不发行")
+            logger.warning(f"日期 {date_str} 是{weekday_name}，{self.site.display_name}不发行")
             user_input = input("是否仍要尝试爬取？(y/n): ")
             if user_input.lower() != 'y':
                 logger.info("跳过周末爬取")
@@ -744,12 +1228,17 @@ class BJNewsCrawler:
         try:
             count = self.crawl_date_with_click(date_str)
             logger.info(f"完成: 新保存 {count} 篇文章")
+        except LayoutChangedError as e:
+            logger.error(f"{e}，请更新选择器")
         except Exception as e:
             logger.error(f"失败: {e}")
+        self._finish_run()
 
-    def crawl_date_range(self, start_date: str, end_date: str, skip_weekends: bool = True):
-        # 爬取指定日期范围内的所有报纸
+    def crawl_date_range(self, start_date: str, end_date: str, skip_weekends: bool = True,
+                         units: Optional[List[Dict]] = None):
+        # 爬取指定日期范围内的所有报纸；units 为完整性扫描输出的修复队列时只爬其中的日期/版面
         from datetime import timedelta
+        repair_plan = units_by_date(units) if units is not None else None
 
         start = datetime.strptime(start_date, "%Y%m%d")
         end = datetime.strptime(end_date, "%Y%m%d")
@@ -772,6 +1261,10 @@ class BJNewsCrawler:
         while current <= end:
             date_str = current.strftime("%Y%m%d")
 
+            if repair_plan is not None and date_str not in repair_plan:
+                current += timedelta(days=1)
+                continue
+
             # 检查是否为周末
             if skip_weekends:
                 is_weekend_day, weekday_name = self.is_weekend(date_str)
@@ -781,13 +1274,25 @@ class BJNewsCrawler:
                     current += timedelta(days=1)
                     continue
 
+            if self._run_budget_exhausted():
+                # 运行预算用完：剩余日期直接暂停，不再等待
+                self._park(date_str, None, '超出运行时间预算')
+                current += timedelta(days=1)
+                continue
+
             try:
-                saved_count = self.crawl_date_with_click(date_str)
+                only_editions = repair_plan.get(date_str) if repair_plan is not None else None
+                saved_count = self.crawl_date_with_click(date_str, only_editions)
                 if saved_count >= 0:
                     success_days += 1
                     total_saved += saved_count
                 else:
                     failed_dates.append(date_str)
+            except LayoutChangedError as e:
+                # 页面改版时继续爬取只会逐页超时，直接停止本次运行
+                logger.error(f"{e}，停止爬取，请更新选择器")
+                failed_dates.append(date_str)
+                break
             except Exception as e:
                 logger.error(f"爬取日期 {date_str} 失败: {e}")
                 failed_dates.append(date_str)
@@ -807,20 +1312,175 @@ class BJNewsCrawler:
         if success_days > 0:
             logger.info(f"  - 平均速度: {total_saved / success_days:.1f} 篇/天")
         logger.info(f"{'#' * 60}\n")
+        self._finish_run()
+
+    def crawl_scheduled(self, start_date: str, end_date: str, deadline_minutes: Optional[float] = None,
+                        policy: PriorityPolicy = None, skip_weekends: bool = True):
+        # 按优先级爬取：新日期优先、头版/重点版面优先、上次失败的单元提前；到截止时间停止并报告未完成部分
+        from datetime import timedelta
+
+        dates = []
+        current = datetime.strptime(start_date, "%Y%m%d")
+        end = datetime.strptime(end_date, "%Y%m%d")
+        while current <= end:
+            date_str = current.strftime("%Y%m%d")
+            if not (skip_weekends and self.is_weekend(date_str)[0]):
+                dates.append(date_str)
+            current += timedelta(days=1)
+
+        # 修复队列中的单元视为上次失败
+        failed_units = set()
+        if os.path.exists(self.repair_queue_file):
+            failed_units = {(u['date'], u.get('edition')) for u in load_repair_queue(self.repair_queue_file)}
+
+        deadline = time.time() + deadline_minutes * 60 if deadline_minutes else None
+        scheduler = CrawlScheduler(policy, deadline, failed_units)
+        scheduler.add_dates(dates)
+
+        logger.info(f"\n{'#' * 60}")
+        logger.info(f"按优先级爬取: {start_date} 至 {end_date}，共 {len(dates)} 天")
+        if deadline:
+            logger.info(f"截止时间: {datetime.fromtimestamp(deadline).strftime('%H:%M:%S')}")
+        logger.info(f"{'#' * 60}\n")
+
+        self._init_driver(headless=False)
+
+        current_date = None
+        editions: List[str] = []
+        # 本次各日期已完成的版面结果，全部版面都有结果前日期状态为 partial
+        date_results: Dict[str, Dict[str, Dict]] = {}
+        total_saved = 0
+        while True:
+            unit = scheduler.next_unit(current_date)
+            if unit is None:
+                break
+            unit_start = time.perf_counter()
+            navigated = 0.0
+            try:
+                # 与 crawl_date_with_click 一样：预算用完或熔断冷却不完时停止，剩余单元并入修复队列
+                if self._run_budget_exhausted():
+                    logger.warning("超出运行时间预算，停止优先级爬取")
+                    scheduler.requeue(unit)
+                    break
+                if self.breaker.is_open:
+                    if not self._cool_down_and_probe():
+                        logger.warning("熔断中，剩余运行时间不够冷却，停止优先级爬取")
+                        scheduler.requeue(unit)
+                        break
+                    # 探测打开了首页，需要重新导航到日期
+                    current_date = None
+                if unit.date != current_date:
+                    logger.info(f"切换到日期 {unit.date}（优先级 {unit.priority:.1f}）")
+                    current_date = None
+                    self._date_budget = TimeBudget(self.date_budget) if self.date_budget else None
+                    if not self.navigate_to_date(unit.date):
+                        status = self._navigate_failed_status(unit.date)
+                        self._write_date_manifest(unit.date, status, {})
+                        if status == 'no_paper':
+                            # 当天无报纸：日期算作已完成，不进入修复队列
+                            scheduler.add_editions(unit.date, [])
+                        scheduler.record(unit, time.perf_counter() - unit_start, ok=status == 'no_paper')
+                        continue
+                    editions = self.get_editions_by_click()
+                    current_date = unit.date
+                    navigated = time.perf_counter() - unit_start
+                    scheduler.add_editions(unit.date, editions)
+
+                if unit.edition not in editions:
+                    scheduler.record(unit, time.perf_counter() - unit_start, ok=True, navigated=navigated)
+                    continue
+
+                edition_idx = editions.index(unit.edition)
+                logger.info(f"处理 {unit.date} 版面 {unit.edition}（优先级 {unit.priority:.1f}）")
+                result = self.crawl_edition(unit.date, edition_idx, unit.edition)
+                results = date_results.setdefault(unit.date, {})
+                results[unit.edition] = result
+                status = 'ok' if all(code in results for code in editions) else 'partial'
+                if any(parked['date'] == unit.date for parked in self.parked):
+                    status = 'parked'
+                self._write_date_manifest(unit.date, status, {unit.edition: result}, edition_list=editions)
+                total_saved += result['saved']
+                scheduler.record(unit, time.perf_counter() - unit_start,
+                                 ok=result['status'] == 'ok', navigated=navigated)
+            except LayoutChangedError as e:
+                logger.error(f"{e}，停止爬取，请更新选择器")
+                scheduler.record(unit, time.perf_counter() - unit_start, ok=False)
+                break
+            except Exception as e:
+                logger.error(f"处理 {unit.date} {unit.edition} 失败: {e}")
+                scheduler.record(unit, time.perf_counter() - unit_start, ok=False)
+                current_date = None
+
+        # 未完成和失败的单元并入修复队列（保留扫描、回填等写入的单元），本次完成的单元从队列移除
+        repair_units = scheduler.undone_as_repair_units()
+        merge_repair_queue(repair_units, self.repair_queue_file, done=scheduler.completed_keys())
+
+        logger.info(f"\n{'#' * 60}")
+        logger.info(f"优先级爬取完成统计:")
+        logger.info(f"  - 新保存文章数: {total_saved}")
+        for line in scheduler.report():
+            logger.info(line)
+        logger.info(f"  - 未完成/失败单元已并入 {self.repair_queue_file}")
+        logger.info(f"{'#' * 60}\n")
+        self._finish_run()
 
     def __del__(self):
         if hasattr(self, 'driver') and self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
+            self.launcher.release(self.driver)
+            self.driver = None
+        if hasattr(self, 'launcher'):
+            self.launcher.stop()
+
+
+def parse_args():
+    # 命令行参数均为可选，不带参数时与原来一样进入交互菜单
+    parser = argparse.ArgumentParser(description='新京报爬虫')
+    parser.add_argument('--download-assets', action='store_true', help='同时下载版面PDF/版面图')
+    parser.add_argument('--asset-workers', type=int, default=4, help='版面资源下载并发数')
+    parser.add_argument('--warm-start', action='store_true',
+                        help='复用chromedriver服务，使用持久化浏览器配置与磁盘缓存')
+    parser.add_argument('--profile-dir', default=None, help='热启动使用的浏览器配置目录')
+    parser.add_argument('--attach', default=None, metavar='HOST:PORT',
+                        help='连接已运行的Chrome（需以 --remote-debugging-port 启动）')
+    parser.add_argument('--tabs', type=int, default=1,
+                        help='同一浏览器内并行的标签页数（每个标签页负责一个版面）')
+    parser.add_argument('--profile-memory', type=float, default=None, metavar='SECONDS',
+                        help='每隔若干秒采样Python/Chrome内存，写入 memory_profile.jsonl 并在结束时报告泄漏')
+    parser.add_argument('--capture', action='store_true',
+                        help='从网络响应解析版面/文章HTML（CDP性能日志），减少逐元素读取和固定等待')
+    parser.add_argument('--edition-budget', type=float, default=None, metavar='MINUTES',
+                        help='单个版面的时间预算（分钟），超时的版面记入修复队列；默认不限')
+    parser.add_argument('--date-budget', type=float, default=None, metavar='MINUTES',
+                        help='单个日期的时间预算（分钟），超时后剩余版面记入修复队列；默认不限')
+    parser.add_argument('--run-budget', type=float, default=None, metavar='MINUTES',
+                        help='整次运行的时间预算（分钟），用完后剩余日期记入修复队列')
+    parser.add_argument('--browser-cache', default=DEFAULT_CACHE_ROOT, metavar='DIR',
+                        help='多个浏览器与多次运行共用的磁盘缓存目录（JS/CSS/字体/版面图不必重复下载）')
+    parser.add_argument('--no-browser-cache', action='store_true', help='不使用共享磁盘缓存')
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     # 输出目录
     output_directory = r"D:\CENTER\Data\2025\报纸\报纸源文本\新京"
 
-    crawler = BJNewsCrawler(output_dir=output_directory)
+    # 单个爬虫与回填各线程共用的设置
+    crawler_kwargs = dict(download_assets=args.download_assets,
+                          asset_workers=args.asset_workers,
+                          warm_start=args.warm_start,
+                          profile_dir=args.profile_dir,
+                          edition_budget=args.edition_budget * 60 if args.edition_budget else None,
+                          date_budget=args.date_budget * 60 if args.date_budget else None,
+                          browser_cache=None if args.no_browser_cache else args.browser_cache,
+                          stats_db=STATS_DB_FILE)
+    crawler = BJNewsCrawler(output_dir=output_directory,
+                            debugger_address=args.attach,
+                            tabs=args.tabs,
+                            capture=args.capture,
+                            memory_profile=args.profile_memory,
+                            run_budget=args.run_budget * 60 if args.run_budget else None,
+                            **crawler_kwargs)
 
     try:
         # 显示主菜单
@@ -828,13 +1488,17 @@ def main():
         print("新京报爬虫系统")
         print(f"{'=' * 60}")
         print("请选择操作模式：")
-        print("  1 - 爬取2025年指定月份")
+        print("  1 - 爬取指定年份的指定月份")
         print("  2 - 爬取当前月份（到今天）")
         print("  3 - 爬取特定日期（测试用）")
         print("  4 - 爬取日期范围")
+        print("  5 - 按修复队列补爬（先运行 xinjing_scan.py 生成）")
+        print("  6 - 按优先级爬取日期范围（新日期、头版优先，可设截止时间）")
+        print("  7 - 多年历史回填（按月分片并行，全局限速）")
+        print("  8 - 重新校验已归档日期（抓取网站的更正，只改写有变化的文章）")
         print(f"{'=' * 60}")
 
-        choice = input("请输入选择 (1-4): ").strip()
+        choice = input("请输入选择 (1-8): ").strip()
 
         if choice == '1':
             # 爬取指定月份
@@ -862,6 +1526,52 @@ def main():
                 crawler.crawl_date_range(start_input, end_input, skip_weekends=(skip != 'n'))
             else:
                 print("日期格式错误")
+
+        elif choice == '5':
+            # 按修复队列补爬
+            queue_path = input(f"修复队列文件 (默认 {REPAIR_QUEUE_FILE}): ").strip() or REPAIR_QUEUE_FILE
+            units = load_repair_queue(queue_path)
+            if units:
+                dates = sorted(unit['date'] for unit in units)
+                crawler.crawl_date_range(dates[0], dates[-1], skip_weekends=False, units=units)
+            else:
+                print("修复队列为空")
+
+        elif choice == '6':
+            # 按优先级爬取
+            start_input = input("请输入起始日期 (格式: 20250101): ").strip()
+            end_input = input("请输入结束日期 (格式: 20250110): ").strip()
+            minutes = input("最多运行多少分钟？(直接回车表示不限): ").strip()
+            if len(start_input) == 8 and len(end_input) == 8:
+                crawler.crawl_scheduled(start_input, end_input,
+                                        deadline_minutes=float(minutes) if minutes else None)
+            else:
+                print("日期格式错误")
+
+        elif choice == '7':
+            # 多年回填（每个线程各自启动浏览器，不使用当前爬虫实例）
+            from xinjing_backfill import run_backfill
+            start_year = input("请输入起始年份 (如 2020): ").strip()
+            end_year = input("请输入结束年份 (直接回车与起始年份相同): ").strip() or start_year
+            workers = input("并行浏览器数 (默认2): ").strip()
+            if start_year.isdigit() and end_year.isdigit():
+                end_date = min(f"{end_year}1231", datetime.now().strftime("%Y%m%d"))
+                run_backfill(f"{start_year}0101", end_date, output_directory,
+                             workers=int(workers) if workers.isdigit() else 2, **crawler_kwargs)
+            else:
+                print("年份格式错误")
+
+        elif choice == '8':
+            # 重新校验：条件请求逐篇重新获取，不需要浏览器
+            from xinjing_verify import verify_range
+            start_input = input("请输入起始日期 (格式: 20250101): ").strip()
+            end_input = input("请输入结束日期 (直接回车与起始日期相同): ").strip() or start_input
+            if len(start_input) == 8 and len(end_input) == 8:
+                totals = verify_range(output_directory, start_input, end_input)
+                logger.info(f"校验 {totals['days']} 天，{totals['articles']} 篇：未修改(304) {totals['not_modified']}，"
+                            f"内容相同 {totals['unchanged']}，已更正 {totals['changed']}，失败 {totals['failed']}")
+            else:
+                print("日期格式错误")
         else:
             print("无效的选择")
 
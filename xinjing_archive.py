@@ -0,0 +1,249 @@
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# 文章文件格式（save_article 写出）:
+#   标题: ...
+#   版面: A01
+#   日期: 20250901
+#   编号: 20250901_A01_3930（可选）
+#   链接: https://...（可选）
+#   内容:
+#   正文...
+# 补抓脚本写出的旧格式只有 "标题:" 与 "内容: 正文" 两行
+HEADER_FIELDS = (
+    ('title', '标题'),
+    ('edition', '版面'),
+    ('date', '日期'),
+    ('article_id', '编号'),
+    ('url', '链接'),
+)
+CONTENT_LABEL = '内容'
+
+# 20250901_A01_3930_标题.txt（按站点文章ID命名）/ 20250901_A01_h0123456789_标题.txt（没有站点ID时用标题哈希）
+FILENAME_PATTERN = re.compile(
+    r'^(?P<date>\d{8})_(?P<edition>[A-Z]\d{2})_(?P<id>\d+|h[0-9a-f]{10})_(?P<title>.*)\.txt$')
+# 旧文件名：20250901_001_A01_标题.txt（主爬虫按顺序编号）/ 20250901_01_标题.txt（补抓脚本）
+LEGACY_FILENAME_PATTERN = re.compile(
+    r'^(?P<date>\d{8})_(?P<num>\d{2,3})_(?:(?P<edition>A\d{2})_)?(?P<title>.*)\.txt$')
+
+# 主爬虫旧文件名里的标题截断到这个长度，达到该长度的旧标题只是完整标题的前缀
+LEGACY_TITLE_LIMIT = 50
+
+# 文章页地址中的站点ID: .../20250901_A01/20250901_A01_3930.html
+_URL_ID_PATTERN = re.compile(r'(\d{8})_([A-Z]\d{2})_(\d+)\.s?html?(?:[?#]|$)')
+# 其他形式的内容ID: content_3930.htm / ?id=3930 / .../3930.html
+_CONTENT_ID_PATTERN = re.compile(r'(?:content_|[?&](?:id|aid)=|/)(\d{3,})(?:\.s?html?)?(?:[?#&]|$)')
+
+
+def article_day_dir(output_dir: str, date_str: str) -> str:
+    # 输出目录结构: YYYY-MM/DD
+    return os.path.join(output_dir, f"{date_str[:4]}-{date_str[4:6]}", date_str[6:8])
+
+
+def make_article_id(date_str: str, edition: str, url: str = '', content_id: str = '', title: str = '') -> str:
+    """文章的稳定ID：优先取站点地址里的文章ID，其次取内容ID，都没有时用 日期+版面+标题 的哈希"""
+    match = _URL_ID_PATTERN.search(url or '')
+    if match:
+        return '_'.join(match.groups())
+    match = _CONTENT_ID_PATTERN.search(url or '')
+    if match:
+        return f"{date_str}_{edition}_{match.group(1)}"
+    if content_id and content_id.isdigit():
+        return f"{date_str}_{edition}_{content_id}"
+    title_key = ' '.join((title or '').split())
+    digest = hashlib.sha1(f"{date_str}|{edition}|{title_key}".encode('utf-8')).hexdigest()[:10]
+    return f"{date_str}_{edition}_h{digest}"
+
+
+def format_article(title: str, edition: str, date: str, content: str,
+                   article_id: str = '', url: str = '') -> str:
+    lines = [f"标题: {title}", f"版面: {edition}", f"日期: {date}"]
+    if article_id:
+        lines.append(f"编号: {article_id}")
+    if url:
+        lines.append(f"链接: {url}")
+    lines += [f"{CONTENT_LABEL}:", content]
+    return '\n'.join(lines) + '\n'
+
+
+def parse_article_text(text: str) -> Optional[Dict[str, str]]:
+    """解析文章文件内容，返回 title/edition/date/article_id/url/content，格式不符时返回None"""
+    record = {'title': '', 'edition': '', 'date': '', 'article_id': '', 'url': '', 'content': ''}
+    labels = {label: key for key, label in HEADER_FIELDS}
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        label, sep, value = line.partition(':')
+        if not sep:
+            return None
+        if label == CONTENT_LABEL:
+            # 新格式正文从下一行开始；旧格式正文与标签同行
+            rest = lines[i + 1:]
+            body = '\n'.join([value.strip()] + rest) if value.strip() else '\n'.join(rest)
+            record['content'] = body.rstrip('\n')
+            return record
+        if label not in labels:
+            return None
+        record[labels[label]] = value.strip()
+    return None
+
+
+def read_article_file(path: str) -> Optional[Dict[str, str]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return parse_article_text(f.read())
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def write_article_file(path: str, title: str, edition: str, date: str, content: str,
+                       article_id: str = '', url: str = ''):
+    # 先写临时文件再替换，中断时不会留下截断的文章文件
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(format_article(title, edition, date, content, article_id, url))
+    os.replace(tmp_path, path)
+
+
+def parse_filename(name: str) -> Optional[Dict[str, str]]:
+    """解析文件名，返回 date/edition/title，以及 article_id（新文件名）或 num（旧文件名）"""
+    match = FILENAME_PATTERN.match(name)
+    if match:
+        info = match.groupdict()
+        info['article_id'] = f"{info['date']}_{info['edition']}_{info.pop('id')}"
+        info['num'] = None
+        return info
+    match = LEGACY_FILENAME_PATTERN.match(name)
+    if not match:
+        return None
+    info = match.groupdict()
+    info['article_id'] = None
+    return info
+
+
+def iter_day_dirs(output_dir: str) -> Iterator[str]:
+    """按日期顺序遍历 YYYY-MM/DD 目录"""
+    try:
+        months = sorted(e.name for e in os.scandir(output_dir)
+                        if e.is_dir() and re.fullmatch(r'\d{4}-\d{2}', e.name))
+    except OSError:
+        return
+    for month in months:
+        month_path = os.path.join(output_dir, month)
+        days = sorted(e.name for e in os.scandir(month_path)
+                      if e.is_dir() and re.fullmatch(r'\d{2}', e.name))
+        for day in days:
+            yield os.path.join(month_path, day)
+
+
+def iter_article_files(output_dir: str) -> Iterator[str]:
+    for day_dir in iter_day_dirs(output_dir):
+        for entry in sorted(os.scandir(day_dir), key=lambda e: e.name):
+            if entry.is_file() and entry.name.endswith('.txt'):
+                yield entry.path
+
+
+# 每个日期目录下的清单：记录网站列出的版面/文章数与各版面爬取状态
+DAY_MANIFEST_NAME = '_manifest.json'
+# 不需要再爬的日期状态：已爬完，或当天没有报纸
+DONE_STATUSES = ('ok', 'no_paper')
+# 有效文章文件的最小字节数（四行表头 + 正文）
+MIN_ARTICLE_BYTES = 40
+
+
+def read_day_manifest(day_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(day_dir, DAY_MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_day_manifest(day_dir: str, manifest: Dict):
+    os.makedirs(day_dir, exist_ok=True)
+    path = os.path.join(day_dir, DAY_MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def is_complete_article_file(path: str) -> bool:
+    """快速判断：非空、不太短且以换行结尾（写入中断的文件不以换行结尾）"""
+    try:
+        size = os.path.getsize(path)
+        if size < MIN_ARTICLE_BYTES:
+            return False
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+    except OSError:
+        return False
+
+
+class ArticleIndex:
+    """已归档文章的内存索引，每次运行只扫描一遍归档，之后的存在检查都是集合查找
+
+    新文件按站点文章ID索引；旧的按顺序编号命名的文件按 (日期, 版面, 标题键) 索引，
+    避免升级后把已有文章重新下载一遍。旧文件名里的标题未经规范化，入索引前做与新标题相同的
+    清理（title_key）；被截断过的旧标题另按前缀匹配。
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.ids: Set[str] = set()
+        self.legacy: Set[Tuple[str, str, str]] = set()
+        self.legacy_prefixes: Dict[Tuple[str, str], List[str]] = {}
+        self.loaded = False
+        self.load_seconds = 0.0
+
+    def add_legacy(self, date_str: str, edition: str, raw_title: str):
+        # xinjing_text 依赖本模块，这里延迟导入
+        from xinjing_text import title_key
+
+        key = title_key(raw_title)
+        if not key:
+            return
+        self.legacy.add((date_str, edition, key))
+        if len(raw_title) >= LEGACY_TITLE_LIMIT:
+            self.legacy_prefixes.setdefault((date_str, edition), []).append(key)
+
+    def load(self) -> 'ArticleIndex':
+        start = time.perf_counter()
+        for day_dir in iter_day_dirs(self.output_dir):
+            with os.scandir(day_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.txt') or not entry.is_file():
+                        continue
+                    info = parse_filename(entry.name)
+                    # 空文件或写入中断的文件不算已归档
+                    if info and is_complete_article_file(entry.path):
+                        if info['article_id']:
+                            self.ids.add(info['article_id'])
+                        else:
+                            self.add_legacy(info['date'], info['edition'] or '', info['title'])
+        self.loaded = True
+        self.load_seconds = time.perf_counter() - start
+        return self
+
+    def contains(self, article_id: str, date_str: str = '', edition: str = '', title_key: str = '') -> bool:
+        # title_key 为 xinjing_text.title_key 得到的标题键，只用于匹配旧文件名
+        if article_id in self.ids:
+            return True
+        if not title_key or not self.legacy:
+            return False
+        if (date_str, edition, title_key) in self.legacy or (date_str, '', title_key) in self.legacy:
+            return True
+        prefixes = self.legacy_prefixes.get((date_str, edition), []) + self.legacy_prefixes.get((date_str, ''), [])
+        return any(title_key.startswith(prefix) for prefix in prefixes)
+
+    def add(self, article_id: str):
+        self.ids.add(article_id)
+
+    def discard(self, article_id: str):
+        self.ids.discard(article_id)
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.legacy)
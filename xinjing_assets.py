@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, unquote
+
+from xinjing_http import get_pool, build_headers
+from xinjing_logging import log_event
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIR_NAME = 'assets'
+INDEX_FILE_NAME = 'assets_index.json'
+
+
+@dataclass
+class AssetTask:
+    url: str
+    date: str
+    edition: str
+    referer: str = ''
+
+
+class EditionAssetDownloader:
+    """版面PDF/版面图后台下载器：分块写盘、Range断点续传、有界并发、按内容哈希去重"""
+
+    def __init__(self, output_dir: str, max_workers: int = 4, chunk_size: int = 64 * 1024,
+                 retries: int = 3):
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.pool = get_pool(maxsize=max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asset')
+        self.cookies = None
+
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._submitted = set()
+        self.index_path = os.path.join(output_dir, INDEX_FILE_NAME)
+        self._index = self._load_index()
+        self.stats = {'downloaded': 0, 'resumed': 0, 'skipped': 0, 'duplicate': 0,
+                      'failed': 0, 'bytes': 0}
+
+    def _load_index(self) -> Dict[str, Dict[str, str]]:
+        # 索引结构: {"hashes": {sha256: 相对路径}, "urls": {url: sha256}}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            index.setdefault('hashes', {})
+            index.setdefault('urls', {})
+            return index
+        except (OSError, ValueError):
+            return {'hashes': {}, 'urls': {}}
+
+    def _save_index(self):
+        # 调用方持有 self._lock
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    def set_cookies(self, cookies):
+        self.cookies = cookies
+
+    def asset_path(self, task: AssetTask) -> str:
+        year, month, day = task.date[:4], task.date[4:6], task.date[6:8]
+        asset_dir = os.path.join(self.output_dir, f"{year}-{month}", day, ASSET_DIR_NAME)
+        basename = os.path.basename(unquote(urlparse(task.url).path)) or 'asset'
+        return os.path.join(asset_dir, f"{task.date}_{task.edition}_{basename}")
+
+    def submit(self, task: AssetTask) -> Optional[Future]:
+        """提交下载任务，同一URL在本次运行中只下载一次"""
+        with self._lock:
+            if task.url in self._submitted:
+                return None
+            self._submitted.add(task.url)
+        future = self.executor.submit(self._download, task)
+        self._futures.append(future)
+        return future
+
+    def _register(self, digest: str, path: str, url: str) -> str:
+        """登记哈希，返回状态: new / duplicate"""
+        rel_path = os.path.relpath(path, self.output_dir)
+        with self._lock:
+            self._index['urls'][url] = digest
+            existing = self._index['hashes'].get(digest)
+            if existing and existing != rel_path and os.path.exists(os.path.join(self.output_dir, existing)):
+                self._save_index()
+                return 'duplicate'
+            self._index['hashes'][digest] = rel_path
+            self._save_index()
+            return 'new'
+
+    @staticmethod
+    def _hash_file(path: str, hasher=None, chunk_size: int = 1024 * 1024):
+        hasher = hasher or hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(chunk)
+        return hasher
+
+    def _download(self, task: AssetTask) -> str:
+        start = time.perf_counter()
+        path = self.asset_path(task)
+        status = 'failed'
+        try:
+            status = self._fetch(task, path)
+        except Exception as e:
+            logger.error(f"版面资源下载失败 {task.url}: {e}")
+        with self._lock:
+            self.stats[status] += 1
+        log_event('asset', date=task.date, edition=task.edition,
+                  duration=time.perf_counter() - start, url=task.url, status=status)
+        return status
+
+    def _fetch(self, task: AssetTask, path: str) -> str:
+        # 已下载过（包括去重后指向其他文件）的URL直接跳过
+        with self._lock:
+            digest = self._index['urls'].get(task.url)
+            known_path = self._index['hashes'].get(digest) if digest else None
+        if known_path and os.path.exists(os.path.join(self.output_dir, known_path)):
+            return 'skipped'
+
+        # 文件已存在但未登记，补登记哈希
+        if os.path.exists(path):
+            self._register(self._hash_file(path).hexdigest(), path, task.url)
+            return 'skipped'
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part_path = path + '.part'
+        resumed = False
+
+        for attempt in range(1, self.retries + 1):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            extra = {'Range': f'bytes={offset}-'} if offset else None
+            headers = build_headers(referer=task.referer, cookies=self.cookies, extra=extra)
+            try:
+                response = self.pool.request('GET', task.url, headers=headers,
+                                             preload_content=False, redirect=True)
+            except Exception as e:
+                logger.warning(f"版面资源请求失败 ({attempt}/{self.retries}) {task.url}: {e}")
+                time.sleep(attempt * 2)
+                continue
+
+            try:
+                if response.status == 416 and offset:
+                    # 服务器认为已下载完整
+                    break
+                if response.status not in (200, 206):
+                    logger.warning(f"版面资源返回 {response.status}: {task.url}")
+                    if response.status < 500:
+                        return 'failed'
+                    time.sleep(attempt * 2)
+                    continue
+
+                # 200 表示服务器不支持Range，从头写入
+                mode = 'ab' if response.status == 206 else 'wb'
+                resumed = resumed or mode == 'ab'
+                with open(part_path, mode) as f:
+                    for chunk in response.stream(self.chunk_size):
+                        f.write(chunk)
+                        with self._lock:
+                            self.stats['bytes'] += len(chunk)
+                break
+            except Exception as e:
+                logger.warning(f"版面资源下载中断 ({attempt}/{self.retries}) {task.url}: {e}")
+                time.sleep(attempt * 2)
+            finally:
+                response.release_conn()
+        else:
+            return 'failed'
+
+        if not os.path.exists(part_path):
+            return 'failed'
+
+        digest = self._hash_file(part_path).hexdigest()
+        os.replace(part_path, path)
+        if self._register(digest, path, task.url) == 'duplicate':
+            # 内容与已有文件相同，删除重复副本
+            os.remove(path)
+            logger.debug("版面资源重复，已去重: %s", task.url)
+            return 'duplicate'
+
+        logger.debug("版面资源已保存: %s", path)
+        return 'resumed' if resumed else 'downloaded'
+
+    def wait(self) -> Dict[str, int]:
+        """等待所有已提交任务完成并返回统计"""
+        for future in self._futures:
+            try:
+                future.result()
+            except Exception:
+                pass
+        self._futures.clear()
+        return dict(self.stats)
+
+    def close(self) -> Dict[str, int]:
+        stats = self.wait()
+        self.executor.shutdown(wait=True)
+        return stats
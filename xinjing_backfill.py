@@ -0,0 +1,287 @@
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from statistics import median
+from typing import Dict, List, Optional
+
+from xinjing import BJNewsCrawler
+from xinjing_archive import DONE_STATUSES, article_day_dir, read_day_manifest
+from xinjing_cache import DEFAULT_CACHE_ROOT
+from xinjing_limits import RateLimiter, CircuitBreaker
+from xinjing_logging import log_event
+from xinjing_scan import merge_repair_queue, REPAIR_QUEUE_FILE
+from xinjing_selectors import LayoutChangedError
+from xinjing_stats import StatsStore, STATS_DB_FILE
+
+logger = logging.getLogger(__name__)
+
+# 没有历史记录时每个日期的估计耗时（约16个版面 × 每版面数篇文章）
+DEFAULT_DATE_SECONDS = 600.0
+EVENT_LOG_FILE = 'bjnews_crawler.jsonl'
+
+
+@dataclass
+class MonthShard:
+    month: str
+    dates: List[str] = field(default_factory=list)
+
+
+def plan_shards(start_date: str, end_date: str, output_dir: str, skip_weekends: bool = True,
+                resume: bool = True, newest_first: bool = True) -> List[MonthShard]:
+    """把日期范围按月切分；resume 时跳过清单状态为 ok 的日期"""
+    shards: Dict[str, MonthShard] = {}
+    current = datetime.strptime(start_date, "%Y%m%d")
+    end = datetime.strptime(end_date, "%Y%m%d")
+    while current <= end:
+        date_str = current.strftime("%Y%m%d")
+        current += timedelta(days=1)
+        if skip_weekends and datetime.strptime(date_str, "%Y%m%d").weekday() >= 5:
+            continue
+        if resume:
+            manifest = read_day_manifest(article_day_dir(output_dir, date_str))
+            if manifest and manifest.get('status') in DONE_STATUSES:
+                continue
+        month = f"{date_str[:4]}-{date_str[4:6]}"
+        shards.setdefault(month, MonthShard(month)).dates.append(date_str)
+    return sorted(shards.values(), key=lambda s: s.month, reverse=newest_first)
+
+
+def measured_date_cost(event_log: str = EVENT_LOG_FILE, default: float = DEFAULT_DATE_SECONDS) -> float:
+    """从JSON事件日志里取以往每个日期的实际耗时（中位数），没有记录时用默认值"""
+    durations = []
+    try:
+        with open(event_log, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '"phase": "date"' not in line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get('duration') and event.get('listed'):
+                    durations.append(event['duration'])
+    except OSError:
+        pass
+    return median(durations) if durations else default
+
+
+def _format_seconds(seconds: float) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}小时{rest // 60:02d}分"
+
+
+class BackfillProgress:
+    """汇总各线程的进度，用实测的每日期耗时估计剩余时间"""
+
+    def __init__(self, total_dates: int, workers: int, seed_seconds: float):
+        self.total = total_dates
+        self.workers = workers
+        self.seed_seconds = seed_seconds
+        self.done = 0
+        self.failed: List[str] = []
+        self.saved = 0
+        self.durations: List[float] = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def per_date_seconds(self) -> float:
+        # 本次运行样本够多后改用本次的实测值
+        if len(self.durations) >= 3:
+            return median(self.durations)
+        return self.seed_seconds
+
+    def eta_seconds(self) -> float:
+        remaining = self.total - self.done
+        return remaining * self.per_date_seconds() / max(self.workers, 1)
+
+    def record(self, date_str: str, seconds: float, saved: int, ok: bool):
+        with self._lock:
+            self.done += 1
+            self.durations.append(seconds)
+            if ok:
+                self.saved += saved
+            else:
+                self.failed.append(date_str)
+            line = self.line()
+        logger.info(line)
+        log_event('backfill_progress', date=date_str, duration=seconds, done=self.done,
+                  total=self.total, eta=round(self.eta_seconds()))
+
+    def line(self) -> str:
+        percent = self.done / self.total * 100 if self.total else 100.0
+        return (f"[回填进度] {self.done}/{self.total} 天 ({percent:.1f}%)，新保存 {self.saved} 篇，"
+                f"每日期 {self.per_date_seconds():.0f}s，预计剩余 {_format_seconds(self.eta_seconds())}")
+
+
+def _worker(worker_id: int, shards: 'queue.Queue[MonthShard]', progress: BackfillProgress,
+            stop: threading.Event, crawler_kwargs: dict, limiter: RateLimiter, breaker: CircuitBreaker,
+            stats: Optional[StatsStore]):
+    kwargs = dict(crawler_kwargs)
+    # 并行的浏览器不能共用同一个配置目录
+    if kwargs.get('warm_start'):
+        base = kwargs.get('profile_dir') or './chrome_profile'
+        kwargs['profile_dir'] = f"{base}_{worker_id}"
+    crawler = BJNewsCrawler(rate_limiter=limiter, breaker=breaker, **kwargs)
+    # 各线程共用一个统计库连接（写入时加锁）
+    crawler.stats = stats
+    try:
+        crawler._init_driver(headless=True)
+        while not stop.is_set():
+            try:
+                shard = shards.get_nowait()
+            except queue.Empty:
+                break
+            logger.info(f"[线程{worker_id}] 开始月份 {shard.month}（{len(shard.dates)} 天）")
+            for position, date_str in enumerate(shard.dates):
+                if stop.is_set():
+                    # 没爬完的日期放回队列，结束时写入修复队列
+                    shards.put(MonthShard(shard.month, shard.dates[position:]))
+                    break
+                start = time.perf_counter()
+                try:
+                    saved = crawler.crawl_date_with_click(date_str)
+                    manifest = read_day_manifest(article_day_dir(crawler.output_dir, date_str)) or {}
+                    progress.record(date_str, time.perf_counter() - start, saved,
+                                    ok=manifest.get('status') in DONE_STATUSES)
+                except LayoutChangedError as e:
+                    # 页面改版时所有线程一起停止
+                    logger.error(f"{e}，停止回填，请更新选择器")
+                    progress.record(date_str, time.perf_counter() - start, 0, ok=False)
+                    stop.set()
+                except Exception as e:
+                    logger.error(f"[线程{worker_id}] 爬取日期 {date_str} 失败: {e}")
+                    progress.record(date_str, time.perf_counter() - start, 0, ok=False)
+                    # 浏览器可能已崩溃，重建后继续
+                    try:
+                        crawler._init_driver(headless=True)
+                    except Exception as e2:
+                        logger.error(f"[线程{worker_id}] 重建浏览器失败，线程退出: {e2}")
+                        shards.put(MonthShard(shard.month, shard.dates[position + 1:]))
+                        return
+    finally:
+        crawler._finish_run()
+        crawler.launcher.release(crawler.driver)
+        crawler.driver = None
+        crawler.launcher.stop()
+
+
+def run_backfill(start_date: str, end_date: str, output_dir: str, workers: int = 2, rate: float = 0.5,
+                 skip_weekends: bool = True, resume: bool = True, **crawler_kwargs) -> Dict:
+    """多年回填：按月分片，多个浏览器并行，共用一个全局限速器"""
+    shards = plan_shards(start_date, end_date, output_dir, skip_weekends, resume)
+    total_dates = sum(len(s.dates) for s in shards)
+    workers = max(1, min(workers, len(shards) or 1))
+    progress = BackfillProgress(total_dates, workers, measured_date_cost())
+
+    logger.info(f"\n{'#' * 60}")
+    logger.info(f"回填 {start_date} 至 {end_date}: {len(shards)} 个月份分片，{total_dates} 个日期待爬")
+    logger.info(f"并行 {workers} 个浏览器，全局限速 {rate:g} 次/秒，"
+                f"预计耗时 {_format_seconds(progress.eta_seconds())}")
+    logger.info(f"{'#' * 60}\n")
+    if not shards:
+        return {'dates': 0, 'done': 0, 'saved': 0, 'failed': [], 'seconds': 0.0}
+
+    pending: 'queue.Queue[MonthShard]' = queue.Queue()
+    for shard in shards:
+        pending.put(shard)
+    limiter = RateLimiter(rate, burst=workers)
+    # 各线程访问同一网站，被封禁时一起暂停
+    breaker = CircuitBreaker()
+    stats_db = crawler_kwargs.pop('stats_db', None)
+    stats = StatsStore(stats_db) if stats_db else None
+    stop = threading.Event()
+    threads = [threading.Thread(target=_worker, name=f'backfill-{i}',
+                                args=(i, pending, progress, stop, dict(crawler_kwargs, output_dir=output_dir),
+                                      limiter, breaker, stats))
+               for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        logger.info("用户中断，等待当前日期完成后停止")
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    # 失败和没来得及爬的日期写入修复队列
+    remaining = []
+    while not pending.empty():
+        remaining.extend(pending.get_nowait().dates)
+    units = [{'date': d, 'edition': None, 'reasons': ['回填失败']} for d in progress.failed]
+    units += [{'date': d, 'edition': None, 'reasons': ['回填未完成']} for d in remaining]
+    if units:
+        merge_repair_queue(units)
+
+    elapsed = time.time() - progress.started
+    logger.info(f"\n{'#' * 60}")
+    logger.info(f"回填完成统计:")
+    logger.info(f"  - 完成日期: {progress.done}/{total_dates}，失败 {len(progress.failed)}")
+    logger.info(f"  - 新保存文章数: {progress.saved}")
+    logger.info(f"  - 总耗时: {_format_seconds(elapsed)}，每日期 {progress.per_date_seconds():.0f}s")
+    logger.info(f"  - {limiter.summary()}")
+    if units:
+        logger.info(f"  - 失败/未完成的 {len(units)} 个日期已写入 {REPAIR_QUEUE_FILE}")
+    logger.info(f"{'#' * 60}\n")
+    return {'dates': total_dates, 'done': progress.done, 'saved': progress.saved,
+            'failed': progress.failed, 'seconds': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新京报多年历史回填')
+    parser.add_argument('output_dir', help='归档根目录')
+    parser.add_argument('--start-year', type=int, required=True)
+    parser.add_argument('--end-year', type=int, default=None, help='默认与起始年份相同')
+    parser.add_argument('--start', help='起始日期 YYYYMMDD（覆盖 --start-year）')
+    parser.add_argument('--end', help='结束日期 YYYYMMDD（覆盖 --end-year）')
+    parser.add_argument('--workers', type=int, default=2, help='并行浏览器数')
+    parser.add_argument('--rate', type=float, default=0.5, help='全局限速：所有浏览器合计每秒页面请求数')
+    parser.add_argument('--include-weekends', action='store_true')
+    parser.add_argument('--no-resume', action='store_true', help='清单状态为ok的日期也重新检查')
+    parser.add_argument('--plan', action='store_true', help='只输出分片与耗时估计，不爬取')
+    parser.add_argument('--warm-start', action='store_true')
+    parser.add_argument('--profile-dir', default=None)
+    parser.add_argument('--browser-cache', default=DEFAULT_CACHE_ROOT, metavar='DIR',
+                        help='各浏览器共用的磁盘缓存目录（每个浏览器占用其中一个工作槽）')
+    parser.add_argument('--no-browser-cache', action='store_true')
+    parser.add_argument('--edition-budget', type=float, default=None, metavar='MINUTES',
+                        help='单个版面的时间预算（分钟），超时的版面记入修复队列；默认不限')
+    parser.add_argument('--date-budget', type=float, default=None, metavar='MINUTES',
+                        help='单个日期的时间预算（分钟），超时后剩余版面记入修复队列；默认不限')
+    args = parser.parse_args()
+
+    end_year = args.end_year or args.start_year
+    start_date = args.start or f"{args.start_year}0101"
+    end_date = args.end or min(f"{end_year}1231", datetime.now().strftime("%Y%m%d"))
+
+    if args.plan:
+        shards = plan_shards(start_date, end_date, args.output_dir,
+                             not args.include_weekends, not args.no_resume)
+        total = sum(len(s.dates) for s in shards)
+        cost = measured_date_cost()
+        workers = max(1, min(args.workers, len(shards) or 1))
+        print(f"{len(shards)} 个月份分片，{total} 个日期待爬，每日期约 {cost:.0f}s，"
+              f"{workers} 个浏览器并行预计 {_format_seconds(total * cost / workers)}")
+        for shard in shards:
+            print(f"  {shard.month}: {len(shard.dates)} 天")
+        return 0
+
+    run_backfill(start_date, end_date, args.output_dir, workers=args.workers, rate=args.rate,
+                 skip_weekends=not args.include_weekends, resume=not args.no_resume,
+                 warm_start=args.warm_start, profile_dir=args.profile_dir,
+                 browser_cache=None if args.no_browser_cache else args.browser_cache,
+                 stats_db=STATS_DB_FILE,
+                 edition_budget=args.edition_budget * 60 if args.edition_budget else None,
+                 date_budget=args.date_budget * 60 if args.date_budget else None)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
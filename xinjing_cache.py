@@ -0,0 +1,319 @@
+import os
+import time
+import shutil
+import logging
+import threading
+from typing import Dict, Optional
+
+try:
+    import psutil
+except ImportError:  # 可选依赖：pip install psutil（没有时按锁文件的年龄判断是否失效）
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# 共享浏览器缓存默认位置（与日志同级）
+DEFAULT_CACHE_ROOT = os.path.abspath('./chrome_cache')
+DEFAULT_CACHE_LIMIT = 512 * 1024 * 1024
+
+# 读取当前页面的资源计时，读完清空，下次只统计新加载的资源
+_RESOURCE_TIMING_JS = '''
+    const entries = performance.getEntriesByType('navigation').concat(
+        performance.getEntriesByType('resource'));
+    const sizes = entries.map(e => [e.entryType, e.transferSize, e.encodedBodySize, e.decodedBodySize]);
+    performance.clearResourceTimings();
+    return [performance.timeOrigin, sizes];
+'''
+
+
+def _pid_alive(pid: int) -> bool:
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if os.name == 'nt':
+        # Windows 下没有 psutil 时无法安全探测进程，只按锁的年龄判断（槽锁不会自动接管）
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class FileLock:
+    """跨进程的锁文件（O_EXCL 创建），内容为持有者进程号
+
+    持有者进程已退出或锁文件超过 stale 秒时视为失效并接管；stale 为 None 时只看持有者进程。
+    """
+
+    def __init__(self, path: str, stale: Optional[float] = 600.0):
+        self.path = path
+        self.stale = stale
+        self.held = False
+
+    def _is_stale(self) -> bool:
+        try:
+            with open(self.path, 'r') as f:
+                pid = int(f.read().strip() or 0)
+            age = time.time() - os.path.getmtime(self.path)
+        except (OSError, ValueError):
+            return True
+        if not pid:
+            # 刚创建、进程号还没写入的锁文件不算失效
+            return age > 5
+        if not _pid_alive(pid):
+            return True
+        return self.stale is not None and age > self.stale
+
+    def try_acquire(self) -> bool:
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not self._is_stale():
+                return False
+            try:
+                os.remove(self.path)
+            except OSError:
+                return False
+            return self.try_acquire()
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        self.held = True
+        return True
+
+    def acquire(self, timeout: float = 60.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.2)
+        return True
+
+    def release(self):
+        if self.held:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.held = False
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f"等待锁超时: {self.path}")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class BrowserCache:
+    """所有浏览器、所有运行共用的磁盘缓存
+
+    Chrome 的磁盘缓存不能被两个浏览器同时打开，因此：
+      root/seed/cache      共享的种子缓存（只在持有 root/seed.lock 时读写）
+      root/slots/N/cache   工作槽，每个浏览器独占一个（root/slots/N.lock 记录持有进程）
+    取槽时若种子比槽里的副本新，复制种子到槽里；归还时若槽里的缓存比种子大，替换种子，
+    后来的浏览器和下一次运行就从更全的缓存开始。每个缓存的大小由 --disk-cache-size 限制，
+    根目录超出 limit * (max_slots + 1) 时删除空闲的工作槽。
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_ROOT, limit: int = DEFAULT_CACHE_LIMIT,
+                 max_slots: int = 8):
+        self.root = os.path.abspath(root)
+        self.limit = limit
+        self.max_slots = max(1, max_slots)
+        self.seed_dir = os.path.join(self.root, 'seed')
+        self.slots_dir = os.path.join(self.root, 'slots')
+        os.makedirs(self.slots_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _seed_lock(self) -> FileLock:
+        return FileLock(os.path.join(self.root, 'seed.lock'))
+
+    def _slot_lock(self, index: int) -> FileLock:
+        # 槽锁由浏览器整个生命周期持有（回填可能连续运行几天），不按年龄失效，只在持有进程退出后接管
+        return FileLock(os.path.join(self.slots_dir, f'{index}.lock'), stale=None)
+
+    @staticmethod
+    def _read_generation(path: str) -> int:
+        try:
+            with open(os.path.join(path, 'generation'), 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    @staticmethod
+    def _write_generation(path: str, generation: int):
+        with open(os.path.join(path, 'generation'), 'w') as f:
+            f.write(str(generation))
+
+    def checkout(self) -> Optional['CacheSlot']:
+        """占用一个空闲工作槽并同步种子缓存；槽都被占用时返回None（浏览器不用共享缓存）"""
+        with self._lock:
+            for index in range(self.max_slots):
+                lock = self._slot_lock(index)
+                if lock.try_acquire():
+                    break
+            else:
+                logger.warning(f"浏览器缓存的 {self.max_slots} 个工作槽都在使用，本浏览器不使用共享缓存")
+                return None
+        slot = CacheSlot(self, index, lock)
+        try:
+            with self._seed_lock():
+                self._sync_from_seed(slot)
+        except TimeoutError as e:
+            logger.warning(f"{e}，工作槽 {index} 沿用已有缓存")
+        self._prune(keep=slot.path)
+        return slot
+
+    def _sync_from_seed(self, slot: 'CacheSlot'):
+        seed_cache = os.path.join(self.seed_dir, 'cache')
+        seed_generation = self._read_generation(self.seed_dir)
+        os.makedirs(slot.path, exist_ok=True)
+        if not os.path.isdir(seed_cache) or self._read_generation(slot.path) >= seed_generation:
+            return
+        start = time.perf_counter()
+        shutil.rmtree(slot.cache_dir, ignore_errors=True)
+        shutil.copytree(seed_cache, slot.cache_dir)
+        self._write_generation(slot.path, seed_generation)
+        logger.info(f"工作槽 {slot.index} 已从共享缓存复制（第 {seed_generation} 版，"
+                    f"{_dir_size(slot.cache_dir) / 1024 / 1024:.1f} MB，{time.perf_counter() - start:.1f}s）")
+
+    def checkin(self, slot: 'CacheSlot'):
+        """浏览器退出后归还工作槽，槽里的缓存更全时替换种子"""
+        try:
+            if os.path.isdir(slot.cache_dir):
+                with self._seed_lock():
+                    self._publish(slot)
+        except (OSError, TimeoutError) as e:
+            logger.warning(f"工作槽 {slot.index} 的缓存未能写回共享缓存: {e}")
+        finally:
+            slot.lock.release()
+
+    def _publish(self, slot: 'CacheSlot'):
+        seed_cache = os.path.join(self.seed_dir, 'cache')
+        size = _dir_size(slot.cache_dir)
+        if os.path.isdir(seed_cache) and size <= _dir_size(seed_cache):
+            return
+        # 先复制到临时目录再换名，复制中途失败不会损坏种子
+        os.makedirs(self.seed_dir, exist_ok=True)
+        staging = os.path.join(self.seed_dir, f'cache.{os.getpid()}.tmp')
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(slot.cache_dir, staging)
+        old = os.path.join(self.seed_dir, 'cache.old')
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.isdir(seed_cache):
+            os.replace(seed_cache, old)
+        os.replace(staging, seed_cache)
+        shutil.rmtree(old, ignore_errors=True)
+        generation = self._read_generation(self.seed_dir) + 1
+        self._write_generation(self.seed_dir, generation)
+        self._write_generation(slot.path, generation)
+        logger.info(f"工作槽 {slot.index} 的缓存已写回共享缓存（第 {generation} 版，{size / 1024 / 1024:.1f} MB）")
+
+    def _prune(self, keep: str):
+        # 根目录超出上限时删除空闲的工作槽（下次使用时重新从种子复制）
+        budget = self.limit * (self.max_slots + 1)
+        if _dir_size(self.root) <= budget:
+            return
+        for index in range(self.max_slots):
+            path = os.path.join(self.slots_dir, str(index))
+            if path == keep or not os.path.isdir(path):
+                continue
+            lock = self._slot_lock(index)
+            if not lock.try_acquire():
+                continue
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+                logger.info(f"浏览器缓存超出上限，已删除空闲工作槽 {index}")
+            finally:
+                lock.release()
+            if _dir_size(self.root) <= budget:
+                return
+
+
+class CacheSlot:
+    def __init__(self, cache: BrowserCache, index: int, lock: FileLock):
+        self.cache = cache
+        self.index = index
+        self.lock = lock
+        self.path = os.path.join(cache.slots_dir, str(index))
+        self.cache_dir = os.path.join(self.path, 'cache')
+
+    def apply_options(self, options):
+        options.add_argument(f'--disk-cache-dir={self.cache_dir}')
+        options.add_argument(f'--disk-cache-size={self.cache.limit}')
+        return options
+
+
+class CacheMeter:
+    """按资源计时统计浏览器缓存命中率与节省的字节数
+
+    transferSize 为0且有正文的资源来自缓存；传输量小于正文的是304重新验证；
+    跨域且未开放计时的资源正文大小为0，无法判断，不计入。
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.bytes_saved = 0
+        self.bytes_downloaded = 0
+        self._origins = set()
+        self._lock = threading.Lock()
+
+    def sample(self, driver):
+        """统计当前页面新加载的资源，出错时忽略（页面可能正在跳转）"""
+        try:
+            origin, sizes = driver.execute_script(_RESOURCE_TIMING_JS)
+        except Exception as e:
+            logger.debug("读取资源计时失败: %s", e)
+            return
+        with self._lock:
+            new_document = origin not in self._origins
+            if new_document:
+                if len(self._origins) > 1000:
+                    self._origins.clear()
+                self._origins.add(origin)
+            for entry_type, transfer, encoded, decoded in sizes:
+                if entry_type == 'navigation' and not new_document:
+                    continue
+                if not decoded:
+                    continue
+                self.requests += 1
+                if transfer == 0:
+                    self.hits += 1
+                    self.bytes_saved += encoded
+                elif transfer < encoded:
+                    self.revalidated += 1
+                    self.bytes_saved += encoded - transfer
+                    self.bytes_downloaded += transfer
+                else:
+                    self.bytes_downloaded += transfer
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'requests': self.requests, 'hits': self.hits, 'revalidated': self.revalidated,
+                    'hit_rate': round((self.hits + self.revalidated) / self.requests, 3) if self.requests else 0.0,
+                    'bytes_saved': self.bytes_saved, 'bytes_downloaded': self.bytes_downloaded}
+
+    def summary(self) -> str:
+        stats = self.stats()
+        if not stats['requests']:
+            return "浏览器缓存: 无资源计时数据"
+        return (f"浏览器缓存: {stats['requests']} 个资源，命中 {stats['hits']}，304 {stats['revalidated']}，"
+                f"命中率 {stats['hit_rate']:.0%}，节省 {stats['bytes_saved'] / 1024 / 1024:.1f} MB，"
+                f"下载 {stats['bytes_downloaded'] / 1024 / 1024:.1f} MB")
+
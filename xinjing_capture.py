@@ -0,0 +1,170 @@
+import json
+import time
+import base64
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # 可选依赖：pip install beautifulsoup4
+    BeautifulSoup = None
+
+from xinjing_driver import execute_cdp
+from xinjing_text import clean_title, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# 在Python里解析响应HTML用的CSS选择器（与选择器注册表里的CSS备选一致，按顺序尝试）
+ARTICLE_BODY_SELECTORS = ('#ozoom', '.article-detail .article-text', '.article-detail .content')
+ARTICLE_TITLE_SELECTORS = ('.article-detail .title-box', '.title-box')
+ARTICLE_LIST_SELECTORS = ('.article-content ul', '.news-list ul')
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+# 只需要文档与接口数据，图片/样式等响应不记录
+CAPTURED_TYPES = {'Document', 'XHR', 'Fetch'}
+
+
+def _require_bs4():
+    if BeautifulSoup is None:
+        raise RuntimeError("网络抓取模式需要 beautifulsoup4，请先执行: pip install beautifulsoup4")
+
+
+@dataclass
+class CapturedResponse:
+    url: str
+    status: int
+    mime_type: str
+    body: str
+    resource_type: str = 'Document'
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+
+def parse_article_html(html: str) -> Optional[Dict[str, str]]:
+    """从文章页HTML中取标题与正文，结构不符时返回None"""
+    _require_bs4()
+    soup = BeautifulSoup(html, 'html.parser')
+    body = next((node for node in (soup.select_one(s) for s in ARTICLE_BODY_SELECTORS) if node), None)
+    if body is None:
+        return None
+    content = normalize_text('\n'.join(p.get_text() for p in body.find_all('p')))
+    if not content:
+        return None
+    title = '无标题'
+    title_box = next((node for node in (soup.select_one(s) for s in ARTICLE_TITLE_SELECTORS) if node), None)
+    if title_box is not None:
+        titles = [h.get_text(' ', strip=True) for h in title_box.find_all(HEADING_TAGS)]
+        titles = [t for t in titles if t]
+        if titles:
+            title = clean_title(' '.join(titles))
+    return {'title': title, 'content': content}
+
+
+def parse_edition_html(html: str, base_url: str) -> List[Dict]:
+    """从版面页HTML中取文章列表，返回 [{'index', 'title', 'url', 'content_id'}]"""
+    _require_bs4()
+    soup = BeautifulSoup(html, 'html.parser')
+    article_ul = next((node for node in (soup.select_one(s) for s in ARTICLE_LIST_SELECTORS) if node), None)
+    if article_ul is None:
+        return []
+    articles = []
+    for idx, item in enumerate(article_ul.find_all('li'), 1):
+        link = item.find('a')
+        if link is None:
+            continue
+        title = clean_title(link.decode_contents())
+        if title:
+            articles.append({'index': idx, 'title': title, 'url': urljoin(base_url, link.get('href', '')),
+                             'content_id': link.get('data-id', '')})
+    return articles
+
+
+class NetworkCapture:
+    """通过 Chrome 性能日志接收 Network 域事件，按请求取回响应体
+
+    需要在创建会话时设置 goog:loggingPrefs = {'performance': 'ALL'}（见 enable_performance_log）。
+    """
+
+    def __init__(self, driver, poll_interval: float = 0.05):
+        self.driver = driver
+        self.poll_interval = poll_interval
+        # {requestId: {'url', 'status', 'mime', 'type', 'finished', 'failed'}}
+        self._requests: Dict[str, Dict] = {}
+        self.stats = {'responses': 0, 'bytes': 0, 'timeouts': 0, 'wait_seconds': 0.0}
+
+    @staticmethod
+    def enable_performance_log(options):
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        return options
+
+    def enable(self):
+        execute_cdp(self.driver, 'Network.enable', {})
+
+    def _drain(self):
+        # 读取并清空性能日志，更新请求状态
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method', '')
+            params = message.get('params', {})
+            request_id = params.get('requestId')
+            if method == 'Network.responseReceived' and params.get('type') in CAPTURED_TYPES:
+                response = params.get('response', {})
+                self._requests[request_id] = {
+                    'url': response.get('url', ''), 'status': int(response.get('status', 0)),
+                    'mime': response.get('mimeType', ''), 'type': params.get('type'),
+                    'finished': False, 'failed': False,
+                }
+            elif method == 'Network.loadingFinished' and request_id in self._requests:
+                self._requests[request_id]['finished'] = True
+            elif method == 'Network.loadingFailed' and request_id in self._requests:
+                self._requests[request_id]['failed'] = True
+
+    def mark(self):
+        """丢弃此前的事件，之后的等待只匹配新的响应（点击/跳转之前调用）"""
+        self._drain()
+        self._requests.clear()
+
+    def _body(self, request_id: str) -> str:
+        result = execute_cdp(self.driver, 'Network.getResponseBody', {'requestId': request_id}) or {}
+        body = result.get('body', '')
+        if result.get('base64Encoded'):
+            body = base64.b64decode(body).decode('utf-8', errors='replace')
+        return body
+
+    def wait_for_response(self, predicate: Callable[[Dict], bool] = None, timeout: float = 10,
+                          resource_type: str = 'Document') -> Optional[CapturedResponse]:
+        """等待第一个加载完成且满足条件的响应，超时返回None"""
+        start = time.perf_counter()
+        deadline = start + timeout
+        while True:
+            self._drain()
+            for request_id, info in list(self._requests.items()):
+                if info['type'] != resource_type or not (info['finished'] or info['failed']):
+                    continue
+                if predicate and not predicate(info):
+                    continue
+                del self._requests[request_id]
+                if info['failed']:
+                    return CapturedResponse(info['url'], 0, info['mime'], '', info['type'])
+                body = self._body(request_id)
+                self.stats['responses'] += 1
+                self.stats['bytes'] += len(body)
+                self.stats['wait_seconds'] += time.perf_counter() - start
+                return CapturedResponse(info['url'], info['status'], info['mime'], body, info['type'])
+            if time.perf_counter() >= deadline:
+                self.stats['timeouts'] += 1
+                return None
+            time.sleep(self.poll_interval)
+
+    def summary(self) -> str:
+        responses = self.stats['responses']
+        avg_wait = self.stats['wait_seconds'] / responses if responses else 0.0
+        return (f"网络抓取: 取回 {responses} 个响应，{self.stats['bytes'] / 1024:.0f} KB，"
+                f"平均等待 {avg_wait:.2f}s，超时 {self.stats['timeouts']} 次")
@@ -0,0 +1,272 @@
+import os
+import time
+import shutil
+import logging
+import threading
+from typing import List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+try:
+    import psutil
+except ImportError:  # 可选依赖：pip install psutil（Linux 下没有时读取 /proc）
+    psutil = None
+
+from xinjing_cache import BrowserCache, CacheSlot
+from xinjing_logging import log_event
+
+logger = logging.getLogger(__name__)
+
+# 持久化浏览器配置目录默认位置（与日志同级）
+DEFAULT_PROFILE_DIR = os.path.abspath('./chrome_profile')
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+
+
+def execute_cdp(driver, cmd: str, params: dict = None):
+    # 兼容 webdriver.Chrome 与连接到长驻服务的 webdriver.Remote
+    if hasattr(driver, 'execute_cdp_cmd'):
+        return driver.execute_cdp_cmd(cmd, params or {})
+    return driver.execute('executeCdpCommand', {'cmd': cmd, 'params': params or {}})['value']
+
+
+def _resolve_driver_path(options: Options) -> Optional[str]:
+    # 先交给 Selenium Manager 查找 chromedriver，失败时再查 PATH
+    try:
+        from selenium.webdriver.common.driver_finder import DriverFinder
+        try:
+            return DriverFinder(Service(), options).get_driver_path()
+        except TypeError:
+            return DriverFinder.get_path(Service(), options)
+    except Exception as e:
+        logger.debug("Selenium Manager 未找到 chromedriver: %s", e)
+    return shutil.which('chromedriver')
+
+
+class ChromeLauncher:
+    """WebDriver 启动器
+
+    普通模式：每次都新建 chromedriver + Chrome（原有行为）。
+    热启动模式：chromedriver 服务只启动一次，后续会话复用；Chrome 使用持久化的
+    user-data-dir 与磁盘缓存，静态资源不必每次冷下载。
+    附加模式：通过远程调试端口连接已经在运行的 Chrome（chrome --remote-debugging-port=9222）。
+    给出 browser_cache 时磁盘缓存改用共享缓存的一个工作槽，多个浏览器和多次运行共用下载过的静态资源。
+    """
+
+    def __init__(self, warm_start: bool = False, profile_dir: str = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE, debugger_address: str = None,
+                 driver_path: str = None, browser_cache: Optional[BrowserCache] = None):
+        self.warm_start = warm_start or bool(debugger_address)
+        self.profile_dir = os.path.abspath(profile_dir or DEFAULT_PROFILE_DIR) if warm_start else None
+        self.cache_size = cache_size
+        self.debugger_address = debugger_address
+        self.driver_path = driver_path
+        self.browser_cache = browser_cache
+        self.cache_slot: Optional[CacheSlot] = None
+        self.service: Optional[Service] = None
+        self.startup_times: List[float] = []
+        self._lock = threading.Lock()
+
+    @property
+    def attached(self) -> bool:
+        return bool(self.debugger_address)
+
+    def apply_options(self, options: Options) -> Options:
+        # 给浏览器选项加上持久化配置目录/磁盘缓存或远程调试地址
+        if self.attached:
+            options.add_experimental_option('debuggerAddress', self.debugger_address)
+            return options
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            options.add_argument(f'--user-data-dir={self.profile_dir}')
+        slot = self._claim_cache_slot()
+        if slot:
+            slot.apply_options(options)
+        elif self.profile_dir:
+            options.add_argument(f'--disk-cache-dir={os.path.join(self.profile_dir, "cache")}')
+            options.add_argument(f'--disk-cache-size={self.cache_size}')
+        return options
+
+    def _claim_cache_slot(self) -> Optional[CacheSlot]:
+        # 工作槽在第一次启动浏览器时占用，重启浏览器沿用同一个槽，stop() 时归还
+        if self.browser_cache and self.cache_slot is None:
+            self.cache_slot = self.browser_cache.checkout()
+        return self.cache_slot
+
+    def _ensure_service(self, options: Options) -> Service:
+        with self._lock:
+            if self.service is None or not self.service.is_connectable():
+                path = self.driver_path or _resolve_driver_path(options)
+                self.service = Service(executable_path=path) if path else Service()
+                start = time.perf_counter()
+                self.service.start()
+                log_event('driver_service', duration=time.perf_counter() - start)
+                logger.info(f"chromedriver 服务已启动: {self.service.service_url}")
+            return self.service
+
+    def new_driver(self, options: Options):
+        """创建一个WebDriver会话，并记录启动耗时"""
+        start = time.perf_counter()
+        if self.warm_start:
+            from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+
+            service = self._ensure_service(options)
+            executor = ChromiumRemoteConnection(
+                remote_server_addr=service.service_url,
+                vendor_prefix='goog',
+                browser_name='chrome',
+            )
+            driver = webdriver.Remote(command_executor=executor, options=options)
+        else:
+            driver = webdriver.Chrome(options=options)
+
+        elapsed = time.perf_counter() - start
+        self.startup_times.append(elapsed)
+        mode = 'attach' if self.attached else ('warm' if self.warm_start else 'cold')
+        log_event('driver_start', duration=elapsed, mode=mode)
+        logger.info(f"WebDriver启动耗时 {elapsed:.2f}s ({mode})")
+        return driver
+
+    def release(self, driver):
+        # 附加模式下浏览器不是我们启动的，只断开会话
+        if driver is None:
+            return
+        if self.attached:
+            try:
+                driver.stop_client()
+            except Exception:
+                pass
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def stop(self):
+        if self.service is not None:
+            try:
+                self.service.stop()
+            except Exception:
+                pass
+            self.service = None
+        if self.cache_slot is not None:
+            self.browser_cache.checkin(self.cache_slot)
+            self.cache_slot = None
+
+    def startup_summary(self) -> str:
+        if not self.startup_times:
+            return "WebDriver未启动"
+        total = sum(self.startup_times)
+        return (f"WebDriver启动 {len(self.startup_times)} 次，"
+                f"首次 {self.startup_times[0]:.2f}s，平均 {total / len(self.startup_times):.2f}s，"
+                f"合计 {total:.1f}s")
+
+
+def driver_process_pid(driver, launcher: 'ChromeLauncher' = None) -> Optional[int]:
+    """chromedriver 进程号（Chrome 进程都是它的子进程）；附加模式下取不到"""
+    service = getattr(driver, 'service', None) or (launcher.service if launcher else None)
+    process = getattr(service, 'process', None)
+    return process.pid if process else None
+
+
+def _proc_children() -> dict:
+    # {父进程号: [子进程号]}，从 /proc/<pid>/stat 读取
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 进程名可能含空格和括号，从最后一个右括号之后解析
+        ppid = int(stat[stat.rfind(b')') + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def process_rss(pid: Optional[int] = None) -> Optional[int]:
+    """单个进程的常驻内存（字节），默认当前进程"""
+    pid = pid or os.getpid()
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_tree_rss(pid: Optional[int]) -> Optional[int]:
+    """进程及其全部子进程的常驻内存（字节），无法获取时返回None"""
+    if not pid:
+        return None
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            total = 0
+            for proc in [root] + root.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            return total
+        except psutil.NoSuchProcess:
+            return None
+    if not os.path.isdir('/proc'):
+        return None
+    children = _proc_children()
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f'/proc/{current}/statm', 'r') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+        stack.extend(children.get(current, []))
+    return total
+
+
+class RssSampler:
+    """后台线程定期采样一组进程树的内存，记录峰值与平均值"""
+
+    def __init__(self, pids_fn, interval: float = 0.5):
+        self.pids_fn = pids_fn
+        self.interval = interval
+        self.samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            sizes = [process_tree_rss(pid) for pid in self.pids_fn()]
+            sizes = [s for s in sizes if s]
+            if sizes:
+                self.samples.append(sum(sizes))
+            self._stop.wait(self.interval)
+
+    def start(self) -> 'RssSampler':
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    @property
+    def peak(self) -> int:
+        return max(self.samples) if self.samples else 0
+
+    @property
+    def mean(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
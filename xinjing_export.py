@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # 可选依赖：pip install pyarrow
+    pa = None
+
+from xinjing_archive import iter_article_files, read_article_file, parse_filename
+from xinjing_text import normalize_text
+
+MANIFEST_NAME = '_manifest.json'
+COLUMNS = ('date', 'edition', 'article_id', 'article_num', 'title', 'body', 'hash', 'source')
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("列式导出需要 pyarrow，请先执行: pip install pyarrow")
+
+
+def _schema():
+    return pa.schema([
+        ('date', pa.string()),
+        ('edition', pa.string()),
+        ('article_id', pa.string()),
+        ('article_num', pa.int32()),
+        ('title', pa.string()),
+        ('body', pa.string()),
+        ('hash', pa.string()),
+        ('source', pa.string()),
+    ])
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(normalize_text(body).encode('utf-8')).hexdigest()
+
+
+def _load_manifest(export_dir: str) -> Dict[str, List[int]]:
+    # {源文件相对路径: [大小, 修改时间ns]}
+    try:
+        with open(os.path.join(export_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(export_dir: str, manifest: Dict[str, List[int]]):
+    path = os.path.join(export_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def _read_row(archive_dir: str, rel_path: str) -> Optional[dict]:
+    record = read_article_file(os.path.join(archive_dir, rel_path))
+    if record is None:
+        return None
+    name_info = parse_filename(os.path.basename(rel_path)) or {}
+    date = record['date'] or name_info.get('date', '')
+    return {
+        'date': date,
+        'edition': record['edition'] or name_info.get('edition') or '',
+        'article_id': record['article_id'] or name_info.get('article_id') or '',
+        'article_num': int(name_info['num']) if name_info.get('num') else 0,
+        'title': record['title'],
+        'body': record['content'],
+        'hash': content_hash(record['content']),
+        'source': rel_path.replace(os.sep, '/'),
+    }
+
+
+def _month_of(rel_path: str) -> str:
+    return rel_path.replace(os.sep, '/').split('/', 1)[0]
+
+
+def export_archive(archive_dir: str, export_dir: str, workers: int = 8) -> dict:
+    """增量导出为按月分区的Parquet数据集
+
+    新文件只追加一个新的分片；某个月有文件被修改或删除时，只重写这个月的分区。
+    """
+    _require_pyarrow()
+    start = time.perf_counter()
+    os.makedirs(export_dir, exist_ok=True)
+    manifest = _load_manifest(export_dir)
+
+    current = {}
+    for path in iter_article_files(archive_dir):
+        stat = os.stat(path)
+        current[os.path.relpath(path, archive_dir)] = [stat.st_size, stat.st_mtime_ns]
+
+    # 有修改/删除的月份整月重建，其余月份只追加新文件
+    rebuild_months = {_month_of(p) for p, sig in manifest.items() if current.get(p) != sig}
+    to_export = [p for p, sig in current.items()
+                 if _month_of(p) in rebuild_months or p not in manifest]
+
+    for month in rebuild_months:
+        shutil.rmtree(os.path.join(export_dir, f"month={month}"), ignore_errors=True)
+        manifest = {p: sig for p, sig in manifest.items() if _month_of(p) != month}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        rows = [row for row in executor.map(lambda p: _read_row(archive_dir, p), to_export) if row]
+
+    by_month: Dict[str, List[dict]] = {}
+    for row in rows:
+        by_month.setdefault(_month_of(row['source']), []).append(row)
+
+    stamp = time.strftime('%Y%m%d%H%M%S')
+    for month, month_rows in by_month.items():
+        # 按日期、版面排序，行组统计信息才能用于谓词下推
+        month_rows.sort(key=lambda r: (r['date'], r['edition'], r['article_num'], r['article_id']))
+        table = pa.Table.from_pylist(month_rows, schema=_schema())
+        month_dir = os.path.join(export_dir, f"month={month}")
+        os.makedirs(month_dir, exist_ok=True)
+        pq.write_table(table, os.path.join(month_dir, f"part-{stamp}.parquet"),
+                       compression='zstd', row_group_size=2048)
+
+    for rel_path in to_export:
+        manifest[rel_path] = current[rel_path]
+    # 源文件已删除的条目不再保留
+    manifest = {p: sig for p, sig in manifest.items() if p in current}
+    _save_manifest(export_dir, manifest)
+
+    return {
+        'exported': len(rows),
+        'skipped': len(to_export) - len(rows),
+        'rebuilt_months': sorted(rebuild_months),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def load_archive(export_dir: str, columns: List[str] = None, start_date: str = None,
+                 end_date: str = None, editions: List[str] = None):
+    """读取导出的数据集，支持列裁剪和按日期/版面的谓词下推，返回 pyarrow.Table"""
+    _require_pyarrow()
+    # 显式给出表结构：早期导出的分片没有 article_id 列，读出为空值
+    schema = _schema().append(pa.field('month', pa.string()))
+    dataset = ds.dataset(export_dir, format='parquet', partitioning='hive', schema=schema,
+                         exclude_invalid_files=True)
+    condition = None
+
+    def _and(expr):
+        return expr if condition is None else condition & expr
+
+    # 月份分区先裁剪，再用行组统计过滤日期
+    if start_date:
+        condition = _and((ds.field('month') >= f"{start_date[:4]}-{start_date[4:6]}")
+                         & (ds.field('date') >= start_date))
+    if end_date:
+        condition = _and((ds.field('month') <= f"{end_date[:4]}-{end_date[4:6]}")
+                         & (ds.field('date') <= end_date))
+    if editions:
+        condition = _and(ds.field('edition').isin(list(editions)))
+
+    return dataset.to_table(columns=list(columns) if columns else None, filter=condition)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新京报归档列式导出')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = sub.add_parser('export', help='增量导出归档')
+    export_parser.add_argument('archive_dir')
+    export_parser.add_argument('export_dir')
+    export_parser.add_argument('--workers', type=int, default=8)
+
+    query_parser = sub.add_parser('query', help='按日期/版面读取导出数据')
+    query_parser.add_argument('export_dir')
+    query_parser.add_argument('--start', help='起始日期 YYYYMMDD')
+    query_parser.add_argument('--end', help='结束日期 YYYYMMDD')
+    query_parser.add_argument('--edition', action='append', help='版面，可重复')
+    query_parser.add_argument('--columns', default='date,edition,article_id,title',
+                              help=f"逗号分隔的列，可选: {','.join(COLUMNS)}")
+    query_parser.add_argument('--limit', type=int, default=20)
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        stats = export_archive(args.archive_dir, args.export_dir, args.workers)
+        print(f"导出 {stats['exported']} 篇（无法解析 {stats['skipped']} 篇），"
+              f"重建月份: {', '.join(stats['rebuilt_months']) or '无'}，耗时 {stats['seconds']:.2f}s")
+    else:
+        start = time.perf_counter()
+        table = load_archive(args.export_dir, args.columns.split(','), args.start, args.end, args.edition)
+        print(f"{table.num_rows} 行，读取耗时 {time.perf_counter() - start:.3f}s")
+        for row in table.slice(0, args.limit).to_pylist():
+            print(row)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
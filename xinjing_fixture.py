@@ -0,0 +1,389 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+from selenium.common.exceptions import InvalidSessionIdException
+
+from xinjing import BJNewsCrawler
+from xinjing_selectors import SelectorRegistry, LayoutChangedError
+from xinjing_sites import BJNewsAdapter
+from xinjing_tabs import run_tabs_engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FaultProfile:
+    """故障注入配置，各项为每次请求（或每条WebDriver命令）触发的概率"""
+    name: str = 'baseline'
+    latency_rate: float = 0.0
+    latency_seconds: float = 3.0
+    error_rate: float = 0.0       # 返回 503
+    block_rate: float = 0.0       # 返回反爬验证页
+    missing_rate: float = 0.0     # 页面缺少版面列表/文章列表/正文
+    crash_rate: float = 0.0       # WebDriver 会话崩溃（每条命令）
+    seed: int = 2025
+
+
+FAULT_PROFILES: Dict[str, FaultProfile] = {
+    'baseline': FaultProfile('baseline'),
+    'latency': FaultProfile('latency', latency_rate=0.2, latency_seconds=4.0),
+    '5xx': FaultProfile('5xx', error_rate=0.1),
+    'block': FaultProfile('block', block_rate=0.05),
+    'missing': FaultProfile('missing', missing_rate=0.1),
+    'crash': FaultProfile('crash', crash_rate=0.002),
+    'mixed': FaultProfile('mixed', latency_rate=0.05, error_rate=0.03, block_rate=0.02,
+                          missing_rate=0.03, crash_rate=0.001),
+}
+
+_PAGE = '<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title></head><body>{body}</body></html>'
+_BLOCK_PAGE = _PAGE.format(title='访问验证', body='<div class="verify">访问过于频繁，请完成验证后继续</div>')
+
+
+class FixtureSite:
+    """模拟电子版站点：首页日历（年/月下拉框）、版面页、文章页，地址规则与真实站点相同
+
+    页面结构对应选择器注册表里的CSS备选选择器，绝对XPath不会命中。
+    """
+
+    def __init__(self, dates: List[str], editions: int = 4, articles: int = 5, paragraphs: int = 6):
+        self.dates = sorted(dates)
+        self.editions = [f"A{i:02d}" for i in range(1, editions + 1)]
+        self.articles = articles
+        self.paragraphs = paragraphs
+
+    def article_ids(self, date_str: str, edition: str) -> List[str]:
+        base = 1000 + self.editions.index(edition) * 100
+        return [f"{date_str}_{edition}_{base + n}" for n in range(1, self.articles + 1)]
+
+    def expected_articles(self) -> int:
+        return len(self.dates) * len(self.editions) * self.articles
+
+    def edition_path(self, date_str: str, edition: str) -> str:
+        return f"/html/{date_str[:4]}/{date_str}/{date_str}_{edition}.html"
+
+    def article_path(self, article_id: str) -> str:
+        date_str, edition, _ = article_id.split('_')
+        return f"/html/{date_str[:4]}/{date_str}/{date_str}_{edition}/{article_id}.html"
+
+    def index_page(self, year: int, month: int, missing: bool = False) -> str:
+        years = sorted({int(d[:4]) for d in self.dates} | {year})
+        year_options = ''.join(f'<option value="{y}"{" selected" if y == year else ""}>{y}</option>' for y in years)
+        month_options = ''.join(f'<option value="{m}"{" selected" if m == month else ""}>{m}</option>'
+                                for m in range(1, 13))
+        onchange = ("location.href='/?y='+document.querySelector('select.year').value"
+                    "+'&m='+document.querySelector('select.month').value")
+        days = []
+        for day in range(1, 32):
+            date_str = f"{year}{month:02d}{day:02d}"
+            if date_str in self.dates:
+                days.append(f'<div><span><a href="{self.edition_path(date_str, "A01")}">{day}</a></span></div>')
+            else:
+                days.append(f'<div><span>{day}</span></div>')
+        calendar = '' if missing else f'<div class="cal-dates clearfix">{"".join(days)}</div>'
+        body = (f'<div class="calendar"><div class="cal-head">'
+                f'<select class="year" onchange="{onchange}">{year_options}</select>'
+                f'<select class="month" onchange="{onchange}">{month_options}</select>'
+                f'</div>{calendar}</div>')
+        return _PAGE.format(title='新京报电子版', body=body)
+
+    def edition_page(self, date_str: str, edition: str, missing: bool = False) -> str:
+        nav = ''.join(f'<li><a href="{self.edition_path(date_str, code)}">{code}：第{i + 1}版</a></li>'
+                      for i, code in enumerate(self.editions))
+        items = ''.join(f'<li><a href="{self.article_path(aid)}">{date_str}{edition}文章{aid[-2:]}'
+                        f'<br>副题</a></li>' for aid in self.article_ids(date_str, edition))
+        articles = '' if missing else f'<div class="news-list"><ul>{items}</ul></div>'
+        body = f'<div class="nav-list"><ul>{nav}</ul></div>{articles}'
+        return _PAGE.format(title=f'{date_str} {edition}', body=body)
+
+    def article_page(self, article_id: str, missing: bool = False) -> str:
+        date_str, edition, num = article_id.split('_')
+        paragraphs = ''.join(f'<p>{date_str}{edition}文章{num[-2:]}第{i}段正文，用于本地故障注入测试。</p>'
+                             for i in range(1, self.paragraphs + 1))
+        content = '' if missing else f'<div id="ozoom">{paragraphs}</div>'
+        body = (f'<div class="article-detail"><div class="title-box"><h1>{date_str}{edition}文章{num[-2:]}</h1>'
+                f'<h3>副题</h3></div>{content}</div>')
+        return _PAGE.format(title=article_id, body=body)
+
+    def resolve(self, path: str, query: Dict[str, List[str]], missing: bool) -> Optional[str]:
+        if path in ('', '/'):
+            latest = self.dates[-1]
+            year = int(query.get('y', [latest[:4]])[0])
+            month = int(query.get('m', [latest[4:6]])[0])
+            return self.index_page(year, month, missing)
+        parts = path.strip('/').split('/')
+        # /html/2025/20250901/20250901_A01.html
+        if len(parts) == 4 and parts[0] == 'html' and parts[3].endswith('.html'):
+            date_str, _, edition = parts[3][:-5].partition('_')
+            if date_str in self.dates and edition in self.editions:
+                return self.edition_page(date_str, edition, missing)
+        # /html/2025/20250901/20250901_A01/20250901_A01_1001.html
+        if len(parts) == 5 and parts[0] == 'html' and parts[4].endswith('.html'):
+            article_id = parts[4][:-5]
+            pieces = article_id.split('_')
+            if (len(pieces) == 3 and pieces[0] in self.dates and pieces[1] in self.editions
+                    and article_id in self.article_ids(pieces[0], pieces[1])):
+                return self.article_page(article_id, missing)
+        return None
+
+
+class FixtureServer:
+    """在后台线程里运行本地站点，并按 FaultProfile 注入服务端故障"""
+
+    def __init__(self, site: FixtureSite, profile: FaultProfile = None, host: str = '127.0.0.1', port: int = 0):
+        self.site = site
+        self.profile = profile or FaultProfile()
+        self._random = random.Random(self.profile.seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'latency': 0, 'error': 0, 'block': 0, 'missing': 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._count('requests')
+                profile = server.profile
+                if server._roll(profile.latency_rate):
+                    server._count('latency')
+                    time.sleep(profile.latency_seconds)
+                if self.path.startswith('/favicon'):
+                    return self._send(404, '')
+                if server._roll(profile.error_rate):
+                    server._count('error')
+                    return self._send(503, _PAGE.format(title='503', body='Service Unavailable'))
+                if server._roll(profile.block_rate):
+                    server._count('block')
+                    return self._send(200, _BLOCK_PAGE)
+                missing = server._roll(profile.missing_rate)
+                if missing:
+                    server._count('missing')
+                url = urlparse(self.path)
+                page = server.site.resolve(url.path, parse_qs(url.query), missing)
+                if page is None:
+                    return self._send(404, _PAGE.format(title='404', body='Not Found'))
+                self._send(200, page)
+
+            def _send(self, status: int, body: str):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FixtureServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FaultyDriver:
+    """WebDriver 代理：按概率让会话"崩溃"（关闭真实浏览器并抛出 InvalidSessionIdException）"""
+
+    _COMMANDS = {'get', 'back', 'refresh', 'find_element', 'find_elements', 'execute_script',
+                 'execute_cdp_cmd', 'get_cookies', 'switch_to', 'window_handles'}
+
+    def __init__(self, driver, crash_rate: float, seed: int = 2025):
+        self._driver = driver
+        self._crash_rate = crash_rate
+        self._random = random.Random(seed)
+        self.crashed = False
+        self.crashes = 0
+
+    def _maybe_crash(self):
+        if self.crashed:
+            raise InvalidSessionIdException('invalid session id（已注入崩溃）')
+        if self._crash_rate and self._random.random() < self._crash_rate:
+            self.crashed = True
+            self.crashes += 1
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            raise InvalidSessionIdException('invalid session id（注入崩溃）')
+
+    def __getattr__(self, name):
+        if name in self._COMMANDS:
+            self._maybe_crash()
+        return getattr(self._driver, name)
+
+    def quit(self):
+        if not self.crashed:
+            self._driver.quit()
+
+
+def fixture_crawler(base_url: str, output_dir: str, profile: FaultProfile, **kwargs) -> BJNewsCrawler:
+    """指向本地站点的爬虫实例；crash_rate > 0 时给每个新会话套上 FaultyDriver"""
+    # 统计库写在临时输出目录里，不碰正式的统计库
+    kwargs.setdefault('stats_db', os.path.join(output_dir, 'crawl_stats.db'))
+    crawler = BJNewsCrawler(output_dir=output_dir, **kwargs)
+    crawler.site = BJNewsAdapter(base_url)
+    # 不读写正式的选择器命中记录
+    crawler.selectors = SelectorRegistry()
+    crawler.timeout = 5
+    if profile.crash_rate:
+        init_driver = crawler._init_driver
+        crashes = {'count': 0}
+
+        def _init_faulty_driver(headless: bool = True):
+            init_driver(headless)
+            crashes['count'] += 1
+            crawler.driver = FaultyDriver(crawler.driver, profile.crash_rate, profile.seed + crashes['count'])
+
+        crawler._init_driver = _init_faulty_driver
+    return crawler
+
+
+def run_click_engine(crawler: BJNewsCrawler, dates: List[str]) -> int:
+    """原有的逐版面点击流程"""
+    crawler._init_driver(headless=True)
+    saved = 0
+    for date_str in dates:
+        try:
+            saved += crawler.crawl_date_with_click(date_str)
+        except LayoutChangedError as e:
+            logger.error(f"{e}，跳过日期 {date_str}")
+            crawler.selectors = SelectorRegistry()
+        except Exception as e:
+            logger.error(f"爬取日期 {date_str} 失败: {e}")
+    return saved
+
+
+def run_capture_engine(crawler: BJNewsCrawler, dates: List[str]) -> int:
+    """点击流程 + 网络响应解析"""
+    crawler.capture_enabled = True
+    return run_click_engine(crawler, dates)
+
+
+# 可被测量的爬取引擎：engine(crawler, dates) -> 新保存文章数
+ENGINES: Dict[str, Callable[[BJNewsCrawler, List[str]], int]] = {
+    'click': run_click_engine,
+    'tabs': run_tabs_engine,
+    'capture': run_capture_engine,
+}
+
+
+def measure(site: FixtureSite, profile: FaultProfile, engine: str = 'click', **crawler_kwargs) -> Dict:
+    """在给定故障配置下跑一遍引擎，返回保存篇数、耗时与每小时文章数"""
+    server = FixtureServer(site, profile).start()
+    output_dir = tempfile.mkdtemp(prefix='bjnews_fixture_')
+    crawler = fixture_crawler(server.base_url, output_dir, profile, **crawler_kwargs)
+    start = time.perf_counter()
+    try:
+        saved = ENGINES[engine](crawler, site.dates)
+    finally:
+        elapsed = time.perf_counter() - start
+        crawler.launcher.release(crawler.driver)
+        crawler.driver = None
+        crawler.launcher.stop()
+        server.stop()
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return {
+        'engine': engine,
+        'profile': profile.name,
+        'saved': saved,
+        'expected': site.expected_articles(),
+        'seconds': elapsed,
+        'per_hour': saved / elapsed * 3600 if elapsed > 0 else 0.0,
+        'faults': dict(server.stats),
+    }
+
+
+def run_harness(profile_names: List[str], engines: List[str], dates: List[str], editions: int = 4,
+                articles: int = 5) -> List[Dict]:
+    """逐个故障配置测量各引擎，retained 为相对无故障基线保留的吞吐比例"""
+    site = FixtureSite(dates, editions, articles)
+    results = []
+    for engine in engines:
+        baseline = None
+        for name in ['baseline'] + [n for n in profile_names if n != 'baseline']:
+            result = measure(site, FAULT_PROFILES[name], engine)
+            if baseline is None:
+                baseline = result['per_hour']
+            result['retained'] = result['per_hour'] / baseline if baseline else 0.0
+            results.append(result)
+            logger.info(f"[故障测试] {engine}/{name}: {result['saved']}/{result['expected']} 篇，"
+                        f"{result['seconds']:.0f}s，{result['per_hour']:.0f} 篇/小时，"
+                        f"保留 {result['retained'] * 100:.0f}%，注入 {result['faults']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地站点故障注入测试：测量各故障下的吞吐保留比例')
+    parser.add_argument('--profiles', default=','.join(FAULT_PROFILES),
+                        help=f"逗号分隔，可选: {','.join(FAULT_PROFILES)}")
+    parser.add_argument('--engines', default='click', help=f"逗号分隔，可选: {','.join(ENGINES)}")
+    parser.add_argument('--dates', default='20250901,20250902', help='逗号分隔的模拟日期')
+    parser.add_argument('--editions', type=int, default=4)
+    parser.add_argument('--articles', type=int, default=5, help='每个版面的文章数')
+    parser.add_argument('--report', default=None, help='结果写入JSON文件')
+    parser.add_argument('--serve', action='store_true', help='只启动本地站点（无故障），便于手工调试')
+    args = parser.parse_args()
+
+    dates = [d.strip() for d in args.dates.split(',') if d.strip()]
+    if args.serve:
+        server = FixtureServer(FixtureSite(dates, args.editions, args.articles)).start()
+        print(f"本地站点: {server.base_url}（Ctrl+C 结束）")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+        return 0
+
+    results = run_harness(args.profiles.split(','), args.engines.split(','), dates,
+                          args.editions, args.articles)
+    print(f"\n{'引擎':<8}{'故障':<10}{'保存':>8}{'耗时(s)':>10}{'篇/小时':>10}{'保留':>8}")
+    for r in results:
+        print(f"{r['engine']:<8}{r['profile']:<10}{r['saved']:>4}/{r['expected']:<4}{r['seconds']:>9.0f}"
+              f"{r['per_hour']:>10.0f}{r['retained'] * 100:>7.0f}%")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'generated': datetime.now().isoformat(timespec='seconds'),
+                       'profiles': {n: asdict(FAULT_PROFILES[n]) for n in args.profiles.split(',')},
+                       'results': results}, f, ensure_ascii=False, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import threading
+from typing import Dict, Optional
+
+import urllib3
+
+# 与浏览器保持一致的UA
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+    'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept-Language': 'zh-CN,zh;q=0.9',
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(maxsize: int = 8) -> urllib3.PoolManager:
+    """进程内共享的HTTP连接池（线程安全，保持长连接）"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = urllib3.PoolManager(
+                num_pools=16,
+                maxsize=maxsize,
+                block=False,
+                headers=DEFAULT_HEADERS,
+                retries=urllib3.Retry(total=2, backoff_factor=0.5,
+                                      status_forcelist=(500, 502, 503, 504)),
+                timeout=urllib3.Timeout(connect=10, read=30),
+            )
+        return _pool
+
+
+def cookie_header(cookies) -> Optional[str]:
+    # 把 driver.get_cookies() 的结果转换为Cookie请求头
+    if not cookies:
+        return None
+    return '; '.join(f"{c['name']}={c['value']}" for c in cookies if 'name' in c)
+
+
+def build_headers(referer: str = None, cookies=None, extra: Dict[str, str] = None) -> Dict[str, str]:
+    headers = dict(DEFAULT_HEADERS)
+    if referer:
+        headers['Referer'] = referer
+    cookie = cookie_header(cookies)
+    if cookie:
+        headers['Cookie'] = cookie
+    if extra:
+        headers.update(extra)
+    return headers
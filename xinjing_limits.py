@@ -0,0 +1,140 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """令牌桶限速器，多个爬虫线程共用一个实例时即为全局礼貌预算
+
+    rate 为每秒允许的页面请求数，burst 为允许的瞬时突发数。
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.waited = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """取一个令牌，必要时阻塞等待；返回本次等待秒数"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.requests += 1
+                    self.waited += waited
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def summary(self) -> str:
+        return f"限速 {self.rate:g} 次/秒：共 {self.requests} 次请求，累计等待 {self.waited:.1f}s"
+
+
+class TimeBudget:
+    """时间预算：seconds 为 None 时不限；给出 parent 时剩余时间不超过上一级预算（运行 > 日期 > 版面）"""
+
+    def __init__(self, seconds: float = None, parent: 'TimeBudget' = None):
+        self.seconds = seconds
+        self.parent = parent
+        self.started = time.monotonic()
+
+    def remaining(self) -> float:
+        own = float('inf') if self.seconds is None else self.seconds - (time.monotonic() - self.started)
+        if self.parent is not None:
+            own = min(own, self.parent.remaining())
+        return own
+
+    @property
+    def exceeded(self) -> bool:
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """熔断器：连续 threshold 次封禁/超时信号后断开
+
+    断开后调用方暂停剩余工作，冷却 cooldown 秒后进入半开状态做一次探测：
+    探测成功则恢复，失败则冷却时间加倍（不超过 max_cooldown）后继续断开。
+    多个爬虫线程访问同一网站时可以共用一个实例。
+    """
+
+    def __init__(self, threshold: int = 4, cooldown: float = 120.0, max_cooldown: float = 1800.0):
+        self.threshold = max(1, threshold)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.last_reason = ''
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == 'open'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != 'closed':
+                logger.info("熔断器恢复：探测成功，继续爬取")
+            self.state = 'closed'
+            self.cooldown = self.base_cooldown
+
+    def record_failure(self, reason: str = '') -> bool:
+        """记录一次封禁/超时信号，本次导致断开时返回True"""
+        with self._lock:
+            self.failures += 1
+            self.last_reason = reason
+            if self.state == 'half_open':
+                # 探测失败：加倍冷却后继续断开
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+                return True
+            if self.state == 'closed' and self.failures >= self.threshold:
+                self._open()
+                return True
+            return False
+
+    def trip(self, reason: str = ''):
+        # 明确的封禁信号：不等连续失败计数，直接断开
+        with self._lock:
+            self.last_reason = reason
+            if self.state != 'open':
+                self._open()
+
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        logger.warning(f"熔断器断开：{self.last_reason}（连续失败 {self.failures} 次），"
+                       f"暂停 {self.cooldown:.0f}s 后探测")
+
+    def cooldown_remaining(self) -> float:
+        if self.state != 'open':
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def begin_probe(self):
+        with self._lock:
+            if self.state == 'open':
+                self.state = 'half_open'
+
+    def summary(self) -> str:
+        return f"熔断器: 断开 {self.trips} 次，当前状态 {self.state}"
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import logging.handlers
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+# 结构化事件专用logger，只写入JSON日志，不在控制台/文本日志中重复输出
+EVENT_LOGGER_NAME = 'bjnews.events'
+# 结构化字段，通过 extra= 传入
+EVENT_FIELDS = ('date', 'edition', 'phase', 'duration')
+
+RUN_ID = uuid.uuid4().hex[:12]
+
+_listener = None
+
+
+class SizeTimedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    # 按大小或时间（先到者）轮转的文件处理器，备份文件按序号编号
+
+    def __init__(self, filename: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 10,
+                 interval: int = 24 * 3600, encoding: str = 'utf-8'):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count,
+                         encoding=encoding, delay=True)
+        self.interval = interval
+        self.rollover_at = self._compute_rollover(time.time())
+
+    def _compute_rollover(self, now: float) -> float:
+        # 已存在的日志文件从其修改时间起算，保证重启后仍按时间轮转
+        if os.path.exists(self.baseFilename):
+            now = min(now, os.stat(self.baseFilename).st_mtime)
+        return now + self.interval
+
+    def shouldRollover(self, record) -> bool:
+        if time.time() >= self.rollover_at and os.path.exists(self.baseFilename):
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+class JsonLineFormatter(logging.Formatter):
+    # 每条记录输出一行JSON，便于跨运行分析
+
+    def format(self, record) -> str:
+        event = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'run_id': getattr(record, 'run_id', RUN_ID),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage().strip(),
+        }
+        for field in EVENT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                event[field] = value
+        fields = getattr(record, 'fields', None)
+        if fields:
+            event.update(fields)
+        if record.exc_info:
+            event['exc'] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False)
+
+
+class _ExcludeEvents(logging.Filter):
+    def filter(self, record) -> bool:
+        return record.name != EVENT_LOGGER_NAME
+
+
+def setup_logging(log_file: str = 'bjnews_crawler.log', json_file: Optional[str] = None,
+                  level: int = logging.INFO, max_bytes: int = 10 * 1024 * 1024,
+                  backup_count: int = 10, rotate_interval: int = 24 * 3600):
+    """配置异步日志：爬取线程只把记录放入队列，由后台监听线程写文件和控制台"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if json_file is None:
+        json_file = os.path.splitext(log_file)[0] + '.jsonl'
+
+    text_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    file_handler = SizeTimedRotatingFileHandler(log_file, max_bytes, backup_count, rotate_interval)
+    file_handler.setFormatter(text_formatter)
+    file_handler.addFilter(_ExcludeEvents())
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(text_formatter)
+    stream_handler.addFilter(_ExcludeEvents())
+
+    json_handler = SizeTimedRotatingFileHandler(json_file, max_bytes, backup_count, rotate_interval)
+    json_handler.setFormatter(JsonLineFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, json_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    # 刷新队列中剩余的日志并停止后台线程
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_event(phase: str, date: str = None, edition: str = None, duration: float = None,
+              level: int = logging.INFO, **fields):
+    """记录一条结构化事件（只写入JSON日志）"""
+    logger = logging.getLogger(EVENT_LOGGER_NAME)
+    if not logger.isEnabledFor(level):
+        return
+    extra = {'phase': phase, 'date': date, 'edition': edition, 'fields': fields}
+    if duration is not None:
+        extra['duration'] = round(duration, 3)
+    logger.log(level, phase, extra=extra)
+
+
+@contextmanager
+def timed_phase(phase: str, date: str = None, edition: str = None, **fields):
+    """计时一个阶段，结束时写出带耗时的结构化事件；可在with块内向返回的dict补充字段"""
+    extra = dict(fields)
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield extra
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        extra.setdefault('status', status)
+        log_event(phase, date=date, edition=edition,
+                  duration=time.perf_counter() - start, **extra)
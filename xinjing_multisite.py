@@ -0,0 +1,264 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional
+
+from xinjing import BJNewsCrawler
+from xinjing_archive import DONE_STATUSES, ArticleIndex, article_day_dir, read_day_manifest
+from xinjing_cache import DEFAULT_CACHE_ROOT
+from xinjing_limits import RateLimiter, CircuitBreaker
+from xinjing_scan import merge_repair_queue
+from xinjing_selectors import LayoutChangedError
+from xinjing_sites import SiteAdapter, get_site
+from xinjing_stats import StatsStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SiteProgress:
+    site: SiteAdapter
+    planned: int = 0
+    done: int = 0
+    saved: int = 0
+    failed: List[str] = field(default_factory=list)
+    stopped: bool = False
+
+
+class MultiSiteEngine:
+    """一个引擎同时爬取多份报纸
+
+    - 浏览器池：每个工作线程一个浏览器会话，各站点的爬虫实例共用该会话
+    - 每个站点一个限速器（对每个网站的礼貌预算不变），总吞吐随报纸数增长
+    - 每个站点一个共享的已归档索引，归档在 output_dir/站点名/ 下，统计库按站点分开
+    - 待爬单元按站点轮流排列，同一时刻各线程大多在访问不同的网站
+    """
+
+    def __init__(self, sites: List[SiteAdapter], output_dir: str, drivers: int = 2, rate: float = 0.5,
+                 headless: bool = True, record_stats: bool = False, **crawler_kwargs):
+        self.sites = {site.name: site for site in sites}
+        self.output_dir = output_dir
+        self.drivers = max(1, drivers)
+        self.headless = headless
+        self.crawler_kwargs = crawler_kwargs
+        self.limiters = {name: RateLimiter(rate) for name in self.sites}
+        # 熔断器也按站点共用：一个网站封禁时只暂停该站点
+        self.breakers = {name: CircuitBreaker() for name in self.sites}
+        self.progress = {name: SiteProgress(site) for name, site in self.sites.items()}
+        self._indexes: Dict[str, ArticleIndex] = {}
+        # record_stats 为 True 时每个站点一个统计库 crawl_stats_站点名.db，同一站点的线程共用连接
+        self.record_stats = record_stats
+        self._stats: Dict[str, StatsStore] = {}
+        self._units: Deque = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def site_dir(self, name: str) -> str:
+        return os.path.join(self.output_dir, name)
+
+    @staticmethod
+    def repair_queue_file(name: str) -> str:
+        return f'repair_queue_{name}.json'
+
+    def _index(self, name: str) -> ArticleIndex:
+        # 同一站点的所有线程共用一个索引，归档只扫描一遍
+        with self._lock:
+            if name not in self._indexes:
+                self._indexes[name] = ArticleIndex(self.site_dir(name)).load()
+            return self._indexes[name]
+
+    def _stats_store(self, name: str) -> Optional[StatsStore]:
+        if not self.record_stats:
+            return None
+        with self._lock:
+            if name not in self._stats:
+                self._stats[name] = StatsStore(f'crawl_stats_{name}.db')
+            return self._stats[name]
+
+    def plan(self, start_date: str, end_date: str, resume: bool = True) -> int:
+        """按各站点的出版日历生成 (站点, 日期) 单元，新日期在前，站点之间轮流排列"""
+        per_site: Dict[str, List[str]] = {}
+        current = datetime.strptime(end_date, "%Y%m%d")
+        start = datetime.strptime(start_date, "%Y%m%d")
+        while current >= start:
+            date_str = current.strftime("%Y%m%d")
+            current -= timedelta(days=1)
+            for name, site in self.sites.items():
+                if site.off_day(date_str):
+                    continue
+                if resume:
+                    manifest = read_day_manifest(article_day_dir(self.site_dir(name), date_str))
+                    if manifest and manifest.get('status') in DONE_STATUSES:
+                        continue
+                per_site.setdefault(name, []).append(date_str)
+        queues = {name: deque(dates) for name, dates in per_site.items()}
+        for name, dates in per_site.items():
+            self.progress[name].planned = len(dates)
+        while any(queues.values()):
+            for name, dates in queues.items():
+                if dates:
+                    self._units.append((name, dates.popleft()))
+        return len(self._units)
+
+    def _next_unit(self) -> Optional[tuple]:
+        with self._lock:
+            while self._units:
+                name, date_str = self._units.popleft()
+                if not self.progress[name].stopped:
+                    return name, date_str
+            return None
+
+    def _new_crawler(self, worker_id: int, name: str, owner: Optional[BJNewsCrawler]) -> BJNewsCrawler:
+        kwargs = dict(self.crawler_kwargs)
+        # 并行的浏览器不能共用同一个配置目录
+        if kwargs.get('warm_start'):
+            kwargs['profile_dir'] = f"{kwargs.get('profile_dir') or './chrome_profile'}_{worker_id}"
+        crawler = BJNewsCrawler(output_dir=self.site_dir(name), site=self.sites[name],
+                                rate_limiter=self.limiters[name], breaker=self.breakers[name], **kwargs)
+        crawler._article_index = self._index(name)
+        crawler.stats = self._stats_store(name)
+        crawler.repair_queue_file = self.repair_queue_file(name)
+        if owner is None:
+            crawler._init_driver(headless=self.headless)
+        else:
+            crawler.share_driver(owner)
+        return crawler
+
+    def _record(self, name: str, date_str: str, saved: int, ok: bool):
+        with self._lock:
+            progress = self.progress[name]
+            progress.done += 1
+            progress.saved += saved
+            if not ok:
+                progress.failed.append(date_str)
+
+    def _worker(self, worker_id: int):
+        crawlers: Dict[str, BJNewsCrawler] = {}
+        owner: Optional[BJNewsCrawler] = None
+        try:
+            while not self._stop.is_set():
+                unit = self._next_unit()
+                if unit is None:
+                    break
+                name, date_str = unit
+                try:
+                    if name not in crawlers:
+                        crawlers[name] = self._new_crawler(worker_id, name, owner)
+                        owner = owner or crawlers[name]
+                    crawler = crawlers[name]
+                    saved = crawler.crawl_date_with_click(date_str)
+                    manifest = read_day_manifest(article_day_dir(crawler.output_dir, date_str)) or {}
+                    self._record(name, date_str, saved, manifest.get('status') in DONE_STATUSES)
+                except LayoutChangedError as e:
+                    # 只停止改版的站点，其他站点继续
+                    logger.error(f"[{self.sites[name].display_name}] {e}，停止该站点，请更新选择器")
+                    self._record(name, date_str, 0, ok=False)
+                    self.progress[name].stopped = True
+                except Exception as e:
+                    logger.error(f"[线程{worker_id}] {self.sites[name].display_name} {date_str} 失败: {e}")
+                    self._record(name, date_str, 0, ok=False)
+                    if owner is None:
+                        continue
+                    # 浏览器可能已崩溃，重建后重新分给各站点
+                    try:
+                        owner._init_driver(headless=self.headless)
+                        for crawler in crawlers.values():
+                            if crawler is not owner:
+                                crawler.share_driver(owner)
+                    except Exception as e2:
+                        logger.error(f"[线程{worker_id}] 重建浏览器失败，线程退出: {e2}")
+                        return
+        finally:
+            for crawler in crawlers.values():
+                crawler._finish_run()
+            if owner is not None:
+                owner.launcher.release(owner.driver)
+                owner.launcher.stop()
+
+    def run(self, start_date: str, end_date: str, resume: bool = True) -> Dict[str, SiteProgress]:
+        total = self.plan(start_date, end_date, resume)
+        workers = min(self.drivers, total) if total else 0
+        logger.info(f"\n{'#' * 60}")
+        logger.info(f"多站点爬取 {start_date} 至 {end_date}: {len(self.sites)} 份报纸，{total} 个日期单元，"
+                    f"{workers} 个浏览器")
+        for progress in self.progress.values():
+            logger.info(f"  - {progress.site.display_name}: {progress.planned} 天")
+        logger.info(f"{'#' * 60}\n")
+
+        start = time.time()
+        threads = [threading.Thread(target=self._worker, args=(i,), name=f'multisite-{i}')
+                   for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            logger.info("用户中断，等待当前日期完成后停止")
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        # 每个站点的失败与未完成日期写入各自的修复队列
+        remaining: Dict[str, List[str]] = {}
+        for name, date_str in self._units:
+            remaining.setdefault(name, []).append(date_str)
+        elapsed = time.time() - start
+        logger.info(f"\n{'#' * 60}")
+        logger.info(f"多站点爬取完成，总耗时 {elapsed:.0f}s")
+        for name, progress in self.progress.items():
+            units = [{'date': d, 'edition': None, 'reasons': ['多站点爬取失败']} for d in progress.failed]
+            units += [{'date': d, 'edition': None, 'reasons': ['多站点爬取未完成']} for d in remaining.get(name, [])]
+            logger.info(f"  - {progress.site.display_name}: 完成 {progress.done}/{progress.planned} 天，"
+                        f"新保存 {progress.saved} 篇，失败 {len(progress.failed)}"
+                        f"{'，已因改版停止' if progress.stopped else ''}；{self.limiters[name].summary()}；"
+                        f"{self.breakers[name].summary()}")
+            if units:
+                queue_path = self.repair_queue_file(name)
+                merge_repair_queue(units, queue_path)
+                logger.info(f"    失败/未完成的 {len(units)} 个日期已写入 {queue_path}")
+        logger.info(f"{'#' * 60}\n")
+        return self.progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多份报纸共用一个爬取引擎')
+    parser.add_argument('output_dir', help='归档根目录（每份报纸一个子目录）')
+    parser.add_argument('--sites', default='bjnews',
+                        help='逗号分隔的站点名或站点配置 .json 文件，如 bjnews,sites/other.json')
+    parser.add_argument('--start', required=True, help='起始日期 YYYYMMDD')
+    parser.add_argument('--end', help='结束日期 YYYYMMDD，默认今天')
+    parser.add_argument('--drivers', type=int, default=2, help='浏览器数（各站点共用）')
+    parser.add_argument('--rate', type=float, default=0.5, help='每个站点每秒页面请求数')
+    parser.add_argument('--no-resume', action='store_true', help='清单状态为ok的日期也重新检查')
+    parser.add_argument('--show', action='store_true', help='显示浏览器窗口')
+    parser.add_argument('--warm-start', action='store_true')
+    parser.add_argument('--profile-dir', default=None)
+    parser.add_argument('--browser-cache', default=DEFAULT_CACHE_ROOT, metavar='DIR',
+                        help='各浏览器共用的磁盘缓存目录（每个浏览器占用其中一个工作槽）')
+    parser.add_argument('--no-browser-cache', action='store_true')
+    parser.add_argument('--edition-budget', type=float, default=None, metavar='MINUTES',
+                        help='单个版面的时间预算（分钟），超时的版面记入修复队列；默认不限')
+    parser.add_argument('--date-budget', type=float, default=None, metavar='MINUTES',
+                        help='单个日期的时间预算（分钟），超时后剩余版面记入修复队列；默认不限')
+    args = parser.parse_args()
+
+    sites = [get_site(name.strip()) for name in args.sites.split(',') if name.strip()]
+    engine = MultiSiteEngine(sites, args.output_dir, drivers=args.drivers, rate=args.rate,
+                             headless=not args.show, record_stats=True,
+                             warm_start=args.warm_start, profile_dir=args.profile_dir,
+                             browser_cache=None if args.no_browser_cache else args.browser_cache,
+                             edition_budget=args.edition_budget * 60 if args.edition_budget else None,
+                             date_budget=args.date_budget * 60 if args.date_budget else None)
+    progress = engine.run(args.start, args.end or datetime.now().strftime("%Y%m%d"), resume=not args.no_resume)
+    return 0 if all(not p.failed for p in progress.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import gc
+import json
+import time
+import logging
+import threading
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from selenium.webdriver.remote.webelement import WebElement
+
+from xinjing_driver import process_rss, process_tree_rss, driver_process_pid
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# 判定为泄漏的增长速度（每小时）与样本数下限
+LEAK_MB_PER_HOUR = 20.0
+LEAK_WEBELEMENTS_PER_HOUR = 200.0
+MIN_SAMPLES = 5
+
+
+def _slope_per_hour(points: List[tuple]) -> float:
+    # 最小二乘斜率，points 为 (秒, 值)
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return 0.0
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return cov / var_x * 3600
+
+
+class MemoryProfiler:
+    """长时间运行的内存采样：Python堆（tracemalloc）、Python进程RSS、Chrome进程树RSS、存活WebElement数
+
+    每个采样写一行JSON（带当前日期/版面），结束时根据增长斜率给出泄漏判断。
+    """
+
+    def __init__(self, crawler, interval: float = 60.0, output: str = 'memory_profile.jsonl',
+                 top: int = 10, frames: int = 1):
+        self.crawler = crawler
+        self.interval = interval
+        self.output = output
+        self.top = top
+        self.frames = frames
+        self.samples: List[Dict] = []
+        self._first_snapshot = None
+        self._last_snapshot = None
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+
+    def start(self) -> 'MemoryProfiler':
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._started = time.monotonic()
+        self._file = open(self.output, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='memory-profiler', daemon=True)
+        self._thread.start()
+        logger.info(f"内存采样已开启：每 {self.interval:g}s 写入 {self.output}")
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def _chrome_rss(self) -> Optional[int]:
+        driver = getattr(self.crawler, 'driver', None)
+        if driver is None:
+            return None
+        return process_tree_rss(driver_process_pid(driver, self.crawler.launcher))
+
+    @staticmethod
+    def _live_webelements() -> int:
+        return sum(1 for obj in gc.get_objects() if isinstance(obj, WebElement))
+
+    def sample(self) -> Dict:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        if self._first_snapshot is None:
+            self._first_snapshot = snapshot
+        self._last_snapshot = snapshot
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        top = [{'where': str(stat.traceback[0]), 'kb': round(stat.size / 1024, 1), 'count': stat.count}
+               for stat in snapshot.statistics('lineno')[:self.top]]
+        sample = {
+            'ts': datetime.now().isoformat(timespec='seconds'),
+            'elapsed': round(time.monotonic() - self._started, 1),
+            'date': getattr(self.crawler, 'current_date', None),
+            'edition': getattr(self.crawler, 'current_edition', None),
+            'python_rss': process_rss(),
+            'chrome_rss': self._chrome_rss(),
+            'traced': traced,
+            'traced_peak': traced_peak,
+            'webelements': self._live_webelements(),
+            'top': top,
+        }
+        self.samples.append(sample)
+        if self._file:
+            self._file.write(json.dumps(sample, ensure_ascii=False) + '\n')
+            self._file.flush()
+        return sample
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        # 结束时再采一次，保证有最终状态
+        self.sample()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _trend(self, key: str) -> Optional[float]:
+        points = [(s['elapsed'], s[key]) for s in self.samples if s.get(key) is not None]
+        if len(points) < 2:
+            return None
+        return _slope_per_hour(points)
+
+    def report(self) -> List[str]:
+        """汇总各项内存的增长斜率，超过阈值的标记为疑似泄漏"""
+        if not self.samples:
+            return ["内存采样: 无样本"]
+        hours = self.samples[-1]['elapsed'] / 3600
+        lines = [f"内存采样: {len(self.samples)} 个样本，覆盖 {hours:.2f} 小时"]
+        enough = len(self.samples) >= MIN_SAMPLES
+        for key, label in (('python_rss', 'Python进程RSS'), ('chrome_rss', 'Chrome进程树RSS'),
+                           ('traced', 'Python堆(tracemalloc)')):
+            slope = self._trend(key)
+            values = [s[key] for s in self.samples if s.get(key) is not None]
+            if slope is None:
+                lines.append(f"  - {label}: 无数据")
+                continue
+            leak = enough and slope / MB > LEAK_MB_PER_HOUR
+            lines.append(f"  - {label}: {values[0] / MB:.0f} → {values[-1] / MB:.0f} MB，"
+                         f"峰值 {max(values) / MB:.0f} MB，趋势 {slope / MB:+.1f} MB/小时"
+                         f"{'  【疑似泄漏】' if leak else ''}")
+        slope = self._trend('webelements') or 0.0
+        counts = [s['webelements'] for s in self.samples]
+        leak = enough and slope > LEAK_WEBELEMENTS_PER_HOUR
+        lines.append(f"  - 存活WebElement: {counts[0]} → {counts[-1]}，最多 {max(counts)}，"
+                     f"趋势 {slope:+.0f} 个/小时{'  【疑似泄漏：元素引用未释放】' if leak else ''}")
+        if self._first_snapshot is not None and self._last_snapshot is not self._first_snapshot:
+            growth = [d for d in self._last_snapshot.compare_to(self._first_snapshot, 'lineno') if d.size_diff > 0]
+            if growth:
+                lines.append("  - Python堆增长最多的位置:")
+                for diff in growth[:self.top]:
+                    lines.append(f"      {diff.traceback[0]}: {diff.size_diff / 1024:+.0f} KB "
+                                 f"({diff.count_diff:+d} 个对象)")
+        return lines
@@ -0,0 +1,267 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from xinjing_archive import (
+    ArticleIndex, parse_article_text, parse_filename, read_day_manifest, MIN_ARTICLE_BYTES,
+)
+
+REPAIR_QUEUE_FILE = 'repair_queue.json'
+# 正文短于此长度视为抓取不完整
+MIN_BODY_CHARS = 10
+# 回填、多站点的各线程结束时都会并入修复队列，读-改-写要互斥
+_QUEUE_LOCK = threading.RLock()
+
+
+def validate_article_file(path: str, expected_date: str) -> Optional[str]:
+    """校验单个文章文件，有问题时返回原因，否则返回None"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return f"无法读取: {e}"
+    if not data:
+        return '空文件'
+    if len(data) < MIN_ARTICLE_BYTES:
+        return '文件过短'
+    if not data.endswith(b'\n'):
+        return '写入不完整'
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return '编码错误'
+    record = parse_article_text(text)
+    if record is None:
+        return '表头格式错误'
+    if record['date'] and record['date'] != expected_date:
+        return f"日期不符: {record['date']}"
+    if len(record['content'].strip()) < MIN_BODY_CHARS:
+        return '正文为空或过短'
+    return None
+
+
+def scan_day(day_dir: str) -> Dict:
+    """扫描一个日期目录：逐个校验文件，并与清单中网站列出的数量对比"""
+    month_name = os.path.basename(os.path.dirname(day_dir))
+    date_str = month_name.replace('-', '') + os.path.basename(day_dir)
+    result = {'date': date_str, 'files': 0, 'valid': 0, 'invalid': [], 'units': [], 'clean': [],
+              'has_manifest': False, 'leftovers': 0}
+    valid_per_edition = Counter()
+    valid_ids = set()
+    # 旧文件名（按顺序编号）的有效文件，按与爬虫相同的 (日期, 版面, 标题键) 规则匹配
+    legacy_files = ArticleIndex(os.path.dirname(os.path.dirname(day_dir)))
+
+    with os.scandir(day_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if entry.name.endswith('.tmp'):
+                result['leftovers'] += 1
+                continue
+            if not entry.name.endswith('.txt'):
+                continue
+            result['files'] += 1
+            reason = validate_article_file(entry.path, date_str)
+            name_info = parse_filename(entry.name) or {}
+            edition = name_info.get('edition') or ''
+            if reason:
+                result['invalid'].append({'file': entry.name, 'reason': reason, 'edition': edition})
+            else:
+                result['valid'] += 1
+                valid_per_edition[edition] += 1
+                if name_info.get('article_id'):
+                    valid_ids.add(name_info['article_id'])
+                elif name_info:
+                    legacy_files.add_legacy(date_str, edition, name_info['title'])
+
+    manifest = read_day_manifest(day_dir)
+    units = {}
+
+    def _add_unit(edition, reason):
+        key = edition or None
+        units.setdefault(key, []).append(reason)
+
+    for item in result['invalid']:
+        _add_unit(item['edition'], f"{item['file']}: {item['reason']}")
+
+    if manifest:
+        result['has_manifest'] = True
+        if not manifest.get('editions') and manifest.get('status') != 'no_paper':
+            _add_unit(None, '版面列表为空')
+        # 网站列出但还没有结果的版面（按优先级爬取到截止时间、被暂停等）
+        for edition in manifest.get('edition_list', []):
+            if edition not in manifest.get('editions', {}):
+                _add_unit(edition, '版面未爬取')
+        for edition, info in manifest.get('editions', {}).items():
+            listed = info.get('listed', 0)
+            valid = valid_per_edition.get(edition, 0)
+            # 清单记录了文章ID时按ID核对（因旧文件已存在而跳过的按旧文件核对），否则按数量核对
+            legacy = info.get('legacy', {})
+            missing = [aid for aid in info.get('articles', {})
+                       if aid not in valid_ids and not legacy_files.contains(aid, date_str, edition, legacy.get(aid, ''))]
+            if info.get('status') == 'failed':
+                _add_unit(edition, f"上次爬取失败: {info.get('error', '')}")
+            elif missing:
+                _add_unit(edition, f"缺少文章: {', '.join(missing[:3])}" + (' 等' if len(missing) > 3 else ''))
+            elif not info.get('articles') and valid < listed:
+                _add_unit(edition, f"文章不完整: {valid}/{listed}")
+    elif result['valid'] == 0:
+        _add_unit(None, '没有有效文章')
+
+    # 整个日期需要重爬时不再单独列出版面
+    if None in units:
+        units = {None: [r for reasons in units.values() for r in reasons]}
+    else:
+        # 检查通过的 (日期, 版面)：并入修复队列时移除已修好的旧单元（整日期单元由上面的版面单元代替）
+        editions = set(valid_per_edition) | set((manifest or {}).get('editions', {})) \
+            | set((manifest or {}).get('edition_list', []))
+        result['clean'] = [(date_str, None)] + [(date_str, e) for e in sorted(editions) if e and e not in units]
+    result['units'] = [{'date': date_str, 'edition': edition, 'reasons': reasons}
+                       for edition, reasons in sorted(units.items(), key=lambda kv: kv[0] or '')]
+    return result
+
+
+def _day_dirs_for_range(output_dir: str, start_date: str, end_date: str, skip_weekends: bool) -> List[str]:
+    current = datetime.strptime(start_date, "%Y%m%d")
+    end = datetime.strptime(end_date, "%Y%m%d")
+    dirs = []
+    while current <= end:
+        if not (skip_weekends and current.weekday() >= 5):
+            dirs.append(os.path.join(output_dir, current.strftime("%Y-%m"), current.strftime("%d")))
+        current += timedelta(days=1)
+    return dirs
+
+
+def _existing_day_dirs(output_dir: str) -> List[str]:
+    dirs = []
+    with os.scandir(output_dir) as months:
+        for month in months:
+            if month.is_dir() and len(month.name) == 7 and month.name[4] == '-':
+                with os.scandir(month.path) as days:
+                    dirs.extend(day.path for day in days if day.is_dir() and day.name.isdigit())
+    return sorted(dirs)
+
+
+def scan_archive(output_dir: str, start_date: str = None, end_date: str = None,
+                 skip_weekends: bool = True, workers: int = 16) -> Dict:
+    """并行扫描归档。给出日期范围时，范围内缺失的日期目录也会列入修复队列"""
+    start = time.perf_counter()
+    if start_date and end_date:
+        day_dirs = _day_dirs_for_range(output_dir, start_date, end_date, skip_weekends)
+    else:
+        day_dirs = _existing_day_dirs(output_dir)
+
+    present = [d for d in day_dirs if os.path.isdir(d)]
+    missing = [d for d in day_dirs if not os.path.isdir(d)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(scan_day, present))
+
+    units = []
+    for day_dir in missing:
+        date_str = os.path.basename(os.path.dirname(day_dir)).replace('-', '') + os.path.basename(day_dir)
+        units.append({'date': date_str, 'edition': None, 'reasons': ['日期目录不存在']})
+    for result in results:
+        units.extend(result['units'])
+    units.sort(key=lambda u: (u['date'], u['edition'] or ''))
+
+    return {
+        'days': len(day_dirs),
+        'files': sum(r['files'] for r in results),
+        'valid': sum(r['valid'] for r in results),
+        'invalid': sum(len(r['invalid']) for r in results),
+        'without_manifest': sum(1 for r in results if not r['has_manifest']),
+        'leftovers': sum(r['leftovers'] for r in results),
+        'units': units,
+        'clean': [key for r in results for key in r['clean']],
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def write_repair_queue(units: List[Dict], path: str = REPAIR_QUEUE_FILE):
+    # 临时文件名唯一，并发写入时不会互相换走对方的临时文件
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(units, f, ensure_ascii=False, indent=1)
+        with _QUEUE_LOCK:
+            os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def merge_repair_queue(units: List[Dict], path: str = REPAIR_QUEUE_FILE, done: Iterable[tuple] = ()):
+    # 追加到已有的修复队列（同一日期/版面只保留一项，原因合并）；done 中的 (日期, 版面) 已完成，从队列中移除
+    done = set(done)
+    merged: Dict[tuple, Dict] = {}
+    with _QUEUE_LOCK:
+        existing = load_repair_queue(path) if os.path.exists(path) else []
+        existing = [unit for unit in existing if (unit['date'], unit.get('edition')) not in done]
+        for unit in existing + units:
+            key = (unit['date'], unit.get('edition'))
+            if key in merged:
+                merged[key]['reasons'] += [r for r in unit['reasons'] if r not in merged[key]['reasons']]
+            else:
+                merged[key] = {'date': unit['date'], 'edition': unit.get('edition'), 'reasons': list(unit['reasons'])}
+        write_repair_queue(sorted(merged.values(), key=lambda u: (u['date'], u['edition'] or '')), path)
+
+
+def load_repair_queue(path: str = REPAIR_QUEUE_FILE) -> List[Dict]:
+    """读取修复队列，返回 [{'date': ..., 'edition': ... or None, 'reasons': [...]}]"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def units_by_date(units: List[Dict]) -> Dict[str, Optional[set]]:
+    # {日期: 需要重爬的版面集合}，None 表示整个日期
+    plan: Dict[str, Optional[set]] = {}
+    for unit in units:
+        date_str, edition = unit['date'], unit.get('edition')
+        if edition is None or (date_str in plan and plan[date_str] is None):
+            plan[date_str] = None
+        else:
+            plan.setdefault(date_str, set()).add(edition)
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新京报归档完整性扫描')
+    parser.add_argument('output_dir', help='归档根目录')
+    parser.add_argument('--start', help='起始日期 YYYYMMDD（与 --end 一起使用时检查缺失日期）')
+    parser.add_argument('--end', help='结束日期 YYYYMMDD')
+    parser.add_argument('--include-weekends', action='store_true', help='周末也视为应有报纸')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--queue', default=REPAIR_QUEUE_FILE, help='修复队列输出文件')
+    args = parser.parse_args()
+
+    report = scan_archive(args.output_dir, args.start, args.end,
+                          skip_weekends=not args.include_weekends, workers=args.workers)
+    # 保留熔断暂停、优先级爬取、回填留下的单元，本次检查通过的从队列移除
+    merge_repair_queue(report['units'], args.queue, done=report['clean'])
+
+    print(f"扫描 {report['days']} 天，{report['files']} 个文件，有效 {report['valid']}，"
+          f"无效 {report['invalid']}，残留临时文件 {report['leftovers']}，"
+          f"无清单日期 {report['without_manifest']}，耗时 {report['seconds']:.2f}s")
+    for unit in report['units'][:50]:
+        print(f"  {unit['date']} {unit['edition'] or '全部版面'}: {'; '.join(unit['reasons'][:3])}")
+    if len(report['units']) > 50:
+        print(f"  ... 共 {len(report['units'])} 项")
+    print(f"修复队列已并入 {args.queue}，可在主程序中选择\"按修复队列补爬\"")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import time
+import heapq
+import logging
+import itertools
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 头版与要闻版面优先于内页
+DEFAULT_EDITION_WEIGHTS = {'A01': 100, 'A02': 60, 'A03': 60}
+
+
+@dataclass
+class PriorityPolicy:
+    """工作单元优先级 = 版面权重 + 日期新近度 + 上次失败加成
+
+    默认权重下：任何日期的头版都排在最新日期的内页之前；同档版面里新日期在前；
+    上次失败的单元在同档内整体提前。
+    """
+    newest_first: bool = True
+    edition_weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_EDITION_WEIGHTS))
+    default_edition_weight: float = 10
+    recency_weight: float = 30
+    failed_boost: float = 40
+
+    def score(self, date_str: str, edition: str, span: Tuple[str, str], failed: bool) -> float:
+        oldest, newest = span
+        total_days = max((_to_date(newest) - _to_date(oldest)).days, 1)
+        age = (_to_date(newest) - _to_date(date_str)).days
+        freshness = 1 - age / total_days if self.newest_first else age / total_days
+        score = self.edition_weights.get(edition, self.default_edition_weight)
+        score += self.recency_weight * freshness
+        if failed:
+            score += self.failed_boost
+        return score
+
+
+@dataclass
+class WorkUnit:
+    date: str
+    edition: str
+    priority: float
+    failed_before: bool = False
+
+
+def _to_date(date_str: str) -> datetime:
+    return datetime.strptime(date_str, "%Y%m%d")
+
+
+class CrawlScheduler:
+    """按优先级发放 (日期, 版面) 工作单元，并在截止时间前尽量覆盖高优先级单元
+
+    每个日期先只放入头版单元；第一次进入该日期拿到版面列表后，再把其余版面按优先级加入。
+    每次发放前用历史平均耗时估计该单元（含切换日期的导航）能否在截止时间前完成。
+    """
+
+    def __init__(self, policy: PriorityPolicy = None, deadline: Optional[float] = None,
+                 failed_units: Iterable[Tuple[str, Optional[str]]] = ()):
+        self.policy = policy or PriorityPolicy()
+        self.deadline = deadline
+        self.failed: Set[Tuple[str, Optional[str]]] = set(failed_units)
+        self._heap: List = []
+        self._counter = itertools.count()
+        self._span = ('', '')
+        self._discovered: Set[str] = set()
+        self._issued: Set[Tuple[str, str]] = set()
+        self.done: List[Tuple[WorkUnit, bool, float]] = []
+        # 耗时估计（指数滑动平均），初值取自以往日志的量级
+        self.edition_seconds = 60.0
+        self.navigate_seconds = 15.0
+        self.stopped_by_deadline = False
+
+    def _is_failed(self, date_str: str, edition: str) -> bool:
+        return (date_str, edition) in self.failed or (date_str, None) in self.failed
+
+    def _push(self, date_str: str, edition: str):
+        failed = self._is_failed(date_str, edition)
+        unit = WorkUnit(date_str, edition, self.policy.score(date_str, edition, self._span, failed), failed)
+        heapq.heappush(self._heap, (-unit.priority, next(self._counter), unit))
+
+    def add_dates(self, dates: List[str], first_edition: str = 'A01'):
+        dates = sorted(dates)
+        if not dates:
+            return
+        self._span = (dates[0], dates[-1])
+        for date_str in dates:
+            self._push(date_str, first_edition)
+
+    def add_editions(self, date_str: str, editions: List[str]):
+        """进入日期后补充其余版面（每个日期只补充一次）"""
+        if date_str in self._discovered:
+            return
+        self._discovered.add(date_str)
+        queued = {unit.edition for _, _, unit in self._heap if unit.date == date_str}
+        for edition in editions:
+            if edition not in queued and (date_str, edition) not in self._issued:
+                self._push(date_str, edition)
+
+    def is_discovered(self, date_str: str) -> bool:
+        return date_str in self._discovered
+
+    def estimate(self, unit: WorkUnit, current_date: Optional[str]) -> float:
+        cost = self.edition_seconds
+        if unit.date != current_date:
+            cost += self.navigate_seconds
+        return cost
+
+    def next_unit(self, current_date: Optional[str] = None) -> Optional[WorkUnit]:
+        """取出下一个单元；同优先级下优先留在当前日期，预计超过截止时间时返回None"""
+        if not self._heap:
+            return None
+        top_priority = self._heap[0][0]
+        # 与最高优先级相差不大的单元中，优先选择不需要切换日期的
+        chosen = None
+        for i, (neg_priority, _, unit) in enumerate(self._heap):
+            if neg_priority - top_priority <= 1 and unit.date == current_date:
+                chosen = i
+                break
+        if chosen is None:
+            chosen = 0
+
+        if not self._fits(self._heap[chosen][2], current_date):
+            # 切换日期来不及时，当前日期里还来得及的单元照样做（不含导航耗时）
+            chosen = min((i for i, (_, _, unit) in enumerate(self._heap)
+                          if unit.date == current_date and self._fits(unit, current_date)),
+                         key=lambda i: self._heap[i][:2], default=None)
+            if chosen is None:
+                self.stopped_by_deadline = True
+                return None
+        unit = self._take(chosen)
+        self._issued.add((unit.date, unit.edition))
+        return unit
+
+    def _fits(self, unit: WorkUnit, current_date: Optional[str]) -> bool:
+        return self.deadline is None or time.time() + self.estimate(unit, current_date) <= self.deadline
+
+    def _take(self, i: int) -> WorkUnit:
+        unit = self._heap[i][2]
+        self._heap[i] = self._heap[-1]
+        self._heap.pop()
+        heapq.heapify(self._heap)
+        return unit
+
+    def requeue(self, unit: WorkUnit):
+        """放回未处理的单元（运行提前停止时仍计入未完成）"""
+        self._issued.discard((unit.date, unit.edition))
+        heapq.heappush(self._heap, (-unit.priority, next(self._counter), unit))
+
+    def record(self, unit: WorkUnit, seconds: float, ok: bool, navigated: float = 0.0):
+        self.done.append((unit, ok, seconds))
+        self.edition_seconds = 0.7 * self.edition_seconds + 0.3 * max(seconds - navigated, 1.0)
+        if navigated:
+            self.navigate_seconds = 0.7 * self.navigate_seconds + 0.3 * navigated
+
+    def undone(self) -> List[WorkUnit]:
+        return [unit for _, _, unit in sorted(self._heap)]
+
+    def undone_as_repair_units(self) -> List[Dict]:
+        units = []
+        for unit in self.undone():
+            # 没来得及进入的日期只有头版单元，补爬时需要整个日期
+            edition = unit.edition if self.is_discovered(unit.date) else None
+            units.append({'date': unit.date, 'edition': edition,
+                          'reasons': ['截止时间前未完成' if self.stopped_by_deadline else '未完成']})
+        for unit, ok, _ in self.done:
+            if not ok:
+                units.append({'date': unit.date, 'edition': unit.edition, 'reasons': ['本次爬取失败']})
+        units.sort(key=lambda u: (u['date'], u['edition'] or ''))
+        return units
+
+    def completed_keys(self) -> Set[Tuple[str, Optional[str]]]:
+        """本次完成的 (日期, 版面)；进入过的日期的未完成版面都在 undone_as_repair_units 里，整日期单元也算完成"""
+        keys = {(unit.date, unit.edition) for unit, ok, _ in self.done if ok}
+        keys.update((date_str, None) for date_str in self._discovered)
+        return keys
+
+    def report(self) -> List[str]:
+        lines = []
+        ok_units = [unit for unit, ok, _ in self.done if ok]
+        failed_units = [unit for unit, ok, _ in self.done if not ok]
+        front = [u for u in ok_units if self.policy.edition_weights.get(u.edition, 0) > self.policy.default_edition_weight]
+        front_dates = {u.date for u in ok_units if u.edition == 'A01'}
+        lines.append(f"  - 完成单元: {len(ok_units)}（头版/重点版面 {len(front)}），失败: {len(failed_units)}")
+        lines.append(f"  - 已覆盖头版的日期: {len(front_dates)}")
+        undone = self.undone()
+        if undone:
+            by_date: Dict[str, List[str]] = {}
+            for unit in undone:
+                label = unit.edition if self.is_discovered(unit.date) else '全部版面'
+                by_date.setdefault(unit.date, []).append(label)
+            reason = '（截止时间到）' if self.stopped_by_deadline else ''
+            lines.append(f"  - 未完成单元: {len(undone)}{reason}")
+            for date_str in sorted(by_date, reverse=self.policy.newest_first)[:20]:
+                lines.append(f"      {date_str}: {', '.join(by_date[date_str])}")
+        else:
+            lines.append("  - 未完成单元: 0")
+        return lines
@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException, WebDriverException, StaleElementReferenceException
+
+from xinjing_logging import log_event
+
+logger = logging.getLogger(__name__)
+
+# 同一进程内所有 SelectorRegistry 写命中记录时互斥
+_STATE_FILE_LOCK = threading.Lock()
+
+# 正文少于此字数的页面（5xx、验证页、空白页）不算正常页面，未命中不计入改版判断
+MIN_PAGE_TEXT = 50
+# 页面加载状态、HTTP状态码（Chrome 109+ 才有 responseStatus）与正文字数
+_PAGE_STATE_JS = '''
+    const nav = performance.getEntriesByType('navigation')[0];
+    return [document.readyState, (nav && nav.responseStatus) || 200,
+            document.body ? document.body.innerText.trim().length : 0];
+'''
+
+# 每个逻辑元素对应一组按优先级排列的选择器，模板中的 {index}/{day} 在查找时填入
+# 绝对XPath是页面当前结构，CSS选择器作为结构调整后的备选
+DEFAULT_SELECTORS: Dict[str, List[Tuple[str, str]]] = {
+    'month_select': [
+        (By.XPATH, "/html/body/div[3]/div/div[2]/div/div[2]/div[2]/div[2]/div/div/div[1]/div/div[2]/select"),
+        (By.CSS_SELECTOR, ".calendar select.month, .cal-head select:last-of-type"),
+    ],
+    'year_select': [
+        (By.XPATH, "/html/body/div[3]/div/div[2]/div/div[2]/div[2]/div[2]/div/div/div[1]/div/div[1]/select"),
+        (By.CSS_SELECTOR, ".calendar select.year, .cal-head select:first-of-type"),
+    ],
+    'calendar': [
+        (By.XPATH, "/html/body/div[3]/div/div[2]/div/div[2]/div[2]/div[2]/div/div/div[3]/div[2]"),
+        (By.CSS_SELECTOR, ".cal-dates.clearfix"),
+        (By.CSS_SELECTOR, ".cal-dates"),
+    ],
+    'calendar_day': [
+        (By.XPATH, "/html/body/div[3]/div/div[2]/div/div[2]/div[2]/div[2]/div/div/div[3]/div[2]/div[{index}]/span/a"),
+        (By.CSS_SELECTOR, ".cal-dates > div:nth-child({index}) span a"),
+    ],
+    'edition_list': [
+        (By.XPATH, "/html/body/div[3]/div/div[2]/div/div[1]/div/div[1]/div[2]/ul"),
+        (By.CSS_SELECTOR, ".nav-list ul, .layout-list ul"),
+    ],
+    'edition_link': [
+        (By.XPATH, "/html/body/div[3]/div/div[2]/div/div[1]/div/div[1]/div[2]/ul/li[{index}]/a"),
+        (By.CSS_SELECTOR, ".nav-list ul > li:nth-child({index}) a, .layout-list ul > li:nth-child({index}) a"),
+    ],
+    'article_list': [
+        (By.XPATH, "/html/body/div[3]/div/div[2]/div/div[2]/div[1]/div[2]/ul"),
+        (By.CSS_SELECTOR, ".article-content ul"),
+        (By.CSS_SELECTOR, ".news-list ul"),
+    ],
+    'title': [
+        (By.XPATH, "/html/body/div[3]/div/div[3]/div/div[1]"),
+        (By.CSS_SELECTOR, ".article-detail .title-box"),
+    ],
+    'body': [
+        (By.XPATH, "/html/body/div[3]/div/div[3]/div/div[3]"),
+        (By.CSS_SELECTOR, "#ozoom"),
+        (By.CSS_SELECTOR, ".article-detail .article-text, .article-detail .content"),
+    ],
+}
+
+
+class LayoutChangedError(Exception):
+    """某个逻辑元素的所有选择器连续多次全部失败，页面结构很可能已改版"""
+
+    def __init__(self, name: str, url: str = ''):
+        super().__init__(f"页面结构可能已变化: {name} 的所有选择器均未命中 (url={url})")
+        self.name = name
+        self.url = url
+
+
+class SelectorRegistry:
+    """选择器注册表
+
+    - 探测是零等待的（要求 driver.implicitly_wait(0)），超时由调用方显式给出
+    - 记住上次命中的选择器，下次优先尝试
+    - 同一元素连续 miss_threshold 次全部失败后进入"疑似改版"状态：立即报警，
+      此后只做一次零等待探测就抛出 LayoutChangedError，不再逐页等待超时
+    - 只有页面正常加载（加载完成、非4xx/5xx、有正文）时的未命中才计数，
+      慢页面、错误页和验证页只抛出 TimeoutException
+    """
+
+    def __init__(self, chains: Dict[str, List[Tuple[str, str]]] = None, state_file: str = None,
+                 miss_threshold: int = 3, poll_interval: float = 0.2):
+        self.chains = {name: list(chain) for name, chain in (chains or DEFAULT_SELECTORS).items()}
+        self.state_file = state_file
+        self.miss_threshold = miss_threshold
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._order: Dict[str, List[int]] = {name: list(range(len(chain))) for name, chain in self.chains.items()}
+        self._hits: Dict[str, List[int]] = {name: [0] * len(chain) for name, chain in self.chains.items()}
+        self._misses: Dict[str, int] = {}
+        self._load_state()
+
+    def _load_state(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, hits in state.get('hits', {}).items():
+            if name in self.chains and len(hits) == len(self.chains[name]):
+                self._hits[name] = hits
+                self._order[name] = sorted(range(len(hits)), key=lambda i: -hits[i])
+
+    def save_state(self):
+        if not self.state_file:
+            return
+        with self._lock:
+            state = {'hits': {name: list(hits) for name, hits in self._hits.items()}}
+        # 回填、多站点的每个线程各有一个实例，写同一个文件：临时文件按进程/线程区分，写入互斥
+        tmp_path = f"{self.state_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with _STATE_FILE_LOCK:
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False)
+                os.replace(tmp_path, self.state_file)
+            except OSError as e:
+                logger.warning(f"选择器命中记录保存失败: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def reset_misses(self):
+        # 未命中是封禁页造成的（不是改版）时清空计数
+        with self._lock:
+            self._misses.clear()
+
+    def is_suspect(self, name: str) -> bool:
+        return self._misses.get(name, 0) >= self.miss_threshold
+
+    def _candidates(self, name: str, fmt: dict):
+        chain = self.chains[name]
+        for i in list(self._order[name]):
+            by, value = chain[i]
+            yield i, by, value.format(**fmt) if fmt else value
+
+    def _record_hit(self, name: str, i: int):
+        with self._lock:
+            self._hits[name][i] += 1
+            order = self._order[name]
+            if order[0] != i:
+                order.remove(i)
+                order.insert(0, i)
+                logger.debug("选择器 %s 改为优先使用第 %d 个", name, i + 1)
+            if self._misses.get(name, 0) >= self.miss_threshold:
+                logger.info(f"选择器 {name} 恢复命中")
+            self._misses[name] = 0
+
+    def _record_miss(self, name: str, url: str):
+        with self._lock:
+            self._misses[name] = self._misses.get(name, 0) + 1
+            misses = self._misses[name]
+        if misses == self.miss_threshold:
+            tried = '; '.join(value for _, value in self.chains[name])
+            logger.error(f"[页面结构告警] {name} 连续 {misses} 次全部选择器未命中，页面可能已改版。"
+                         f"当前页面: {url}，已尝试: {tried}")
+            log_event('layout_changed', level=logging.ERROR, selector=name, url=url, misses=misses)
+
+    def _probe_once(self, root, name: str, fmt: dict, multiple: bool = False, clickable: bool = False):
+        for i, by, value in self._candidates(name, fmt):
+            try:
+                elements = root.find_elements(by, value)
+            except (WebDriverException, StaleElementReferenceException):
+                continue
+            if clickable:
+                elements = [e for e in elements if _is_clickable(e)]
+            if elements:
+                self._record_hit(name, i)
+                return elements if multiple else elements[0]
+        return None
+
+    def probe(self, driver, name: str, root=None, **fmt):
+        """零等待查找，未找到返回None（不计入改版判断）"""
+        return self._probe_once(root or driver, name, fmt)
+
+    def find(self, driver, name: str, timeout: float = 10, root=None, clickable: bool = False, **fmt):
+        """在显式超时内轮询整条选择器链，找不到时抛出 TimeoutException 或 LayoutChangedError"""
+        if self.is_suspect(name):
+            timeout = 0
+        deadline = time.monotonic() + timeout
+        while True:
+            element = self._probe_once(root or driver, name, fmt, clickable=clickable)
+            if element is not None:
+                return element
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        url = _current_url(driver)
+        if _normal_page(driver):
+            self._record_miss(name, url)
+            if self.is_suspect(name):
+                raise LayoutChangedError(name, url)
+        raise TimeoutException(f"{name} 在 {timeout:.0f}s 内未找到")
+
+    def find_all(self, driver, name: str, timeout: float = 10, root=None, **fmt) -> List:
+        if self.is_suspect(name):
+            timeout = 0
+        deadline = time.monotonic() + timeout
+        while True:
+            elements = self._probe_once(root or driver, name, fmt, multiple=True)
+            if elements:
+                return elements
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        url = _current_url(driver)
+        if _normal_page(driver):
+            self._record_miss(name, url)
+            if self.is_suspect(name):
+                raise LayoutChangedError(name, url)
+        raise TimeoutException(f"{name} 在 {timeout:.0f}s 内未找到")
+
+
+def _is_clickable(element) -> bool:
+    try:
+        return element.is_displayed() and element.is_enabled()
+    except WebDriverException:
+        return False
+
+
+def _normal_page(driver) -> bool:
+    # 页面已加载完成、不是错误状态码且有正文时，选择器未命中才可能是改版
+    try:
+        ready_state, status, text_length = driver.execute_script(_PAGE_STATE_JS)
+    except Exception:
+        return False
+    return ready_state == 'complete' and status < 400 and text_length >= MIN_PAGE_TEXT
+
+
+def _current_url(driver) -> str:
+    try:
+        return driver.current_url
+    except Exception:
+        return ''
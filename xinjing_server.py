@@ -0,0 +1,420 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import OrderedDict, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from xinjing_archive import iter_day_dirs, parse_filename, read_article_file, is_complete_article_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# 每个接口保留最近多少次请求的耗时用于计算分位数
+LATENCY_WINDOW = 2000
+
+
+class LRUCache:
+    """按字节数限制大小的LRU缓存（线程安全）"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._items[key] = value
+            self.bytes += len(value)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def invalidate_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._items if k.startswith(prefix)]:
+                self.bytes -= len(self._items.pop(key))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'items': len(self._items), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': round(self.hits / lookups, 4) if lookups else None}
+
+
+class ArchiveCatalog:
+    """归档目录的内存目录：只按文件名建立 日期 → 版面 → 文章 的列表，不读正文
+
+    refresh() 只重新扫描修改时间变化过的日期目录（save_article 先写临时文件再替换，
+    新文件或改写都会更新日期目录的修改时间），因此轮询的开销与新文件数量相关，而不是归档大小。
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        # {日期: {版面: [文章摘要]}}
+        self.days: Dict[str, Dict[str, List[Dict]]] = {}
+        # {文章ID: (日期, 文件路径)}
+        self.by_id: Dict[str, Tuple[str, str]] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.last_refresh_seconds = 0.0
+
+    @staticmethod
+    def _date_of(day_dir: str) -> str:
+        return os.path.basename(os.path.dirname(day_dir)).replace('-', '') + os.path.basename(day_dir)
+
+    def _scan_day(self, day_dir: str, date_str: str) -> Dict[str, List[Dict]]:
+        editions: Dict[str, List[Dict]] = defaultdict(list)
+        with os.scandir(day_dir) as entries:
+            names = sorted(e.name for e in entries if e.is_file() and e.name.endswith('.txt'))
+        for name in names:
+            path = os.path.join(day_dir, name)
+            info = parse_filename(name)
+            if info is None or not is_complete_article_file(path):
+                continue
+            # 旧文件名没有文章ID时用文件名（去掉扩展名）作为ID
+            article_id = info['article_id'] or name[:-4]
+            editions[info['edition'] or ''].append({
+                'article_id': article_id, 'date': date_str, 'edition': info['edition'] or '',
+                'title': info['title'], 'file': name,
+            })
+        return dict(editions)
+
+    def refresh(self) -> List[str]:
+        """扫描有变化的日期目录，返回发生变化的日期列表"""
+        start = time.perf_counter()
+        changed = []
+        seen = set()
+        for day_dir in iter_day_dirs(self.output_dir):
+            seen.add(day_dir)
+            try:
+                mtime = os.stat(day_dir).st_mtime_ns
+            except OSError:
+                continue
+            if self._dir_mtimes.get(day_dir) == mtime:
+                continue
+            date_str = self._date_of(day_dir)
+            editions = self._scan_day(day_dir, date_str)
+            with self._lock:
+                self._replace_day(date_str, editions, day_dir)
+            self._dir_mtimes[day_dir] = mtime
+            changed.append(date_str)
+        # 被删除的日期目录
+        for day_dir in [d for d in self._dir_mtimes if d not in seen]:
+            del self._dir_mtimes[day_dir]
+            date_str = self._date_of(day_dir)
+            with self._lock:
+                self._replace_day(date_str, {}, day_dir)
+            changed.append(date_str)
+        self.refreshes += 1
+        self.last_refresh_seconds = time.perf_counter() - start
+        return changed
+
+    def _replace_day(self, date_str: str, editions: Dict[str, List[Dict]], day_dir: str):
+        for articles in self.days.get(date_str, {}).values():
+            for item in articles:
+                self.by_id.pop(item['article_id'], None)
+        if editions:
+            self.days[date_str] = editions
+        else:
+            self.days.pop(date_str, None)
+        for articles in editions.values():
+            for item in articles:
+                self.by_id[item['article_id']] = (date_str, os.path.join(day_dir, item['file']))
+
+    def dates(self, start: str = None, end: str = None) -> List[str]:
+        with self._lock:
+            return sorted(d for d in self.days if (not start or d >= start) and (not end or d <= end))
+
+    def editions(self, date_str: str) -> Optional[Dict[str, List[Dict]]]:
+        with self._lock:
+            return self.days.get(date_str)
+
+    def locate(self, article_id: str) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            return self.by_id.get(article_id)
+
+    def article_count(self) -> int:
+        with self._lock:
+            return len(self.by_id)
+
+
+class LatencyMetrics:
+    """按接口统计请求数与耗时分位数"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, route: str, seconds: float, status: int):
+        with self._lock:
+            self._samples[route].append(seconds)
+            self._counts[route] += 1
+            if status >= 400:
+                self._errors[route] += 1
+
+    @staticmethod
+    def _percentile(values: List[float], fraction: float) -> float:
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            result = {}
+            for route, samples in self._samples.items():
+                values = sorted(samples)
+                result[route] = {
+                    'requests': self._counts[route], 'errors': self._errors[route],
+                    'p50_ms': round(self._percentile(values, 0.50) * 1000, 2),
+                    'p95_ms': round(self._percentile(values, 0.95) * 1000, 2),
+                    'p99_ms': round(self._percentile(values, 0.99) * 1000, 2),
+                }
+            return result
+
+
+class ArchiveService:
+    """只读查询服务：目录列表来自内存目录，单篇文章经过LRU缓存"""
+
+    def __init__(self, output_dir: str, cache_bytes: int = 64 * 1024 * 1024, poll_interval: float = 5.0):
+        self.catalog = ArchiveCatalog(output_dir)
+        self.cache = LRUCache(cache_bytes)
+        self.metrics = LatencyMetrics()
+        self.poll_interval = poll_interval
+        self.started = time.time()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def start_watcher(self):
+        self.catalog.refresh()
+        logger.info(f"归档目录载入: {len(self.catalog.days)} 天，{self.catalog.article_count()} 篇，"
+                    f"耗时 {self.catalog.last_refresh_seconds:.2f}s")
+        self._watcher = threading.Thread(target=self._watch, name='archive-watcher', daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                changed = self.catalog.refresh()
+            except OSError as e:
+                logger.warning(f"扫描归档目录失败: {e}")
+                continue
+            for date_str in changed:
+                # 缓存的文章按日期前缀失效（文章可能被重新校验改写）
+                self.cache.invalidate_prefix(f"article:{date_str}:")
+            if changed:
+                logger.info(f"归档有更新: {', '.join(changed[:5])}" + (' 等' if len(changed) > 5 else ''))
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join()
+
+    # ---- 查询 ----
+
+    @staticmethod
+    def _page(items: List, query: Dict[str, str]) -> Dict:
+        offset = max(0, int(query.get('offset', 0)))
+        limit = min(MAX_PAGE_SIZE, max(1, int(query.get('limit', DEFAULT_PAGE_SIZE))))
+        page = items[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(items) else None
+        return {'total': len(items), 'offset': offset, 'limit': limit, 'next_offset': next_offset, 'items': page}
+
+    def list_dates(self, query: Dict[str, str]) -> Dict:
+        dates = self.catalog.dates(query.get('start'), query.get('end'))
+        items = []
+        for date_str in dates:
+            editions = self.catalog.editions(date_str) or {}
+            items.append({'date': date_str, 'editions': len(editions),
+                          'articles': sum(len(a) for a in editions.values())})
+        return self._page(items, query)
+
+    def date_editions(self, date_str: str) -> Optional[Dict]:
+        editions = self.catalog.editions(date_str)
+        if editions is None:
+            return None
+        return {'date': date_str, 'editions': [{'edition': code, 'articles': len(articles)}
+                                               for code, articles in sorted(editions.items())]}
+
+    def edition_articles(self, date_str: str, edition: str) -> Optional[Dict]:
+        articles = (self.catalog.editions(date_str) or {}).get(edition)
+        if articles is None:
+            return None
+        return {'date': date_str, 'edition': edition, 'articles': articles}
+
+    def list_articles(self, query: Dict[str, str]) -> Dict:
+        edition = query.get('edition')
+        items = []
+        for date_str in self.catalog.dates(query.get('start'), query.get('end')):
+            for code, articles in sorted((self.catalog.editions(date_str) or {}).items()):
+                if not edition or code == edition:
+                    items.extend(articles)
+        return self._page(items, query)
+
+    def article_body(self, article_id: str) -> Optional[bytes]:
+        located = self.catalog.locate(article_id)
+        if located is None:
+            return None
+        date_str, path = located
+        key = f"article:{date_str}:{article_id}"
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        record = read_article_file(path)
+        if record is None:
+            return None
+        record['article_id'] = record['article_id'] or article_id
+        record['date'] = record['date'] or date_str
+        body = json.dumps(record, ensure_ascii=False).encode('utf-8')
+        self.cache.put(key, body)
+        return body
+
+    def metrics_report(self) -> Dict:
+        return {
+            'uptime_seconds': round(time.time() - self.started),
+            'catalog': {'days': len(self.catalog.days), 'articles': self.catalog.article_count(),
+                        'refreshes': self.catalog.refreshes,
+                        'last_refresh_ms': round(self.catalog.last_refresh_seconds * 1000, 2)},
+            'cache': self.cache.stats(),
+            'routes': self.metrics.stats(),
+        }
+
+
+# 路由: (接口名, 路径正则)
+ROUTES = (
+    ('dates', re.compile(r'^/dates$')),
+    ('date', re.compile(r'^/dates/(?P<date>\d{8})$')),
+    ('edition', re.compile(r'^/dates/(?P<date>\d{8})/(?P<edition>[A-Z]\d{2})$')),
+    ('articles', re.compile(r'^/articles$')),
+    ('article', re.compile(r'^/articles/(?P<article_id>[^/]+)$')),
+    ('metrics', re.compile(r'^/metrics$')),
+)
+
+
+class ArchiveRequestHandler(BaseHTTPRequestHandler):
+    service: ArchiveService = None
+
+    def _send(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+    def _dispatch(self, route: str, params: Dict[str, str], query: Dict[str, str]) -> int:
+        service = self.service
+        if route == 'article':
+            body = service.article_body(params['article_id'])
+            if body is None:
+                self._send_json(404, {'error': '文章不存在'})
+                return 404
+            self._send(200, body)
+            return 200
+        if route == 'dates':
+            payload = service.list_dates(query)
+        elif route == 'date':
+            payload = service.date_editions(params['date'])
+        elif route == 'edition':
+            payload = service.edition_articles(params['date'], params['edition'])
+        elif route == 'articles':
+            payload = service.list_articles(query)
+        else:
+            payload = service.metrics_report()
+        if payload is None:
+            self._send_json(404, {'error': '日期或版面不存在'})
+            return 404
+        self._send_json(200, payload)
+        return 200
+
+    def do_GET(self):
+        start = time.perf_counter()
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        # 旧文件名的文章ID含中文标题，客户端会做百分号编码
+        path = unquote(parts.path).rstrip('/') or '/'
+        route, status = 'unknown', 404
+        try:
+            for name, pattern in ROUTES:
+                match = pattern.match(path)
+                if match:
+                    route = name
+                    status = self._dispatch(name, match.groupdict(), query)
+                    break
+            else:
+                self._send_json(404, {'error': '未知接口'})
+        except ValueError:
+            status = 400
+            self._send_json(400, {'error': '参数错误'})
+        finally:
+            self.service.metrics.record(route, time.perf_counter() - start, status)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(service: ArchiveService, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    handler = type('BoundArchiveRequestHandler', (ArchiveRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新京报归档只读查询服务')
+    parser.add_argument('output_dir', help='归档根目录')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-mb', type=float, default=64, help='文章缓存大小上限 (MB)')
+    parser.add_argument('--poll', type=float, default=5.0, help='检查新文件的间隔（秒）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    service = ArchiveService(args.output_dir, int(args.cache_mb * 1024 * 1024), args.poll)
+    service.start_watcher()
+    server = make_server(service, args.host, args.port)
+    logger.info(f"查询服务已启动: http://{args.host}:{args.port}/dates  (指标: /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("服务停止")
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import re
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from xinjing_selectors import DEFAULT_SELECTORS
+
+WEEKDAY_NAMES = ('周一', '周二', '周三', '周四', '周五', '周六', '周日')
+
+
+class SiteAdapter:
+    """一份报纸的站点规则：首页与日期地址、元素选择器、版面代码、出版日历
+
+    爬虫的流程（日历 → 版面列表 → 文章列表 → 正文）对同类数字报通用，站点之间只有这些规则不同。
+    """
+    name = ''
+    display_name = ''
+    base_url = ''
+    # 日历里选不到日期时直接打开当天头版的地址，可用 {base} {year} {month} {day} {date}
+    date_url_template = ''
+    # {逻辑元素: [(By, 选择器), ...]}，与 SelectorRegistry 的选择器链相同
+    selectors: Dict[str, List[Tuple[str, str]]] = DEFAULT_SELECTORS
+    # 从版面链接文字中提取版面代码
+    edition_pattern = re.compile(r'(A\d{2})')
+    # 版面列表读取失败时至少尝试的版面
+    default_edition = 'A01'
+    # 不出报的星期（0=周一 … 6=周日）
+    off_weekdays = frozenset()
+    # 页面标题或开头出现这些文字时视为被封禁/要求验证（熔断信号）
+    block_markers = ('访问过于频繁', '访问受限', '请输入验证码', '403 Forbidden', 'Access Denied')
+
+    def __init__(self, base_url: str = None):
+        # base_url 可覆盖（本地故障注入站点等）
+        if base_url:
+            self.base_url = base_url
+
+    @property
+    def selector_state_file(self) -> str:
+        return f'selector_state_{self.name}.json'
+
+    def date_url(self, date_str: str) -> str:
+        return self.date_url_template.format(base=self.base_url, year=date_str[:4], month=date_str[4:6],
+                                             day=date_str[6:8], date=date_str)
+
+    def parse_edition(self, text: str) -> Optional[str]:
+        match = self.edition_pattern.search(text or '')
+        return match.group(1) if match else None
+
+    def off_day(self, date_str: str) -> Optional[str]:
+        """不出报的日期返回星期名称，否则返回None"""
+        weekday = datetime.strptime(date_str, "%Y%m%d").weekday()
+        return WEEKDAY_NAMES[weekday] if weekday in self.off_weekdays else None
+
+
+class BJNewsAdapter(SiteAdapter):
+    name = 'bjnews'
+    display_name = '新京报'
+    base_url = 'https://epaper.bjnews.com.cn/'
+    date_url_template = '{base}html/{year}/{date}/{date}_A01.html'
+    off_weekdays = frozenset({5, 6})
+
+    @property
+    def selector_state_file(self) -> str:
+        # 沿用原来的命中记录文件
+        return 'selector_state.json'
+
+
+class ConfiguredSite(SiteAdapter):
+    """由JSON配置定义的站点，新增同类数字报时不用复制爬虫代码
+
+    配置示例:
+      {"name": "xxx", "display_name": "某报", "base_url": "https://...",
+       "date_url_template": "{base}html/{year}-{month}/{day}/node_1.htm",
+       "edition_pattern": "([A-Z]\\\\d{2})", "default_edition": "A01", "off_weekdays": [6],
+       "block_markers": ["访问过于频繁"],
+       "selectors": {"edition_list": [["css selector", ".nav ul"]]}}
+    没有给出的选择器沿用新京报的选择器链（其中的CSS备选适用于同一类数字报系统）。
+    """
+
+    def __init__(self, config: Dict, base_url: str = None):
+        super().__init__(base_url or config['base_url'])
+        self.name = config['name']
+        self.display_name = config.get('display_name', self.name)
+        self.date_url_template = config.get('date_url_template', '')
+        if config.get('edition_pattern'):
+            self.edition_pattern = re.compile(config['edition_pattern'])
+        self.default_edition = config.get('default_edition', self.default_edition)
+        self.off_weekdays = frozenset(config.get('off_weekdays', ()))
+        self.block_markers = tuple(config.get('block_markers', self.block_markers))
+        self.selectors = dict(DEFAULT_SELECTORS)
+        for element, chain in config.get('selectors', {}).items():
+            self.selectors[element] = [(by, value) for by, value in chain]
+
+
+def load_site_config(path: str) -> ConfiguredSite:
+    with open(path, 'r', encoding='utf-8') as f:
+        return ConfiguredSite(json.load(f))
+
+
+# 内置站点
+SITES = {
+    BJNewsAdapter.name: BJNewsAdapter,
+}
+
+
+def get_site(name: str) -> SiteAdapter:
+    """按名称取内置站点，以 .json 结尾时按配置文件加载"""
+    if name.endswith('.json'):
+        return load_site_config(name)
+    if name not in SITES:
+        raise ValueError(f"未知站点: {name}（内置站点: {', '.join(SITES)}，或给出站点配置 .json 文件）")
+    return SITES[name]()
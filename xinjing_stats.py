@@ -0,0 +1,243 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from xinjing_archive import iter_day_dirs, read_day_manifest
+
+STATS_DB_FILE = 'crawl_stats.db'
+# 累加的数值列（版面明细、日汇总、月汇总共用）
+METRICS = ('listed', 'saved', 'skipped', 'failed', 'bytes', 'retries', 'seconds')
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS edition_stats (
+    date TEXT NOT NULL, edition TEXT NOT NULL, status TEXT,
+    {', '.join(f'{m} REAL NOT NULL DEFAULT 0' for m in METRICS)},
+    updated TEXT, PRIMARY KEY (date, edition));
+CREATE TABLE IF NOT EXISTS daily_stats (
+    date TEXT PRIMARY KEY, month TEXT NOT NULL, status TEXT, editions INTEGER NOT NULL DEFAULT 0,
+    failed_editions INTEGER NOT NULL DEFAULT 0, wall_seconds REAL, runs INTEGER NOT NULL DEFAULT 0,
+    {', '.join(f'{m} REAL NOT NULL DEFAULT 0' for m in METRICS)},
+    updated TEXT);
+CREATE TABLE IF NOT EXISTS monthly_stats (
+    month TEXT PRIMARY KEY, dates INTEGER NOT NULL DEFAULT 0, editions INTEGER NOT NULL DEFAULT 0,
+    failed_editions INTEGER NOT NULL DEFAULT 0,
+    {', '.join(f'{m} REAL NOT NULL DEFAULT 0' for m in METRICS)});
+CREATE TABLE IF NOT EXISTS monthly_edition_stats (
+    month TEXT NOT NULL, edition TEXT NOT NULL, dates INTEGER NOT NULL DEFAULT 0,
+    {', '.join(f'{m} REAL NOT NULL DEFAULT 0' for m in METRICS)},
+    PRIMARY KEY (month, edition));
+CREATE INDEX IF NOT EXISTS daily_stats_month ON daily_stats (month);
+"""
+
+
+def _month(date_str: str) -> str:
+    return f"{date_str[:4]}-{date_str[4:6]}"
+
+
+class StatsStore:
+    """爬取统计库：每个日期完成时写入版面明细，并增量维护日汇总与月汇总
+
+    同一日期/版面重爬时替换旧记录，汇总表按新旧差值更新，不需要重新扫描。
+    """
+
+    def __init__(self, path: str = STATS_DB_FILE):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # 第一次用到时再连接（回填线程各自在线程内创建爬虫）
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _delta(new: Dict, old: Optional[sqlite3.Row], keys) -> Dict[str, float]:
+        return {k: (new.get(k) or 0) - (old[k] if old is not None else 0) for k in keys}
+
+    def _add(self, table: str, key_cols: Dict[str, str], delta: Dict[str, float]):
+        # 汇总行不存在时先插入零行，再按差值累加
+        cols = ', '.join(key_cols)
+        marks = ', '.join('?' for _ in key_cols)
+        self.conn.execute(f"INSERT OR IGNORE INTO {table} ({cols}) VALUES ({marks})", tuple(key_cols.values()))
+        sets = ', '.join(f"{k} = {k} + ?" for k in delta)
+        where = ' AND '.join(f"{k} = ?" for k in key_cols)
+        self.conn.execute(f"UPDATE {table} SET {sets} WHERE {where}",
+                          tuple(delta.values()) + tuple(key_cols.values()))
+
+    def record_date(self, date_str: str, status: str, editions: Dict[str, Dict],
+                    wall_seconds: float = None):
+        """记录一个日期（或其中部分版面）的爬取结果，editions 与日期清单中的版面结果相同"""
+        month = _month(date_str)
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock, self.conn:
+            conn = self.conn
+            old_daily = conn.execute("SELECT * FROM daily_stats WHERE date = ?", (date_str,)).fetchone()
+            for edition, result in editions.items():
+                new = {m: result.get(m, 0) or 0 for m in METRICS}
+                old = conn.execute("SELECT * FROM edition_stats WHERE date = ? AND edition = ?",
+                                   (date_str, edition)).fetchone()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO edition_stats (date, edition, status, {', '.join(METRICS)}, updated) "
+                    f"VALUES (?, ?, ?, {', '.join('?' for _ in METRICS)}, ?)",
+                    (date_str, edition, result.get('status', 'ok'), *new.values(), now))
+                delta = self._delta(new, old, METRICS)
+                delta['dates'] = 0 if old is not None else 1
+                self._add('monthly_edition_stats', {'month': month, 'edition': edition}, delta)
+
+            # 日汇总由该日期的版面明细重新求和（每天十几行），月汇总按新旧日汇总的差值更新
+            row = conn.execute(
+                f"SELECT COUNT(*) AS editions, SUM(status = 'failed') AS failed_editions, "
+                f"{', '.join(f'SUM({m}) AS {m}' for m in METRICS)} FROM edition_stats WHERE date = ?",
+                (date_str,)).fetchone()
+            new_daily = {k: row[k] or 0 for k in ('editions', 'failed_editions') + METRICS}
+            conn.execute(
+                f"INSERT OR REPLACE INTO daily_stats (date, month, status, wall_seconds, runs, "
+                f"{', '.join(new_daily)}, updated) VALUES (?, ?, ?, ?, ?, {', '.join('?' for _ in new_daily)}, ?)",
+                (date_str, month, status,
+                 wall_seconds if wall_seconds is not None else (old_daily['wall_seconds'] if old_daily else None),
+                 (old_daily['runs'] if old_daily else 0) + 1, *new_daily.values(), now))
+            delta = self._delta(new_daily, old_daily, new_daily)
+            delta['dates'] = 0 if old_daily is not None else 1
+            self._add('monthly_stats', {'month': month}, delta)
+
+    def rebuild(self):
+        """按版面明细重新计算全部汇总（只在怀疑汇总不一致时使用）"""
+        sums = ', '.join(f'SUM({m})' for m in METRICS)
+        coalesced = ', '.join(f'COALESCE(SUM({m}), 0)' for m in METRICS)
+        with self._lock, self.conn:
+            conn = self.conn
+            conn.execute("DELETE FROM monthly_stats")
+            conn.execute("DELETE FROM monthly_edition_stats")
+            conn.execute(
+                f"UPDATE daily_stats SET (editions, failed_editions, {', '.join(METRICS)}) = "
+                f"(SELECT COUNT(*), COALESCE(SUM(status = 'failed'), 0), {coalesced} "
+                f"FROM edition_stats e WHERE e.date = daily_stats.date)")
+            conn.execute(
+                f"INSERT INTO monthly_stats (month, dates, editions, failed_editions, {', '.join(METRICS)}) "
+                f"SELECT month, COUNT(*), SUM(editions), SUM(failed_editions), {sums} FROM daily_stats GROUP BY month")
+            conn.execute(
+                f"INSERT INTO monthly_edition_stats (month, edition, dates, {', '.join(METRICS)}) "
+                f"SELECT substr(date, 1, 4) || '-' || substr(date, 5, 2), edition, COUNT(*), {sums} "
+                f"FROM edition_stats GROUP BY 1, edition")
+
+    def import_manifests(self, output_dir: str) -> int:
+        """用已有的日期清单初始化统计库（旧清单没有字节数、重试数和耗时，这几项记为0）"""
+        count = 0
+        for day_dir in iter_day_dirs(output_dir):
+            manifest = read_day_manifest(day_dir)
+            if not manifest or not manifest.get('date'):
+                continue
+            self.record_date(manifest['date'], manifest.get('status', 'ok'), manifest.get('editions', {}))
+            count += 1
+        return count
+
+    # ---- 查询 ----
+
+    def monthly(self, start: str = None, end: str = None) -> List[sqlite3.Row]:
+        return self.conn.execute(
+            "SELECT * FROM monthly_stats WHERE month >= ? AND month <= ? ORDER BY month",
+            (start or '0000-00', end or '9999-99')).fetchall()
+
+    def daily(self, start: str = None, end: str = None) -> List[sqlite3.Row]:
+        return self.conn.execute(
+            "SELECT * FROM daily_stats WHERE date >= ? AND date <= ? ORDER BY date",
+            (start or '00000000', end or '99999999')).fetchall()
+
+    def monthly_editions(self, start: str = None, end: str = None, edition: str = None) -> List[sqlite3.Row]:
+        sql = "SELECT * FROM monthly_edition_stats WHERE month >= ? AND month <= ?"
+        params = [start or '0000-00', end or '9999-99']
+        if edition:
+            sql += " AND edition = ?"
+            params.append(edition)
+        return self.conn.execute(sql + " ORDER BY month, edition", params).fetchall()
+
+    def editions(self, date_str: str) -> List[sqlite3.Row]:
+        return self.conn.execute("SELECT * FROM edition_stats WHERE date = ? ORDER BY edition",
+                                 (date_str,)).fetchall()
+
+
+def _print_rows(rows: List[sqlite3.Row], columns: List[str]):
+    if not rows:
+        print("（无记录）")
+        return
+    table = [[str(c) for c in columns]]
+    for row in rows:
+        cells = []
+        for col in columns:
+            value = row[col]
+            if isinstance(value, float):
+                value = f"{value:.1f}" if col in ('seconds', 'wall_seconds') else f"{value:.0f}"
+            cells.append('' if value is None else str(value))
+        table.append(cells)
+    widths = [max(len(r[i]) for r in table) for i in range(len(columns))]
+    for line in table:
+        print('  '.join(cell.rjust(width) for cell, width in zip(line, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新京报爬取统计查询')
+    parser.add_argument('--db', default=STATS_DB_FILE, help='统计库文件')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('monthly', help='月汇总')
+    p.add_argument('--start', help='起始月份 YYYY-MM')
+    p.add_argument('--end', help='结束月份 YYYY-MM')
+    p = sub.add_parser('daily', help='日汇总（每日期爬取耗时趋势）')
+    p.add_argument('--start', help='起始日期 YYYYMMDD')
+    p.add_argument('--end', help='结束日期 YYYYMMDD')
+    p = sub.add_parser('editions', help='每月各版面文章数')
+    p.add_argument('--start', help='起始月份 YYYY-MM')
+    p.add_argument('--end', help='结束月份 YYYY-MM')
+    p.add_argument('--edition', help='只看某个版面，如 A01')
+    p = sub.add_parser('date', help='某个日期的版面明细')
+    p.add_argument('date', help='日期 YYYYMMDD')
+    p = sub.add_parser('import', help='用归档中的日期清单初始化统计库')
+    p.add_argument('output_dir', help='归档根目录')
+    sub.add_parser('rebuild', help='按版面明细重新计算汇总')
+    args = parser.parse_args()
+
+    store = StatsStore(args.db)
+    start = time.perf_counter()
+    if args.command == 'monthly':
+        _print_rows(store.monthly(args.start, args.end),
+                    ['month', 'dates', 'editions', 'failed_editions', 'listed', 'saved', 'skipped',
+                     'failed', 'bytes', 'retries', 'seconds'])
+    elif args.command == 'daily':
+        _print_rows(store.daily(args.start, args.end),
+                    ['date', 'status', 'editions', 'failed_editions', 'listed', 'saved', 'skipped',
+                     'failed', 'bytes', 'retries', 'seconds', 'wall_seconds', 'runs'])
+    elif args.command == 'editions':
+        _print_rows(store.monthly_editions(args.start, args.end, args.edition),
+                    ['month', 'edition', 'dates', 'listed', 'saved', 'failed', 'bytes', 'seconds'])
+    elif args.command == 'date':
+        _print_rows(store.editions(args.date),
+                    ['edition', 'status', 'listed', 'saved', 'skipped', 'failed', 'bytes', 'retries', 'seconds'])
+    elif args.command == 'import':
+        if not os.path.isdir(args.output_dir):
+            print(f"目录不存在: {args.output_dir}")
+            return 1
+        print(f"已导入 {store.import_manifests(args.output_dir)} 个日期清单")
+    else:
+        store.rebuild()
+        print("汇总已重新计算")
+    print(f"（查询耗时 {(time.perf_counter() - start) * 1000:.1f} ms）")
+    store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
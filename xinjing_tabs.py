@@ -0,0 +1,414 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+from urllib.parse import urldefrag
+
+from selenium.common.exceptions import TimeoutException
+
+from xinjing_archive import make_article_id
+from xinjing_driver import RssSampler, driver_process_pid
+from xinjing_logging import log_event, timed_phase
+from xinjing_selectors import LayoutChangedError
+from xinjing_text import title_key
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EditionTab:
+    """一个标签页及其当前负责的版面"""
+    handle: str
+    edition: Optional[str] = None
+    state: str = 'idle'          # idle → edition → next ⇄ article → idle（edition/article 为等待该页加载）
+    articles: Deque[Dict] = field(default_factory=deque)
+    current: Optional[Dict] = None
+    ids: Dict[str, str] = field(default_factory=dict)
+    legacy: Dict[str, str] = field(default_factory=dict)
+    listed: int = 0
+    saved: int = 0
+    skipped: int = 0
+    failed: int = 0
+    bytes: int = 0
+    error: str = ''
+    started: float = 0.0
+    # 正在加载的页面：目标地址、跳转前文档的 timeOrigin、发起时间
+    target: str = ''
+    origin: float = 0.0
+    opened: float = 0.0
+
+    def reset(self, edition: Optional[str] = None):
+        # 换一个版面时清空计数（句柄保留）
+        fresh = EditionTab(self.handle, edition)
+        for name in self.__dataclass_fields__:
+            setattr(self, name, getattr(fresh, name))
+
+
+class TabEditionRunner:
+    """在同一个浏览器里开 K 个标签页，每个标签页负责一个版面，轮流驱动
+
+    跳转都用脚本发起（不等待加载完成），驱动切到下一个标签页继续工作；
+    轮回来时该页通常已经加载完毕，等待时间被其他标签页的工作覆盖。
+    """
+
+    def __init__(self, crawler, tabs: int = 3):
+        self.crawler = crawler
+        self.tabs = max(1, tabs)
+        self._tabs: List[EditionTab] = []
+        self._main_handle: Optional[str] = None
+
+    @property
+    def driver(self):
+        return self.crawler.driver
+
+    def _ensure_tabs(self) -> List[EditionTab]:
+        # 浏览器重建后旧的句柄失效，重新打开
+        handles = self.driver.window_handles
+        if self._main_handle not in handles:
+            self._main_handle = handles[0]
+            self._tabs = []
+        self._tabs = [tab for tab in self._tabs if tab.handle in handles]
+        while len(self._tabs) < self.tabs:
+            self.driver.switch_to.new_window('tab')
+            self._tabs.append(EditionTab(self.driver.current_window_handle))
+        self.driver.switch_to.window(self._main_handle)
+        return self._tabs
+
+    def _edition_urls(self) -> Dict[str, str]:
+        # 一次脚本调用取出版面列表里每个版面的地址
+        edition_ul = self.crawler.selectors.find(self.driver, 'edition_list', self.crawler.timeout)
+        links = self.driver.execute_script(
+            "return Array.from(arguments[0].querySelectorAll('a')).map(a => [a.textContent, a.href]);",
+            edition_ul) or []
+        urls = {}
+        for text, href in links:
+            # 与 get_editions_by_click 相同的版面代码规则
+            code = self.crawler.site.parse_edition(text)
+            if code and code not in urls and href:
+                urls[code] = href
+        return urls
+
+    def _open(self, tab: EditionTab, url: str):
+        # 由脚本发起跳转，命令立即返回；记下旧文档的 timeOrigin，用来确认新页面已替换旧页面
+        self.crawler._throttle()
+        tab.origin = self.driver.execute_script(
+            "const origin = performance.timeOrigin; window.location.href = arguments[0]; return origin;", url)
+        tab.target, tab.opened = url, time.monotonic()
+
+    def _loaded(self, tab: EditionTab) -> bool:
+        """新文档已替换旧文档、地址与目标一致且加载完成；超过爬虫超时时间仍未完成时抛出 TimeoutException"""
+        origin, state, href = self.driver.execute_script(
+            "return [performance.timeOrigin, document.readyState, location.href];")
+        if origin != tab.origin and state == 'complete' and urldefrag(href)[0] == urldefrag(tab.target)[0]:
+            return True
+        if time.monotonic() - tab.opened > self.crawler.timeout:
+            raise TimeoutException(f"页面加载超时: {tab.target}（当前 {href}，{state}）")
+        return False
+
+    def _finish_edition(self, tab: EditionTab, date_str: str, results: Dict[str, Dict]):
+        status = 'failed' if tab.failed or tab.error else 'ok'
+        result = {'status': status, 'listed': tab.listed, 'saved': tab.saved,
+                  'skipped': tab.skipped, 'failed': tab.failed, 'bytes': tab.bytes, 'retries': 0,
+                  'seconds': round(time.perf_counter() - tab.started, 2), 'articles': dict(tab.ids)}
+        if tab.legacy:
+            result['legacy'] = dict(tab.legacy)
+        if tab.error:
+            result['error'] = tab.error
+        results[tab.edition] = result
+        logger.info(f"  [标签页] 版面 {tab.edition} 完成: 新保存 {tab.saved} 篇，跳过 {tab.skipped} 篇")
+        log_event('edition', date=date_str, edition=tab.edition, duration=time.perf_counter() - tab.started,
+                  listed=tab.listed, saved=tab.saved, skipped=tab.skipped, mode='tabs')
+        tab.edition, tab.state, tab.current = None, 'idle', None
+
+    def _step(self, tab: EditionTab, date_str: str, pending: Deque, urls: Dict[str, str],
+              results: Dict[str, Dict]):
+        crawler = self.crawler
+        crawler.current_date, crawler.current_edition = date_str, tab.edition
+        if tab.state == 'idle':
+            if not pending:
+                return
+            tab.reset(pending.popleft())
+            crawler.current_edition = tab.edition
+            tab.started = time.perf_counter()
+            self._open(tab, urls[tab.edition])
+            tab.state = 'edition'
+
+        elif tab.state == 'edition':
+            # 版面页已加载：取文章列表，已归档的直接跳过
+            clicks = []
+            for info in crawler.get_article_links_in_edition():
+                article_id = make_article_id(date_str, tab.edition, info['url'], info['content_id'], info['title'])
+                tab.ids[article_id] = info['url']
+                if crawler.check_article_exists(article_id, info['title'], date_str, tab.edition):
+                    tab.skipped += 1
+                    if article_id not in crawler.article_index.ids:
+                        tab.legacy[article_id] = title_key(info['title'])
+                elif info['url'].startswith('http'):
+                    tab.articles.append({'id': article_id, 'url': info['url'], 'title': info['title']})
+                else:
+                    clicks.append({'id': article_id, 'url': info['url'], 'index': info['index']})
+            tab.listed = len(tab.ids)
+            # 没有可用地址的文章（如 javascript:）趁还在版面页时点击进入，与点击流程相同
+            for info in clicks:
+                info['start'] = time.perf_counter()
+                try:
+                    article = crawler._click_article(info['index'])
+                except LayoutChangedError:
+                    raise
+                except Exception as e:
+                    logger.error(f"  [标签页] 版面 {tab.edition} 第 {info['index']} 篇点击打开失败: {e}")
+                    tab.failed += 1
+                    # 不确定停在哪一页，重新打开版面页再点下一篇
+                    self.driver.get(urls[tab.edition])
+                    crawler.selectors.find(self.driver, 'article_list', crawler.timeout)
+                    continue
+                self._record_article(tab, date_str, info, article)
+            tab.state = 'next'
+            self._step(tab, date_str, pending, urls, results)
+
+        elif tab.state == 'next':
+            reason = crawler._interrupt_reason()
+            if reason and tab.articles:
+                # 剩余文章放弃，整个版面稍后补爬
+                tab.error = reason
+                tab.articles.clear()
+                crawler._park(date_str, [tab.edition], reason)
+            if not tab.articles:
+                self._finish_edition(tab, date_str, results)
+                return
+            tab.current = tab.articles.popleft()
+            tab.current['start'] = time.perf_counter()
+            self._open(tab, tab.current['url'])
+            tab.state = 'article'
+
+        elif tab.state == 'article':
+            info, tab.current = tab.current, None
+            self._record_article(tab, date_str, info, crawler.extract_article_content())
+            tab.state = 'next'
+
+    def _record_article(self, tab: EditionTab, date_str: str, info: Dict, article):
+        # 保存提取到的文章并向熔断器报告；article 为 None 表示正文为空或超时
+        crawler = self.crawler
+        saved = False
+        if article:
+            article.date, article.edition = date_str, tab.edition
+            article.article_id, article.url = info['id'], info['url']
+            saved = crawler.save_article(article)
+        if article:
+            crawler._signal(True)
+        elif crawler._page_blocked():
+            crawler.breaker.trip('封禁页')
+        else:
+            crawler._signal(False, '正文为空或超时')
+        if saved:
+            tab.saved += 1
+            tab.bytes += len(article.content.encode('utf-8'))
+        elif not article:
+            tab.failed += 1
+        log_event('article', date=date_str, edition=tab.edition, duration=time.perf_counter() - info['start'],
+                  saved=saved, mode='tabs')
+
+    def crawl_date(self, date_str: str, only_editions: Optional[set] = None) -> int:
+        """用多个标签页爬取一个日期，返回新保存篇数（与 crawl_date_with_click 相同的清单和事件）"""
+        crawler = self.crawler
+        date_start = time.perf_counter()
+        results: Dict[str, Dict] = {}
+        urls: Dict[str, str] = {}
+        date_status = 'failed'
+        logger.info(f"\n{'=' * 60}")
+        logger.info(f"开始爬取日期: {date_str}（{self.tabs} 个标签页）")
+        logger.info(f"{'=' * 60}")
+
+        try:
+            tabs = self._ensure_tabs()
+            with timed_phase('navigate', date=date_str) as event:
+                event['ok'] = crawler.navigate_to_date(date_str)
+            if not event['ok']:
+                status = crawler._navigate_failed_status(date_str)
+                if status == 'navigate_failed':
+                    logger.error(f"无法导航到日期 {date_str}")
+                crawler._write_date_manifest(date_str, status, {})
+                return 0
+            with timed_phase('editions', date=date_str) as event:
+                urls = self._edition_urls()
+                event['count'] = len(urls)
+            logger.info(f"找到 {len(urls)} 个版面: {', '.join(urls)}")
+
+            pending = deque(code for code in urls if not only_editions or code in only_editions)
+            while pending or any(tab.state != 'idle' for tab in tabs):
+                # 熔断或日期预算用完时不再分配新版面（已在爬的版面做完当前文章后结束）
+                reason = crawler._interrupt_reason()
+                if reason and pending:
+                    crawler._park(date_str, list(pending), reason)
+                    pending.clear()
+                progressed = False
+                for tab in tabs:
+                    if tab.state == 'idle' and not pending:
+                        continue
+                    self.driver.switch_to.window(tab.handle)
+                    try:
+                        # 页面还没加载完的标签页先跳过，轮到下一个标签页
+                        if tab.state in ('edition', 'article') and not self._loaded(tab):
+                            continue
+                        progressed = True
+                        self._step(tab, date_str, pending, urls, results)
+                    except LayoutChangedError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"  [标签页] 版面 {tab.edition} 处理失败: {e}")
+                        if tab.state == 'article':
+                            tab.failed += 1
+                            tab.state = 'next'
+                        elif tab.edition:
+                            tab.error = str(e).splitlines()[0] if str(e) else type(e).__name__
+                            self._finish_edition(tab, date_str, results)
+                if not progressed:
+                    # 所有标签页都在加载，稍等再轮询
+                    time.sleep(0.05)
+            date_status = 'ok'
+        except LayoutChangedError:
+            crawler._write_date_manifest(date_str, 'failed', results, edition_list=list(urls))
+            raise
+        except Exception as e:
+            logger.error(f"爬取日期 {date_str} 失败: {e}")
+        finally:
+            try:
+                self.driver.switch_to.window(self._main_handle)
+            except Exception:
+                pass
+
+        if any(unit['date'] == date_str for unit in crawler.parked):
+            date_status = 'parked'
+        crawler._write_date_manifest(date_str, date_status, results, time.perf_counter() - date_start,
+                                     edition_list=list(urls))
+        listed = sum(r['listed'] for r in results.values())
+        saved = sum(r['saved'] for r in results.values())
+        skipped = sum(r['skipped'] for r in results.values())
+        logger.info(f"日期 {date_str} 完成: 共 {listed} 篇文章，新保存 {saved} 篇，跳过 {skipped} 篇\n")
+        log_event('date', date=date_str, duration=time.perf_counter() - date_start,
+                  listed=listed, saved=saved, skipped=skipped, mode='tabs')
+        return saved
+
+
+def run_tabs_engine(crawler, dates: List[str]) -> int:
+    """故障注入测试用：标签页模式"""
+    crawler.tabs = max(crawler.tabs, 3)
+    crawler._init_driver(headless=True)
+    saved = 0
+    for date_str in dates:
+        try:
+            saved += crawler.crawl_date_with_click(date_str)
+        except Exception as e:
+            logger.error(f"爬取日期 {date_str} 失败: {e}")
+    return saved
+
+
+def _crawl_editions_share(crawler, dates: List[str], worker: int, workers: int, totals: Dict, lock):
+    # 独立浏览器模式：每个浏览器负责每天的第 worker, worker+K, ... 个版面
+    crawler._init_driver(headless=True)
+    for date_str in dates:
+        if not crawler.navigate_to_date(date_str):
+            continue
+        editions = crawler.get_editions_by_click()
+        for edition_idx in range(worker, len(editions), workers):
+            result = crawler.crawl_edition(date_str, edition_idx, editions[edition_idx])
+            with lock:
+                totals['saved'] += result['saved']
+                totals['listed'] += result['listed']
+
+
+def compare_modes(crawler_factory, dates: List[str], k: int = 3) -> List[Dict]:
+    """同样的日期分别用 K 个标签页（一个浏览器）和 K 个独立浏览器爬取，比较吞吐与内存
+
+    crawler_factory(tabs) 返回一个指向空输出目录的新爬虫实例。
+    """
+    reports = []
+
+    crawler = crawler_factory(k)
+    sampler = RssSampler(lambda: [driver_process_pid(crawler.driver, crawler.launcher)]).start()
+    start = time.perf_counter()
+    try:
+        crawler._init_driver(headless=True)
+        saved = sum(crawler.crawl_date_with_click(d) for d in dates)
+    finally:
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+        crawler.launcher.release(crawler.driver)
+        crawler.launcher.stop()
+    reports.append({'mode': f'{k} 标签页', 'saved': saved, 'seconds': elapsed,
+                    'peak_rss': sampler.peak, 'mean_rss': sampler.mean})
+
+    crawlers = [crawler_factory(1) for _ in range(k)]
+    totals, lock = {'saved': 0, 'listed': 0}, threading.Lock()
+    sampler = RssSampler(lambda: [driver_process_pid(c.driver, c.launcher) for c in crawlers if c.driver]).start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=_crawl_editions_share, args=(c, dates, i, k, totals, lock))
+               for i, c in enumerate(crawlers)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+        for c in crawlers:
+            c.launcher.release(c.driver)
+            c.launcher.stop()
+    reports.append({'mode': f'{k} 个浏览器', 'saved': totals['saved'], 'seconds': elapsed,
+                    'peak_rss': sampler.peak, 'mean_rss': sampler.mean})
+
+    for report in reports:
+        report['per_hour'] = report['saved'] / report['seconds'] * 3600 if report['seconds'] > 0 else 0.0
+        peak_mb = report['peak_rss'] / 1024 / 1024
+        report['per_hour_per_gb'] = report['per_hour'] / (peak_mb / 1024) if peak_mb else 0.0
+        logger.info(f"[标签页对比] {report['mode']}: {report['saved']} 篇，{report['seconds']:.0f}s，"
+                    f"{report['per_hour']:.0f} 篇/小时，峰值内存 {peak_mb:.0f} MB，"
+                    f"{report['per_hour_per_gb']:.0f} 篇/小时/GB")
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='标签页并行 vs 独立浏览器：吞吐与内存对比')
+    parser.add_argument('--tabs', type=int, default=3, help='标签页数/浏览器数 K')
+    parser.add_argument('--dates', default='20250901', help='逗号分隔的日期')
+    parser.add_argument('--fixture', action='store_true', help='使用本地模拟站点（不访问真实网站）')
+    args = parser.parse_args()
+    dates = [d.strip() for d in args.dates.split(',') if d.strip()]
+
+    from xinjing import BJNewsCrawler
+
+    server = None
+    if args.fixture:
+        from xinjing_fixture import FixtureSite, FixtureServer, FaultProfile, fixture_crawler
+        server = FixtureServer(FixtureSite(dates, editions=8, articles=5)).start()
+
+        def factory(tabs):
+            return fixture_crawler(server.base_url, tempfile.mkdtemp(prefix='bjnews_tabs_'), FaultProfile(),
+                                   tabs=tabs)
+    else:
+        def factory(tabs):
+            output_dir = tempfile.mkdtemp(prefix='bjnews_tabs_')
+            return BJNewsCrawler(output_dir=output_dir, tabs=tabs,
+                                 stats_db=os.path.join(output_dir, 'crawl_stats.db'))
+
+    try:
+        reports = compare_modes(factory, dates, args.tabs)
+    finally:
+        if server:
+            server.stop()
+    print(f"\n{'模式':<12}{'篇数':>6}{'耗时(s)':>10}{'篇/小时':>10}{'峰值内存(MB)':>14}{'篇/小时/GB':>12}")
+    for r in reports:
+        print(f"{r['mode']:<12}{r['saved']:>6}{r['seconds']:>10.0f}{r['per_hour']:>10.0f}"
+              f"{r['peak_rss'] / 1024 / 1024:>14.0f}{r['per_hour_per_gb']:>12.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
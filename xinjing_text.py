@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+import html
+import time
+import argparse
+from multiprocessing import Pool
+from typing import Tuple
+
+from xinjing_archive import iter_article_files, read_article_file, write_article_file, parse_filename
+
+# 所有模式在模块加载时编译一次
+_BR_PATTERN = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+_INVISIBLE_PATTERN = re.compile('[\u00ad\u200b-\u200f\u2028\u2029\u2060\ufeff]')
+_CONTROL_PATTERN = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\x7f\ufffd]')
+_SURROGATE_PATTERN = re.compile('[\ud800-\udfff]')
+_SPACE_PATTERN = re.compile('[ \t\u00a0\u3000]+')
+_FILENAME_ILLEGAL_PATTERN = re.compile(r'[\\/*?:"<>|]')
+# 电子版页面上混进正文的导航/工具栏文字，整行匹配才删除
+_BOILERPLATE_PATTERN = re.compile(
+    r'^(?:返回目录|上一篇|下一篇|上一版|下一版|分享到[:：]?.*|打印本页|关闭窗口|'
+    r'【?字号[:：]?\s*大\s*中\s*小】?|放大|缩小|默认)$'
+)
+
+# 全角字母数字转半角；中文标点（，。：等）保持全角不变
+_FULLWIDTH_TABLE = {code: code - 0xFEE0 for code in range(0xFF10, 0xFF1A)}
+_FULLWIDTH_TABLE.update({code: code - 0xFEE0 for code in range(0xFF21, 0xFF3B)})
+_FULLWIDTH_TABLE.update({code: code - 0xFEE0 for code in range(0xFF41, 0xFF5B)})
+_FULLWIDTH_TABLE[0x3000] = 0x20
+
+
+def normalize_line(line: str) -> str:
+    line = line.translate(_FULLWIDTH_TABLE)
+    line = _INVISIBLE_PATTERN.sub('', line)
+    line = _CONTROL_PATTERN.sub('', line)
+    line = _SURROGATE_PATTERN.sub('', line)
+    return _SPACE_PATTERN.sub(' ', line).strip()
+
+
+def clean_title(raw: str) -> str:
+    """标题清理：<br>换成空格、去掉标签和实体、规范空白与全半角"""
+    text = _BR_PATTERN.sub(' ', raw)
+    text = _TAG_PATTERN.sub('', text)
+    text = html.unescape(text)
+    return normalize_line(text.replace('\n', ' ').replace('\r', ' '))
+
+
+def normalize_text(text: str) -> str:
+    """正文规范化：逐行清理，去掉空行和页面工具栏文字"""
+    lines = []
+    for line in text.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        line = normalize_line(line)
+        if line and not _BOILERPLATE_PATTERN.match(line):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def filename_title(title: str, limit: int = 50) -> str:
+    # 文件名用标题：去掉Windows非法字符并截断
+    safe_title = _FILENAME_ILLEGAL_PATTERN.sub('', normalize_line(title.replace('\n', ' ').replace('\r', ' ')))
+    return ' '.join(safe_title.split())[:limit]
+
+
+def title_key(title: str) -> str:
+    """匹配旧文件名用的标题键：与新文件名相同的清理与截断（旧文件名里的标题未经规范化）"""
+    return filename_title(clean_title(title))
+
+
+def normalize_article(article):
+    # 就地规范化 Article 的标题与正文
+    article.title = clean_title(article.title)
+    article.content = normalize_text(article.content)
+    return article
+
+
+def normalize_file(path: str, dry_run: bool = False) -> Tuple[int, int]:
+    """规范化单个文章文件，返回 (是否修改, 正文字符数)；无法解析的文件返回 (-1, 0)"""
+    record = read_article_file(path)
+    if record is None:
+        return -1, 0
+    title = clean_title(record['title'])
+    content = normalize_text(record['content'])
+    changed = title != record['title'] or content != record['content']
+    if changed and not dry_run:
+        # 补抓脚本的旧格式没有日期行，从文件名补上
+        date = record['date'] or (parse_filename(os.path.basename(path)) or {}).get('date', '')
+        write_article_file(path, title, record['edition'], date, content, record['article_id'], record['url'])
+    return int(changed), len(content)
+
+
+def _normalize_file_worker(args):
+    return normalize_file(*args)
+
+
+def normalize_archive(output_dir: str, workers: int = None, dry_run: bool = False) -> dict:
+    """多进程批量规范化已有归档，返回统计（含每核每秒处理文章数）"""
+    workers = workers or os.cpu_count() or 1
+    paths = list(iter_article_files(output_dir))
+    start = time.perf_counter()
+    stats = {'files': len(paths), 'changed': 0, 'invalid': 0, 'chars': 0, 'workers': workers}
+    if paths:
+        chunksize = max(1, len(paths) // (workers * 8))
+        with Pool(processes=workers) as pool:
+            for changed, chars in pool.imap_unordered(_normalize_file_worker,
+                                                      ((p, dry_run) for p in paths), chunksize):
+                if changed < 0:
+                    stats['invalid'] += 1
+                else:
+                    stats['changed'] += changed
+                    stats['chars'] += chars
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = elapsed
+    stats['per_second'] = len(paths) / elapsed if elapsed > 0 else 0.0
+    stats['per_core'] = stats['per_second'] / workers
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新京报归档文本规范化')
+    parser.add_argument('output_dir', help='归档根目录（YYYY-MM/DD 结构）')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认CPU核数')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不改写文件')
+    parser.add_argument('--benchmark', action='store_true', help='分别用1个和全部核心只读跑一遍，报告每核吞吐')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        for workers in sorted({1, args.workers or os.cpu_count() or 1}):
+            stats = normalize_archive(args.output_dir, workers, dry_run=True)
+            print(f"{workers} 进程: {stats['files']} 篇，{stats['seconds']:.2f}s，"
+                  f"{stats['per_second']:.0f} 篇/秒，{stats['per_core']:.0f} 篇/秒/核")
+        return 0
+
+    stats = normalize_archive(args.output_dir, args.workers, args.dry_run)
+    action = '需要修改' if args.dry_run else '已修改'
+    print(f"共 {stats['files']} 篇，{action} {stats['changed']} 篇，无法解析 {stats['invalid']} 篇，"
+          f"{stats['seconds']:.2f}s，{stats['per_core']:.0f} 篇/秒/核（{stats['workers']} 进程）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
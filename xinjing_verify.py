@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from xinjing_archive import (
+    article_day_dir, parse_filename, read_article_file, write_article_file,
+    read_day_manifest,
+)
+from xinjing_capture import parse_article_html
+from xinjing_export import content_hash
+from xinjing_http import get_pool, build_headers
+from xinjing_limits import RateLimiter
+from xinjing_text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# 被更正文章的旧版本保存在日期目录下的这个子目录里（扫描与索引只看日期目录下的文件，不受影响）
+HISTORY_DIR = '.history'
+# 每个日期目录下的校验记录: {article_id: {'etag', 'last_modified', 'text_hash', 'checked', 'revisions'}}
+# 与日期清单分开存放，校验不会改动爬虫写的清单
+VERIFY_STATE_NAME = '_verify.json'
+
+
+def _load_state(day_dir: str) -> Dict[str, Dict]:
+    try:
+        with open(os.path.join(day_dir, VERIFY_STATE_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(day_dir: str, states: Dict[str, Dict]):
+    path = os.path.join(day_dir, VERIFY_STATE_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(states, f, ensure_ascii=False, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def _decode(response) -> str:
+    content_type = response.headers.get('Content-Type', '')
+    charset = 'utf-8'
+    if 'charset=' in content_type:
+        charset = content_type.split('charset=', 1)[1].split(';')[0].strip() or charset
+    try:
+        return response.data.decode(charset, errors='replace')
+    except LookupError:
+        return response.data.decode('utf-8', errors='replace')
+
+
+def _day_articles(day_dir: str, manifest: Dict) -> Dict[str, Dict]:
+    """{article_id: {'path', 'url'}}；地址优先取清单里的文章列表，没有时读文件表头的链接"""
+    listed = {}
+    for result in manifest.get('editions', {}).values():
+        listed.update(result.get('articles') or {})
+    articles = {}
+    with os.scandir(day_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith('.txt'):
+                continue
+            info = parse_filename(entry.name)
+            if info is None:
+                continue
+            article_id, url = info['article_id'], listed.get(info['article_id'] or '')
+            if not url or not article_id:
+                record = read_article_file(entry.path) or {}
+                article_id = article_id or record.get('article_id')
+                url = url or record.get('url')
+            if article_id and url:
+                articles[article_id] = {'path': entry.path, 'url': url}
+    return articles
+
+
+def _comparable(text: str) -> str:
+    # 归档内容来自 Selenium 的 .text，重新获取的来自 BeautifulSoup，
+    # 两者的换行与空格不同（<br>、段落间距、标题主副题的连接），只比较文字本身
+    return ''.join(normalize_text(text).split())
+
+
+def text_hash(body: str) -> str:
+    return content_hash(_comparable(body))
+
+
+def title_changed(new_title: str, old_title: str) -> bool:
+    """重新获取的标题是否与归档标题不同（忽略空白差异；解析不到标题时不算变化）"""
+    return new_title != '无标题' and _comparable(new_title) != _comparable(old_title)
+
+
+def _save_revision(path: str, stamp: str) -> str:
+    # 旧版本复制到 .history/原文件名.时间戳.txt
+    history_dir = os.path.join(os.path.dirname(path), HISTORY_DIR)
+    os.makedirs(history_dir, exist_ok=True)
+    stem = os.path.basename(path)[:-4]
+    target = os.path.join(history_dir, f"{stem}.{stamp}.txt")
+    shutil.copy2(path, target)
+    return target
+
+
+def verify_article(article_id: str, path: str, url: str, state: Dict,
+                   limiter: Optional[RateLimiter] = None, keep_history: bool = True,
+                   dry_run: bool = False) -> str:
+    """条件请求重新获取一篇文章，内容变化时改写文件；返回 unchanged/not_modified/changed/failed
+
+    state 为该文章的校验记录（验证器与内容哈希），函数内原地更新。
+    """
+    extra = {}
+    if state.get('etag'):
+        extra['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        extra['If-Modified-Since'] = state['last_modified']
+    if limiter:
+        limiter.acquire()
+    try:
+        response = get_pool().request('GET', url, headers=build_headers(extra=extra), preload_content=True)
+    except Exception as e:
+        logger.warning(f"重新获取失败 {article_id}: {e}")
+        return 'failed'
+    state['checked'] = datetime.now().isoformat(timespec='seconds')
+    if response.status == 304:
+        return 'not_modified'
+    if response.status != 200:
+        logger.warning(f"重新获取失败 {article_id}: HTTP {response.status}")
+        return 'failed'
+    # 只有拿到200时才更新验证器，304说明旧验证器仍有效
+    state['etag'] = response.headers.get('ETag') or None
+    state['last_modified'] = response.headers.get('Last-Modified') or None
+
+    parsed = parse_article_html(_decode(response))
+    if parsed is None:
+        logger.warning(f"重新获取的页面无法解析 {article_id}: {url}")
+        return 'failed'
+    record = read_article_file(path)
+    if record is None:
+        return 'failed'
+    # 旧版本的校验记录（'hash'）按原样空白计算，不能直接比较，按文件内容重新计算
+    state.pop('hash', None)
+    old_hash = state.get('text_hash') or text_hash(record['content'])
+    new_hash = text_hash(parsed['content'])
+    state['text_hash'] = new_hash
+    retitled = title_changed(parsed['title'], record['title'])
+    if new_hash == old_hash and not retitled:
+        return 'unchanged'
+    if dry_run:
+        return 'changed'
+
+    if keep_history:
+        _save_revision(path, datetime.now().strftime('%Y%m%d%H%M%S'))
+    # 文件名保持不变（按文章ID查找），表头中的标题随更正更新
+    title = parsed['title'] if retitled else record['title']
+    date = record['date'] or (parse_filename(os.path.basename(path)) or {}).get('date', '')
+    write_article_file(path, title, record['edition'], date, parsed['content'],
+                       record['article_id'] or article_id, record['url'] or url)
+    state['revisions'] = state.get('revisions', 0) + 1
+    logger.info(f"文章已更正: {article_id} {title}")
+    return 'changed'
+
+
+def verify_day(day_dir: str, limiter: Optional[RateLimiter] = None, workers: int = 4,
+               keep_history: bool = True, dry_run: bool = False) -> Dict[str, int]:
+    """重新校验一个日期目录下的全部文章，验证器与内容哈希保存在 _verify.json"""
+    stats = {'articles': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0, 'failed': 0}
+    articles = _day_articles(day_dir, read_day_manifest(day_dir) or {})
+    states = _load_state(day_dir)
+    stats['articles'] = len(articles)
+    if not articles:
+        return stats
+
+    def _verify(item):
+        article_id, info = item
+        state = states.setdefault(article_id, {})
+        return verify_article(article_id, info['path'], info['url'], state, limiter, keep_history, dry_run)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for outcome in executor.map(_verify, sorted(articles.items())):
+            stats[outcome] += 1
+    if not dry_run:
+        _save_state(day_dir, states)
+    return stats
+
+
+def verify_range(output_dir: str, start_date: str, end_date: str, rate: float = 2.0,
+                 workers: int = 4, keep_history: bool = True, dry_run: bool = False) -> Dict:
+    """按日期范围重新校验，只改写内容有变化的文章"""
+    start = time.perf_counter()
+    limiter = RateLimiter(rate, burst=workers)
+    totals = {'days': 0, 'articles': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0, 'failed': 0}
+    current = datetime.strptime(start_date, "%Y%m%d")
+    end = datetime.strptime(end_date, "%Y%m%d")
+    while current <= end:
+        date_str = current.strftime("%Y%m%d")
+        current += timedelta(days=1)
+        day_dir = article_day_dir(output_dir, date_str)
+        if not os.path.isdir(day_dir):
+            continue
+        stats = verify_day(day_dir, limiter, workers, keep_history, dry_run)
+        totals['days'] += 1
+        for key, value in stats.items():
+            totals[key] += value
+        if stats['articles']:
+            logger.info(f"校验 {date_str}: {stats['articles']} 篇，未修改(304) {stats['not_modified']}，"
+                        f"内容相同 {stats['unchanged']}，已更正 {stats['changed']}，失败 {stats['failed']}")
+    totals['seconds'] = time.perf_counter() - start
+    totals['limiter'] = limiter.summary()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新京报归档重新校验：抓取网站对已归档文章的更正')
+    parser.add_argument('output_dir', help='归档根目录')
+    parser.add_argument('--start', required=True, help='起始日期 YYYYMMDD')
+    parser.add_argument('--end', help='结束日期 YYYYMMDD，默认与起始日期相同')
+    parser.add_argument('--rate', type=float, default=2.0, help='每秒请求数上限')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--no-history', action='store_true', help='不保留被更正文章的旧版本')
+    parser.add_argument('--dry-run', action='store_true', help='只报告哪些文章有变化，不改写文件')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    totals = verify_range(args.output_dir, args.start, args.end or args.start, args.rate,
+                          args.workers, not args.no_history, args.dry_run)
+    action = '有变化' if args.dry_run else '已更正'
+    print(f"校验 {totals['days']} 天，{totals['articles']} 篇：未修改(304) {totals['not_modified']}，"
+          f"内容相同 {totals['unchanged']}，{action} {totals['changed']}，失败 {totals['failed']}，"
+          f"耗时 {totals['seconds']:.1f}s")
+    print(totals['limiter'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())